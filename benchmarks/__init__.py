@@ -0,0 +1 @@
+"""Benchmark suite of the tutils hot paths, run with ``python -m benchmarks``."""
@@ -0,0 +1,89 @@
+"""
+    Run the benchmark suite.
+
+    python -m benchmarks                                   # all cases, 10 / 1k / 50k scripts
+    python -m benchmarks --sizes 10,1000 -o new.json       # quicker, write results
+    python -m benchmarks --compare old.json -o new.json    # exit 1 on regressions
+
+ Run it from the repository root, so ``tutils`` is imported from the tree.
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+def _sizes(text: str) -> list:
+    return [int(i) for i in text.split(",") if i.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="tutils benchmark suite")
+    parser.add_argument("--sizes", type=_sizes, default=[10, 1000, 50000],
+                        help="script counts of the synthetic repositories (default: 10,1000,50000)")
+    parser.add_argument("--sync-sizes", type=_sizes, default=[10, 1000],
+                        help="script counts of the synced remote repositories (default: 10,1000)")
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="run only cases matching this glob, like 'list_scripts.*', can be repeated")
+    parser.add_argument("--repeat", type=int, default=None, help="override the repeat count of every case")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "tutils-bench",
+                        help="where synthetic repositories are generated and kept between runs")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="write JSON results to this file")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown counted as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir.resolve()
+    home = workdir / "home"
+    home.mkdir(parents=True, exist_ok=True)
+    # before importing tutils: its paths derive from the home directory
+    os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+    os.environ["TUTILS_NO_DAEMON"] = "1"
+
+    from . import cases
+    from .harness import compare, format_comparison, format_results, load_results, measure, write_results
+
+    def selected(name: str) -> bool:
+        return not args.filter or any(fnmatch.fnmatch(name, i) for i in args.filter)
+
+    def groups():
+        for count in args.sizes:
+            yield lambda count=count: cases.catalog_cases(workdir, count)
+        yield lambda: cases.config_cases(workdir)
+        yield cases.docs_cases
+        yield lambda: cases.runner_cases(workdir)
+
+    results = {}
+
+    def run(case_list):
+        for case in case_list:
+            if selected(case.name):
+                print(f"  {case.name} ...", file=sys.stderr, flush=True)
+                results[case.name] = measure(case, args.repeat)
+
+    try:
+        for group in groups():
+            run(group())
+        if args.sync_sizes:
+            with cases.remote_server(workdir / "repos") as base_url:
+                for count in args.sync_sizes:
+                    run(cases.sync_cases(workdir, count, base_url))
+    finally:
+        cases.stop_worker()
+
+    print(format_results(results), file=sys.stderr)
+    write_results(results, args.output)
+
+    if args.compare is not None:
+        rows = compare(load_results(args.compare), results, args.threshold)
+        print(format_comparison(rows), file=sys.stderr)
+        if any(i["status"] == "regression" for i in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
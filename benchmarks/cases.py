@@ -0,0 +1,180 @@
+"""
+    Benchmark cases of the tutils hot paths.
+
+ Every case works inside the benchmark work directory: HOME points there
+ (see ``__main__``), so config, catalog, worker sockets and the blob store
+ never touch the real ``~/.tutils``.
+"""
+import functools
+import http.server
+import io
+import itertools
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+from .harness import Case
+from .synth import make_repository, script_names
+
+DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+
+
+def _config(repo: Path):
+    from tutils.model import AppConfig
+
+    return AppConfig.model_construct(repository=[{"path": str(repo), "type": "local", "link": ""}])
+
+
+def catalog_cases(workdir: Path, count: int) -> List[Case]:
+    """ScriptManager construction, listing, search and lookups over one repository of *count* scripts."""
+    from tutils.catalog import Catalog
+    from tutils.scripts import ScriptManager
+
+    repo = make_repository(workdir / "repos", count)
+    config = _config(repo)
+    cache_path = workdir / "cache" / str(count) / "catalog.pickle"
+    names = script_names(count)
+    target = names[len(names) // 2]
+    # parsing every YAML of a big repository takes seconds, time it fewer times
+    cold_repeat = 1 if count >= 10000 else 3
+
+    def cold():
+        cache_path.unlink(missing_ok=True)
+
+    def manager():
+        return ScriptManager(config, Catalog(cache_path))
+
+    # build the warm catalog once, with search and name indexes
+    manager().list_scripts()
+    warm = manager()
+    warm.fuzzy_search(target, limit=10)
+    warm.resolve_script(target)
+
+    return [
+        Case(f"list_scripts.cold[{count}]", lambda _: manager().list_scripts(), setup=cold, repeat=cold_repeat),
+        Case(f"scriptmanager.init[{count}]", manager),
+        Case(f"list_scripts.warm[{count}]", lambda sm: sm.list_scripts(), setup=manager),
+        Case(f"fuzzy_search[{count}]", lambda sm: sm.fuzzy_search("hash zip", limit=10), setup=manager),
+        Case(f"get_script_by_path[{count}]", lambda sm: sm.get_script_by_path(f"Bench.{target}"), setup=manager),
+        Case(f"resolve_script[{count}]", lambda sm: sm.resolve_script(target), setup=manager),
+    ]
+
+
+def config_cases(workdir: Path) -> List[Case]:
+    """Config load from YAML, load from the compiled cache and save."""
+    from tutils.config import ConfigManager
+
+    path = workdir / "config" / "config.yaml"
+    cm = ConfigManager(path)
+    cm.set("repository", [{"path": f"/repos/{i}", "type": "local", "link": ""} for i in range(50)])
+    cm.save_config()
+    counter = itertools.count()
+
+    def drop_cache():
+        cm.cache_path.unlink(missing_ok=True)
+
+    def save():
+        cm.set("custom.bench", next(counter))
+        cm.save_config()
+
+    return [
+        Case("config.load.cold", lambda _: ConfigManager(path).config, setup=drop_cache),
+        Case("config.load.warm", lambda: ConfigManager(path).config),
+        Case("config.save", save),
+    ]
+
+
+def docs_cases() -> List[Case]:
+    """Docs page rendering, first render and cached."""
+    from tutils.docs_server import DocsCache
+
+    cache = DocsCache(DOCS_DIR)
+    cache.render("/cli-usage")
+    return [
+        Case("docs.render.cold", lambda: DocsCache(DOCS_DIR).render("/cli-usage")),
+        Case("docs.render.cached", lambda: cache.render("/cli-usage")),
+    ]
+
+
+def runner_cases(workdir: Path) -> List[Case]:
+    """ProcessRunner spawn overhead of a script doing nothing, cold and from the warm worker."""
+    from tutils.runner import ProcessRunner
+    from tutils.warmpool import is_supported
+
+    script = workdir / "noop.py"
+    script.write_text("pass\n", encoding="utf-8")
+
+    def run(runner):
+        res = runner.run_script(str(script), capture=True, echo=False)
+        assert res["exit_code"] == 0, res
+
+    cases = [Case("runner.spawn", functools.partial(run, ProcessRunner()), repeat=10)]
+    if is_supported():
+        warm = ProcessRunner(warm=True)
+        run(warm)
+        cases.append(Case("runner.spawn.warm", functools.partial(run, warm), repeat=10))
+    return cases
+
+
+def stop_worker() -> None:
+    from tutils.warmpool import WarmPool
+
+    WarmPool().request("stop")
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+
+@contextmanager
+def remote_server(root: Path) -> Iterator[str]:
+    """Serve *root* over HTTP on localhost, yield its base URL."""
+    handler = functools.partial(_QuietHandler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def sync_cases(workdir: Path, count: int, base_url: str) -> List[Case]:
+    """Full download of a remote repository of *count* scripts, and revalidation of an up to date one."""
+    from rich.console import Console
+    from tutils.model import RepositoryModel
+    from tutils.repository.blobstore import BlobStore
+    from tutils.repository.updater import RepositoryUpdater
+
+    repo = make_repository(workdir / "repos", count)
+    link = f"{base_url}/{repo.name}/index.yaml"
+    local = workdir / "sync" / f"local-{count}"
+    store = workdir / "sync" / f"store-{count}"
+    quiet = Console(file=io.StringIO())
+
+    def update(_=None):
+        model = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        errors = RepositoryUpdater(store=BlobStore(store), console=quiet).update([model])
+        assert errors == {str(local): None}, errors
+
+    def empty():
+        for path in (local, store):
+            shutil.rmtree(path, ignore_errors=True)
+        local.mkdir(parents=True)
+
+    def synced():
+        if not (local / "index.yaml").exists():
+            empty()
+            update()
+
+    repeat = 1 if count >= 10000 else 3
+    return [
+        Case(f"sync.full[{count}]", update, setup=empty, repeat=repeat),
+        Case(f"sync.revalidate[{count}]", update, setup=synced, repeat=repeat),
+    ]
@@ -0,0 +1,147 @@
+"""
+    Timing, result files and regression comparison.
+
+ A result file is JSON::
+
+    {"meta": {"tutils": "0.1.1a1", "python": "3.11.4", "platform": "...", "time": "...", "commit": "..."},
+     "results": {"list_scripts.warm[1000]": {"median": 0.0123, "min": 0.0119, "repeat": 5, ...}}}
+
+ Comparisons use medians: a case is a regression when it got slower than the
+ baseline by more than the threshold, and an improvement when it got faster
+ by more than the threshold.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+class Case:
+    """
+    One benchmark: *fn* timed *repeat* times.
+
+    *setup*, if given, runs untimed before each repetition and its return
+    value is passed to *fn*.
+    """
+
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable] = None, repeat: int = 5):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.repeat = repeat
+
+
+def measure(case: Case, repeat: Optional[int] = None) -> Dict:
+    """
+        time *case*, one warm-up run first unless it repeats once only.
+    :param repeat: override the repeat count of the case
+    :return: stats dict in seconds
+    """
+    repeat = max(1, repeat if repeat is not None else case.repeat)
+    times: List[float] = []
+    for i in range(repeat + (1 if repeat > 1 else 0)):
+        args = (case.setup(),) if case.setup is not None else ()
+        start = time.perf_counter()
+        case.fn(*args)
+        elapsed = time.perf_counter() - start
+        if repeat == 1 or i > 0:
+            times.append(elapsed)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "repeat": len(times),
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def metadata() -> Dict:
+    """Describe the environment the results were taken in."""
+    import tutils
+
+    return {
+        "tutils": tutils.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+    }
+
+
+def write_results(results: Dict[str, Dict], output: Optional[Path]) -> Dict:
+    """Write results with metadata to *output* (stdout if None), return the document."""
+    document = {"meta": metadata(), "results": results}
+    text = json.dumps(document, indent=2)
+    if output is None:
+        sys.stdout.write(text + "\n")
+    else:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+    return document
+
+
+def load_results(path: Path) -> Dict[str, Dict]:
+    """Return the results of a result file."""
+    return json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float = 0.2) -> List[Dict]:
+    """
+        compare medians of cases present in both result sets.
+    :param threshold: relative change counted as a regression or improvement
+    :return: rows with name, baseline, current, ratio and status (regression, improvement, same)
+    """
+    rows = []
+    for name in current:
+        if name not in baseline:
+            continue
+        base, cur = baseline[name]["median"], current[name]["median"]
+        ratio = cur / base if base > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "same"
+        rows.append({"name": name, "baseline": base, "current": cur, "ratio": ratio, "status": status})
+    return rows
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:10.3f} ms"
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    width = max((len(i) for i in results), default=0)
+    return "\n".join(
+        f"{name:<{width}}  {_ms(stats['median'])}  (min {_ms(stats['min']).strip()}, n={stats['repeat']})"
+        for name, stats in results.items()
+    )
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    width = max((len(i["name"]) for i in rows), default=0)
+    lines = [f"{'case':<{width}}  {'baseline':>13}  {'current':>13}  {'ratio':>6}  status"]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<{width}}  {_ms(row['baseline'])}  {_ms(row['current'])}  "
+            f"{row['ratio']:6.2f}  {row['status']}"
+        )
+    return "\n".join(lines)
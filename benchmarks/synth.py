@@ -0,0 +1,65 @@
+"""
+    Synthetic repositories in the ``index.yaml`` layout.
+
+ Repositories are generated deterministically from their size, so two runs
+ (or two machines) benchmark the same tree. A generated repository is
+ reused by later runs; it is marked complete only after every file exists.
+"""
+import base64
+import random
+from pathlib import Path
+
+MARKER = ".bench-complete"
+
+_WORDS = (
+    "file", "count", "tree", "net", "ping", "http", "json", "yaml", "csv", "image",
+    "resize", "hash", "zip", "backup", "sync", "clean", "watch", "log", "grep", "find",
+    "rename", "convert", "encode", "decode", "upload", "download", "mail", "git", "diff", "stat",
+)
+
+
+def script_names(count: int) -> list:
+    """Return *count* distinct script names, same for the same *count*."""
+    rng = random.Random(count)
+    return [f"{rng.choice(_WORDS)}-{rng.choice(_WORDS)}-{i}" for i in range(count)]
+
+
+def make_repository(root: Path, count: int, name: str = "Bench") -> Path:
+    """
+        create (or reuse) a repository of *count* scripts under *root*.
+    :param root: parent directory
+    :param count: number of scripts
+    :param name: repository name
+    :return: repository directory
+    """
+    path = Path(root) / f"{name.lower()}-{count}"
+    if (path / MARKER).exists():
+        return path
+    path.mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(count)
+    folders = []
+    for script in script_names(count):
+        folder = base64.urlsafe_b64encode(script.encode("utf-8")).decode("ascii").rstrip("=")
+        folders.append(folder)
+        script_dir = path / folder
+        script_dir.mkdir(exist_ok=True)
+        (script_dir / "index.yaml").write_text(
+            f"name: {script}\n"
+            f"version: 0.0.{rng.randrange(100)}\n"
+            f"description: {' '.join(rng.choice(_WORDS) for _ in range(6))}\n"
+            f"author: bench\n"
+            f"email: bench@example.com\n"
+            f"run: main.py\n"
+            f"src:\n  - main.py\n"
+            f"license: MIT\n",
+            encoding="utf-8",
+        )
+        (script_dir / "main.py").write_text(f"print({script!r})\n", encoding="utf-8")
+
+    (path / "index.yaml").write_text(
+        f"name: {name}\nscripts:\n" + "".join(f"  - {i}\n" for i in folders),
+        encoding="utf-8",
+    )
+    (path / MARKER).touch()
+    return path
@@ -0,0 +1,74 @@
+"""Tests for batch module."""
+import pytest
+
+from tutils.batch import BatchRunner, parse_jobs
+
+SCRIPT = """
+import sys, time
+time.sleep(float(sys.argv[2]))
+for i in range(3):
+    print(sys.argv[1], i)
+sys.exit(int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+"""
+
+
+class TestParseJobs:
+    """Test job file parsing."""
+
+    def test_plain_and_json_lines(self) -> None:
+        """Test plain lines, JSON lines, comments and blank lines."""
+        jobs = parse_jobs([
+            "# comment",
+            "",
+            "File.tcount --show 'my dir'",
+            '{"script": "tcount", "args": ["./docs"], "timeout": 5, "id": "docs"}',
+        ])
+
+        assert [(i.id, i.script, i.args, i.timeout) for i in jobs] == [
+            ("3", "File.tcount", ["--show", "my dir"], None),
+            ("docs", "tcount", ["./docs"], 5),
+        ]
+
+    def test_default_script(self) -> None:
+        """Test lines hold only arguments with a default script."""
+        jobs = parse_jobs(["./a", "./b --show"], script="tcount")
+
+        assert [(i.script, i.args) for i in jobs] == [("tcount", ["./a"]), ("tcount", ["./b", "--show"])]
+
+    def test_invalid_json(self) -> None:
+        """Test invalid JSON lines report their line number."""
+        with pytest.raises(ValueError, match="line 1"):
+            parse_jobs(['{"script": '])
+
+
+class TestBatchRunner:
+    """Test running jobs in parallel."""
+
+    def test_run_report(self, tmp_path) -> None:
+        """Test report keeps input order, captures output per job and counts statuses."""
+        script = tmp_path / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+        jobs = parse_jobs(
+            [
+                "slow 0.5",
+                "fast 0",
+                "bad 0 3",
+                '{"args": ["sleepy", "10"], "timeout": 0.5}',
+            ],
+            script=str(script),
+        )
+        jobs.append(parse_jobs(["missing.py"])[0])
+
+        runner = BatchRunner(jobs=4)
+        runner.resolve(jobs, lambda name: None)
+        report = runner.run(jobs)
+
+        results = report["jobs"]
+        assert [i["status"] for i in results] == ["ok", "ok", "failed", "timeout", "error"]
+        assert results[0]["stdout_lines"] == ["slow 0", "slow 1", "slow 2"]
+        assert results[1]["stdout_lines"] == ["fast 0", "fast 1", "fast 2"]
+        assert results[2]["exit_code"] == 3
+        assert report["summary"]["total"] == 5
+        assert report["summary"]["ok"] == 2
+        # jobs ran at once, not one after another
+        assert report["summary"]["duration"] < 1.5
@@ -0,0 +1,97 @@
+"""Tests for catalog module."""
+import os
+
+import yaml
+
+from tutils.catalog import Catalog
+
+
+def _make_repo(path):
+    script_dir = path / "c2NyaXB0"
+    script_dir.mkdir(parents=True)
+    (path / "index.yaml").write_text("name: Demo\nscripts:\n  - c2NyaXB0\n", encoding="utf-8")
+    (script_dir / "index.yaml").write_text(
+        "name: demo\ndescription: demo script\nrun: demo.py\nsrc:\n  - demo.py\n",
+        encoding="utf-8",
+    )
+    return {"path": str(path), "type": "local", "link": ""}
+
+
+class TestCatalog:
+    """Test catalog cache."""
+
+    def test_warm_load_does_not_parse_yaml(self, tmp_path, monkeypatch) -> None:
+        """Test a warm catalog serves repositories and scripts from cache."""
+        config = _make_repo(tmp_path / "repo")
+        cache_path = tmp_path / "catalog.pickle"
+
+        catalog = Catalog(cache_path)
+        repo = catalog.get_repository(config)
+        assert repo.name == "Demo"
+        assert [i.name for i in catalog.get_scripts(repo)] == ["demo"]
+        catalog.save()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("yaml parsed on warm load")
+
+        monkeypatch.setattr(yaml, "safe_load", _fail)
+        catalog = Catalog(cache_path)
+        repo = catalog.get_repository(config)
+        scripts = catalog.get_scripts(repo)
+        assert scripts[0].run == "demo.py"
+        assert not catalog.dirty
+
+    def test_changed_index_is_reloaded(self, tmp_path) -> None:
+        """Test a modified index file invalidates the cached entry."""
+        config = _make_repo(tmp_path / "repo")
+        cache_path = tmp_path / "catalog.pickle"
+
+        catalog = Catalog(cache_path)
+        catalog.get_repository(config)
+        catalog.save()
+
+        index = tmp_path / "repo" / "c2NyaXB0" / "index.yaml"
+        index.write_text("name: renamed\nrun: demo.py\n", encoding="utf-8")
+        st = os.stat(index)
+        os.utime(index, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        catalog = Catalog(cache_path)
+        repo = catalog.get_repository(config)
+        assert [i.name for i in catalog.get_scripts(repo)] == ["renamed"]
+        assert catalog.dirty
+
+    def test_get_script_reads_one_index(self, tmp_path, monkeypatch) -> None:
+        """Test looking up one script does not read the index files of the others."""
+        config = _make_repo(tmp_path / "repo")
+        other = tmp_path / "repo" / "b3RoZXI"
+        other.mkdir()
+        (other / "index.yaml").write_text("name: other\nrun: other.py\n", encoding="utf-8")
+        (tmp_path / "repo" / "index.yaml").write_text(
+            "name: Demo\nscripts:\n  - c2NyaXB0\n  - b3RoZXI\n", encoding="utf-8"
+        )
+        cache_path = tmp_path / "catalog.pickle"
+        catalog = Catalog(cache_path)
+        repo = catalog.get_repository(config)
+        assert [i.name for i in catalog.get_script_handles(repo)] == ["demo", "other"]
+        catalog.save()
+
+        (other / "index.yaml").write_text("name: other\nrun: changed.py\n", encoding="utf-8")
+        read = []
+        monkeypatch.setattr(yaml, "safe_load", lambda f: read.append(f.name) or {})
+        catalog = Catalog(cache_path)
+        repo = catalog.get_repository(config)
+        assert catalog.get_script(repo, "demo").run == "demo.py"
+        assert catalog.get_script(repo, "missing") is None
+        assert read == [str(other / "index.yaml")]
+
+    def test_script_handles_are_lazy(self, tmp_path) -> None:
+        """Test handles build the full script model on first use only."""
+        config = _make_repo(tmp_path / "repo")
+        catalog = Catalog(tmp_path / "catalog.pickle")
+        handle = catalog.get_script_handles(catalog.get_repository(config))[0]
+
+        assert handle.name == "demo"
+        assert handle._model is None
+        assert handle.description == "demo script"
+        assert handle.src == ["demo.py"]
+        assert handle.load() is handle.load()
@@ -1,5 +1,8 @@
 """Tests for CLI module."""
 
+import subprocess
+import sys
+
 import pytest
 from typer.testing import CliRunner
 
@@ -19,3 +22,13 @@ class TestMainCommands:
             result = runner.invoke(app, [cmd])
             assert result.exit_code == 0
             assert tutils.__version__ in result.output
+
+    def test_startup_is_import_light(self) -> None:
+        """Test importing the CLI does not load heavy modules or config."""
+        code = (
+            "import sys, tutils.cli; "
+            "print(','.join(m for m in ('rich', 'yaml', 'pydantic', 'tutils.config') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert result.returncode == 0
+        assert result.stdout.strip() == ""
@@ -0,0 +1,95 @@
+"""Tests for completion module."""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from tutils import completion
+from tutils.catalog import Catalog
+
+
+def _script(name, aliases=(), param=()):
+    return {"name": name, "aliases": list(aliases), "folder": name, "run": f"{name}.py",
+            "description": f"{name}\tscript", "param": list(param)}
+
+
+def _repo(path):
+    script_dir = path / "dGNvdW50"
+    script_dir.mkdir(parents=True)
+    (path / "index.yaml").write_text("name: File\nscripts:\n  - dGNvdW50\n", encoding="utf-8")
+    (script_dir / "index.yaml").write_text(
+        "name: tcount\nrun: tcount.py\nparam:\n  - name: --show\n    description: show files\n",
+        encoding="utf-8",
+    )
+    return {"path": str(path), "type": "local", "link": ""}
+
+
+class TestBuild:
+    """Test completion file content."""
+
+    def test_build(self) -> None:
+        """Test every runnable name is listed with its params, ambiguous short names are not."""
+        content = completion.build([
+            ("File", "/repos/File", [_script("tcount", aliases=["fc"], param=[{"name": "--show", "description": "show"}])]),
+            ("Net", "/repos/Net", [_script("tcount")]),
+        ])
+        lines = content.splitlines()[1:]
+
+        assert lines[:2] == ["repo\tFile", "repo\tNet"]
+        scripts = [i.split("\t")[1] for i in lines if i.startswith("script\t")]
+        assert scripts == ["File.tcount", "File.fc", "fc", "Net.tcount"]
+        assert "script\tfc\ttcount script" in lines
+        assert "param\tfc\t--show\tshow" in lines
+        assert "param\tFile.tcount\t--show\tshow" in lines
+
+
+class TestCatalogCompletion:
+    """Test the catalog keeps the completion file in sync."""
+
+    def test_written_on_change(self, tmp_path) -> None:
+        """Test the file is written with the catalog and only rewritten after a change."""
+        config = _repo(tmp_path / "repo")
+        catalog = Catalog(tmp_path / "catalog.pickle")
+        catalog.refresh([catalog.get_repository(config)])
+        catalog.save()
+        path = tmp_path / "completion.txt"
+        assert "param\ttcount\t--show\tshow files" in path.read_text(encoding="utf-8")
+
+        os.utime(path, ns=(0, 0))
+        catalog = Catalog(tmp_path / "catalog.pickle")
+        catalog.refresh([catalog.get_repository(config)])
+        catalog.save()
+        assert os.stat(path).st_mtime_ns == 0
+
+        index = tmp_path / "repo" / "dGNvdW50" / "index.yaml"
+        index.write_text("name: renamed\nrun: tcount.py\n", encoding="utf-8")
+        os.utime(index, ns=(0, 10**9))
+        catalog.refresh([catalog.get_repository(config)])
+        catalog.save()
+        assert "script\trenamed" in path.read_text(encoding="utf-8")
+
+    def test_unread_scripts_are_listed(self, tmp_path) -> None:
+        """Test a save after a command that read no script still lists every script."""
+        config = _repo(tmp_path / "repo")
+        catalog = Catalog(tmp_path / "catalog.pickle")
+        catalog.get_repository(config)
+        catalog.save()
+
+        content = (tmp_path / "completion.txt").read_text(encoding="utf-8")
+        assert "repo\tFile" in content
+        assert "script\ttcount" in content
+
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bash not available")
+    def test_bash_script(self, tmp_path) -> None:
+        """Test the bash script completes script names and params from the file."""
+        path = tmp_path / "completion.txt"
+        path.write_text(completion.build([("File", "/repos/File", [_script("tcount", param=[{"name": "--show"}])])]),
+                        encoding="utf-8")
+        script = completion.script("bash", path, {"run": [], "repository": ["show"]})
+        probe = script + (
+            't(){ COMP_WORDS=("$@"); COMP_CWORD=$((${#COMP_WORDS[@]}-1)); _tutils_complete; echo "${COMPREPLY[*]}"; }\n'
+            "t tutils run tc\nt tutils run tcount --\nt tutils repo show F\n"
+        )
+        out = subprocess.run(["bash", "-c", probe], capture_output=True, text=True, check=True).stdout
+        assert out.splitlines() == ["tcount", "--show", "File"]
@@ -0,0 +1,79 @@
+"""Tests for config module."""
+import os
+
+import pytest
+
+from tutils.config import ConfigManager
+from tutils.model import AppConfig
+
+
+class TestConfigManager:
+    """Test config persistence."""
+
+    def test_save_only_changes(self, tmp_path) -> None:
+        """Test saving an unchanged config does not rewrite the file."""
+        path = tmp_path / "config.yaml"
+        cm = ConfigManager(path)
+        assert path.is_file()
+        assert not cm.dirty
+        assert not cm.save_config()
+
+        config = cm.config
+        config.repository.append({"path": "/tmp/repo", "type": "local", "link": ""})
+        assert cm.dirty
+        assert cm.save_config(config)
+        assert not cm.save_config(config)
+        assert not [i for i in tmp_path.iterdir() if i.name.startswith(".")]
+
+        assert ConfigManager(path).config.repository == [{"path": "/tmp/repo", "type": "local", "link": ""}]
+
+    def test_get_set(self, tmp_path) -> None:
+        """Test dotted get/set work on the dict view and reach the model and the file."""
+        path = tmp_path / "config.json"
+        cm = ConfigManager(path)
+
+        cm.set("custom.editor.name", "vim")
+        cm.set("debug", True)
+        assert cm.get("custom.editor.name") == "vim"
+        assert cm.get("custom.missing", "x") == "x"
+        assert cm.config.debug is True
+        assert cm.config.custom == {"editor": {"name": "vim"}}
+
+        cm.config.verbose = True
+        assert cm.save_config()
+        assert cm.get("verbose") is True
+        assert ConfigManager(path).get("custom.editor.name") == "vim"
+
+    def test_view_is_not_rebuilt_on_read(self, tmp_path, monkeypatch) -> None:
+        """Test reading the model and get() reuse the dict view."""
+        cm = ConfigManager(tmp_path / "config.yaml")
+        cm.get("debug")
+        dumps = []
+        monkeypatch.setattr(AppConfig, "model_dump", lambda self, **kw: dumps.append(1) or {})
+
+        for _ in range(3):
+            assert cm.config is cm.config
+            cm.get("debug")
+
+        assert dumps == []
+
+    def test_compiled_cache(self, tmp_path, monkeypatch) -> None:
+        """Test the compiled cache is used while the YAML is unchanged and rebuilt after edits."""
+        path = tmp_path / "config.yaml"
+        cm = ConfigManager(path)
+        cm.set("log_level", "DEBUG")
+        cm.save_config()
+        assert cm.cache_path.is_file()
+
+        import yaml
+        monkeypatch.setattr(yaml, "safe_load", lambda f: pytest.fail("YAML parsed"))
+        assert ConfigManager(path).get("log_level") == "DEBUG"
+        monkeypatch.undo()
+
+        path.write_text(path.read_text(encoding="utf-8").replace("DEBUG", "WARNING"), encoding="utf-8")
+        os.utime(path, ns=(0, 10**9))
+        assert ConfigManager(path).get("log_level") == "WARNING"
+        assert ConfigManager(path).get("log_level") == "WARNING"
+
+        cm.cache_path.write_bytes(b"garbage")
+        assert ConfigManager(path).get("log_level") == "WARNING"
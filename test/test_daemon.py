@@ -0,0 +1,71 @@
+"""Tests for daemon module."""
+import threading
+
+import pytest
+import yaml
+
+from tutils.daemon import ENV_NAME, connect, create_server
+from tutils.exceptions import ScriptAmbiguousError
+
+
+def _repo(path, name, scripts):
+    path.mkdir()
+    (path / "index.yaml").write_text(yaml.safe_dump({"name": name, "scripts": list(scripts)}), encoding="utf-8")
+    for script in scripts:
+        (path / script).mkdir()
+        (path / script / "index.yaml").write_text(f"name: {script}\nrun: {script}.py\n", encoding="utf-8")
+    return {"path": str(path), "type": "local", "link": ""}
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    config_path = tmp_path / "home" / "config.yaml"
+    config_path.parent.mkdir()
+    config_path.write_text(
+        yaml.safe_dump({"repository": [_repo(tmp_path / "file", "File", ["tcount", "tree"])]}),
+        encoding="utf-8",
+    )
+    socket_path = tmp_path / "run" / "daemon.sock"
+    server = create_server(socket_path, config_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path, config_path
+    server.shutdown()
+    server.server_close()
+
+
+class TestDaemon:
+    """Test queries answered over the socket."""
+
+    def test_queries(self, daemon, tmp_path) -> None:
+        """Test list, search, info and run on one connection."""
+        socket_path, _ = daemon
+        with connect(socket_path) as client:
+            assert client.call("list") == {"File": ["tcount", "tree"]}
+            assert client.call("search", query="tcount", limit=1)[0][0] == "File.tcount"
+            assert client.call("info", name="tree")["run"] == "tree.py"
+            assert client.call("info", name="missing") is None
+            assert client.call("run", name="File.tcount")["path"] == str(tmp_path / "file" / "tcount" / "tcount.py")
+            assert client.call("run", name="tcont")["suggestions"] == ["File.tcount"]
+            assert client.call("ping")["requests"] == 7
+
+        assert create_server(socket_path) is None
+
+    def test_config_reload(self, daemon, tmp_path) -> None:
+        """Test a changed config is picked up and ambiguous names are raised on the client."""
+        socket_path, config_path = daemon
+        config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+        config["repository"].append(_repo(tmp_path / "other", "Other", ["tcount"]))
+        config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+        with connect(socket_path) as client:
+            with pytest.raises(ScriptAmbiguousError) as e:
+                client.call("info", name="tcount")
+            assert e.value.candidates == ["File.tcount", "Other.tcount"]
+
+    def test_not_running(self, daemon, tmp_path, monkeypatch) -> None:
+        """Test connect returns None without a daemon or when disabled."""
+        socket_path, _ = daemon
+        assert connect(tmp_path / "missing.sock") is None
+        monkeypatch.setenv(ENV_NAME, "1")
+        assert connect(socket_path) is None
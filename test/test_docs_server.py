@@ -0,0 +1,107 @@
+"""Tests for docs_server module."""
+import gzip
+import http.client
+import os
+import threading
+
+from tutils import docs_server
+from tutils.docs_server import DocsCache, build_site, create_server
+
+
+def _docs(tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "guide").mkdir(parents=True)
+    (docs / "index.md").write_text("# Home\n\nSee [usage](usage.md).\n", encoding="utf-8")
+    (docs / "usage.md").write_text("# Usage\n\nrun it\n", encoding="utf-8")
+    (docs / "guide" / "index.md").write_text("# Guide\n", encoding="utf-8")
+    return docs
+
+
+class TestDocsCache:
+    """Test rendered page cache invalidation."""
+
+    def test_render_cached_until_changed(self, tmp_path) -> None:
+        """Test pages are served from memory until the markdown or the tree changes."""
+        docs = _docs(tmp_path)
+        cache = DocsCache(docs)
+
+        html = cache.render("/usage")
+        assert "<title>TUtils Docs – Usage</title>" in html
+        assert '<a href="/usage" class="active">Usage</a>' in html
+        assert cache.render("/usage") is html
+        assert cache.render("/missing") is None
+
+        usage = docs / "usage.md"
+        usage.write_text("# Usage\n\nrun it twice\n", encoding="utf-8")
+        os.utime(usage, ns=(0, 10**9))
+        assert "run it twice" in cache.render("/usage")
+
+        (docs / "zebra.md").write_text("# Zebra\n", encoding="utf-8")
+        os.utime(docs, ns=(0, 2 * 10**9))
+        assert '<a href="/zebra">Zebra</a>' in cache.render("/usage")
+
+
+    def test_cache_keyed_by_page(self, tmp_path, monkeypatch) -> None:
+        """Test URLs of one page share its entry, others get none, and the cache is bounded."""
+        docs = _docs(tmp_path)
+        (tmp_path / "secret.md").write_text("# Secret\n", encoding="utf-8")
+        cache = DocsCache(docs)
+
+        html = cache.render("/usage")
+        assert all(cache.render(i) is html for i in ("/usage/", "/usage.md", "//usage"))
+        assert cache.render("/../secret") is None
+        assert list(cache._html) == ["/usage"]
+
+        monkeypatch.setattr(docs_server, "MAX_CACHED_PAGES", 2)
+        for url in ("/", "/guide", "/usage"):
+            cache.render(url)
+        assert list(cache._html) == ["/guide/", "/usage"]
+
+class TestServer:
+    """Test HTTP caching, compression and keep-alive."""
+
+    def test_etag_gzip_keep_alive(self, tmp_path) -> None:
+        """Test gzip bodies, 304 on the ETag of the same coding and reuse of one connection."""
+        server = create_server(0, _docs(tmp_path))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            conn.request("GET", "/usage", headers={"Accept-Encoding": "gzip"})
+            res = conn.getresponse()
+            body = res.read()
+            assert res.status == 200
+            assert res.getheader("Content-Encoding") == "gzip"
+            assert b"run it" in gzip.decompress(body)
+            etag = res.getheader("ETag")
+            sock = conn.sock
+
+            conn.request("GET", "/usage", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+            res = conn.getresponse()
+            assert res.status == 304
+            assert res.read() == b""
+            assert conn.sock is sock
+
+            conn.request("GET", "/usage", headers={"If-None-Match": etag})
+            res = conn.getresponse()
+            assert res.status == 200
+            assert res.getheader("Content-Encoding") is None
+            assert res.getheader("ETag") != etag
+            assert b"run it" in res.read()
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestBuildSite:
+    """Test static pre-rendering."""
+
+    def test_build_site(self, tmp_path) -> None:
+        """Test every page is written under its URL path with .md links rewritten."""
+        docs = _docs(tmp_path)
+        out = tmp_path / "site"
+
+        assert build_site(out, docs) == 3
+        assert (out / "usage" / "index.html").is_file()
+        assert (out / "guide" / "index.html").is_file()
+        assert 'href="/usage"' in (out / "index.html").read_text(encoding="utf-8")
@@ -0,0 +1,144 @@
+"""Tests for resumable, compressed downloads."""
+import gzip
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from tutils import utils
+from tutils.httpclient import ConnectionPool
+
+BODY = bytes(range(256)) * 1024
+TEXT = b"print('hello')\n" * 1024
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serve ``/file.bin`` with ranges and ``/file.py`` gzip encoded if accepted."""
+
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+    requests = []
+    # bytes the served range is off from the asked one, like a broken proxy
+    range_shift = 0
+
+    def do_GET(self) -> None:  # noqa: N802
+        type(self).requests.append(dict(self.headers))
+        body = BODY if self.path == "/file.bin" else TEXT
+        headers = {"ETag": self.etag}
+        status = 200
+        if self.path == "/file.py" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        elif self.headers.get("Range") and self.headers.get("If-Range") == self.etag:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-")) + self.range_shift
+            headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+            body = body[start:]
+            status = 206
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def server():
+    """Serve the test files over HTTP."""
+    _Handler.requests = []
+    _Handler.etag = '"v1"'
+    _Handler.range_shift = 0
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def other_device(tmp_path):
+    """A folder on another file system than *tmp_path*."""
+    if not os.path.isdir("/dev/shm") or os.stat("/dev/shm").st_dev == os.stat(tmp_path).st_dev:
+        pytest.skip("no second file system")
+    path = Path(tempfile.mkdtemp(dir="/dev/shm"))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _interrupted(dest, url, size):
+    """Leave a partial download of *size* bytes, as a broken connection would."""
+    part = dest.with_name(f"{dest.name}.part")
+    part.write_bytes(BODY[:size])
+    with open(f"{part}.json", "w", encoding="utf-8") as f:
+        json.dump({"url": url, "validator": '"v1"'}, f)
+    return part
+
+
+class TestDownload:
+    """Test streaming downloads."""
+
+    def test_gzip_response_is_decoded(self, tmp_path, server) -> None:
+        """Test a gzip encoded file is decompressed and hashed while written."""
+        dest = tmp_path / "file.py"
+        validators = utils.download_if_modified(f"{server}/file.py", dest, pool=ConnectionPool())
+
+        assert dest.read_bytes() == TEXT
+        assert validators["sha256"] == hashlib.sha256(TEXT).hexdigest()
+        assert not dest.with_name("file.py.part").exists()
+
+    def test_partial_download_resumes(self, tmp_path, server) -> None:
+        """Test a partial download asks only for the missing bytes."""
+        url = f"{server}/file.bin"
+        dest = tmp_path / "file.bin"
+        part = _interrupted(dest, url, 1000)
+
+        validators = utils.download_if_modified(url, dest, pool=ConnectionPool())
+
+        assert _Handler.requests[-1]["Range"] == "bytes=1000-"
+        assert dest.read_bytes() == BODY
+        assert validators["sha256"] == hashlib.sha256(BODY).hexdigest()
+        assert not part.exists()
+
+    def test_changed_file_is_downloaded_again(self, tmp_path, server) -> None:
+        """Test a partial download of an outdated file is replaced, not appended to."""
+        url = f"{server}/file.bin"
+        dest = tmp_path / "file.bin"
+        _interrupted(dest, url, 1000)
+        _Handler.etag = '"v2"'
+
+        utils.download_file(url, dest, pool=ConnectionPool(), show_progress=False)
+
+        assert dest.read_bytes() == BODY
+
+    def test_other_range_is_not_appended(self, tmp_path, server) -> None:
+        """Test a partial response starting elsewhere than the partial file ends is downloaded again whole."""
+        url = f"{server}/file.bin"
+        dest = tmp_path / "file.bin"
+        _interrupted(dest, url, 1000)
+        _Handler.range_shift = 10
+
+        validators = utils.download_if_modified(url, dest, pool=ConnectionPool())
+
+        assert dest.read_bytes() == BODY
+        assert validators["sha256"] == hashlib.sha256(BODY).hexdigest()
+        assert "Range" not in _Handler.requests[-1]
+
+    def test_part_on_other_device(self, tmp_path, server, other_device) -> None:
+        """Test a part on another file system than the destination is moved into place."""
+        dest = other_device / "file.bin"
+        part = tmp_path / "file.bin.part"
+
+        utils.download_file(f"{server}/file.bin", dest, pool=ConnectionPool(), show_progress=False, part=part)
+
+        assert dest.read_bytes() == BODY
+        assert not part.exists()
@@ -0,0 +1,185 @@
+"""Tests for git repository sync."""
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from tutils.exceptions import RepositoryConnnectFailedError
+from tutils.model import RepositoryModel
+from tutils.repository.blobstore import BlobStore
+from tutils.repository.gitfetcher import GitCache, GitFetcher, GitSource, github_raw_source, parse_git_link
+from tutils.repository.updater import RepositoryUpdater
+
+EXAMPLE_REPO = Path(__file__).parent.parent / "examples" / "Scripts" / "default"
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def _git(*args, cwd) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _commit(root) -> None:
+    _git("add", "-A", ".", cwd=root)
+    _git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "change", cwd=root)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A git repository holding repositories File and Image, served over file://."""
+    root = tmp_path / "upstream"
+    shutil.copytree(EXAMPLE_REPO, root / "File")
+    shutil.copytree(EXAMPLE_REPO, root / "Image")
+    index = root / "Image" / "index.yaml"
+    index.write_text(index.read_text(encoding="utf-8").replace("name: File", "name: Image"), encoding="utf-8")
+    shutil.copytree(root / "File" / "Z2V0RmlsZUNvdW50", root / "File" / "c2Vjb25k")
+    script_index = root / "File" / "c2Vjb25k" / "index.yaml"
+    script_index.write_text(script_index.read_text(encoding="utf-8").replace("name: ", "name: second", 1), encoding="utf-8")
+    (root / "File" / "index.yaml").write_text(
+        "name: File\nscripts:\n  - Z2V0RmlsZUNvdW50\n  - c2Vjb25k\n", encoding="utf-8"
+    )
+    (root / "Other").mkdir()
+    (root / "Other" / "big.bin").write_bytes(b"x" * 1024)
+    _git("init", "-q", "-b", "main", cwd=root)
+    _commit(root)
+    # let partial clones fetch by filter and by object id, as GitHub does
+    _git("config", "uploadpack.allowFilter", "true", cwd=root)
+    _git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=root)
+    return root, root.as_uri()
+
+
+def _repo(tmp_path, name, link) -> RepositoryModel:
+    path = tmp_path / "local" / name
+    path.mkdir(parents=True)
+    return RepositoryModel(config={"path": str(path), "type": "git", "link": link})
+
+
+class TestGitLinks:
+    """Test git link parsing."""
+
+    def test_parse_git_link(self) -> None:
+        """Test ref and path of git links."""
+        url = "https://github.com/owner/repo.git"
+        assert parse_git_link(f"{url}#main:File") == GitSource(url, "main", "File")
+        assert parse_git_link(f"{url}#File/") == GitSource(url, "HEAD", "File")
+        assert parse_git_link(url) == GitSource(url, "HEAD", "")
+
+    def test_github_raw_source(self) -> None:
+        """Test raw GitHub index links map to the GitHub repository."""
+        link = "https://raw.githubusercontent.com/owner/repo/main/File/index.yaml"
+        assert github_raw_source(link) == GitSource("https://github.com/owner/repo.git", "main", "File")
+        assert github_raw_source("https://example.com/repo/main/File/index.yaml") is None
+
+
+class TestGitSync:
+    """Test grouped repository sync through the git cache."""
+
+    def test_sibling_repositories_share_one_fetch(self, tmp_path, upstream, monkeypatch) -> None:
+        """Test repositories of one remote are synced by one fetch and one sparse checkout."""
+        _, url = upstream
+        fetches = []
+        original = GitCache.fetch
+        monkeypatch.setattr(GitCache, "fetch", lambda self, *a: fetches.append(a) or original(self, *a))
+        repos = [_repo(tmp_path, "File", f"{url}#main:File"), _repo(tmp_path, "Image", f"{url}#main:Image")]
+        cache = GitCache(tmp_path / "git")
+
+        updater = RepositoryUpdater(store=BlobStore(tmp_path / "store"), git_cache=cache)
+        results = updater.update(repos)
+
+        assert results == {i.path: None for i in repos}
+        assert [i.name for i in repos] == ["File", "Image"]
+        assert len(fetches) == 1
+        for repo in repos:
+            assert (Path(repo.path) / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes() == \
+                (EXAMPLE_REPO / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes()
+        worktree = cache.worktree_path(url, "main")
+        assert not (worktree / "Other").exists()
+
+    def test_failed_sync_keeps_local_files(self, tmp_path, upstream) -> None:
+        """Test a repository missing from the remote fails alone and keeps its files."""
+        _, url = upstream
+        good = _repo(tmp_path, "File", f"{url}#main:File")
+        bad = _repo(tmp_path, "Missing", f"{url}#main:Missing")
+        (Path(bad.path) / "keep.txt").write_text("keep", encoding="utf-8")
+
+        results = RepositoryUpdater(store=BlobStore(tmp_path / "store"), git_cache=GitCache(tmp_path / "git")) \
+            .update([good, bad])
+
+        assert results[good.path] is None
+        assert results[bad.path] is not None
+        assert (Path(bad.path) / "keep.txt").read_text(encoding="utf-8") == "keep"
+
+    def test_update_replaces_changed_folders_only(self, tmp_path, upstream) -> None:
+        """Test a second update fetches the delta and replaces only changed script folders."""
+        root, url = upstream
+        repo = _repo(tmp_path, "File", f"{url}#main:File")
+        cache = GitCache(tmp_path / "git")
+        updater = RepositoryUpdater(store=BlobStore(tmp_path / "store"), git_cache=cache)
+        updater.update([repo])
+        assert updater.changes == {repo.path: ["Z2V0RmlsZUNvdW50", "c2Vjb25k"]}
+        unchanged = Path(repo.path) / "Z2V0RmlsZUNvdW50"
+        (unchanged / "__pycache__").mkdir(exist_ok=True)
+        (unchanged / "__pycache__" / "helper.pyc").write_bytes(b"")
+
+        updater.update([repo])
+        assert updater.changes == {repo.path: []}
+
+        (root / "File" / "c2Vjb25k" / "getfilecount.py").write_text("print(2)\n", encoding="utf-8")
+        (root / "Image" / "index.yaml").write_text("name: Image2\n", encoding="utf-8")
+        _commit(root)
+        updater.update([repo])
+
+        assert updater.changes == {repo.path: ["c2Vjb25k"]}
+        assert (Path(repo.path) / "c2Vjb25k" / "getfilecount.py").read_text(encoding="utf-8") == "print(2)\n"
+        assert (unchanged / "__pycache__" / "helper.pyc").exists()
+
+    def test_fetcher_reports_changed_folders(self, tmp_path, upstream) -> None:
+        """Test GitFetcher.update fast-forwards an existing worktree and reports changed folders."""
+        root, url = upstream
+        fetcher = GitFetcher(url, GitCache(tmp_path / "git"))
+        first = fetcher.update(["File"], branch="main")
+        assert first.old is None and first.folders("File") is None
+
+        (root / "File" / "index.yaml").write_text("name: File\nscripts: []\n", encoding="utf-8")
+        shutil.rmtree(root / "File" / "c2Vjb25k")
+        _commit(root)
+        second = fetcher.update(["File"], branch="main")
+
+        assert second.old == first.new != second.new
+        assert second.folders("File") == {"", "c2Vjb25k"}
+        assert not (second.path / "File" / "c2Vjb25k").exists()
+
+    def test_fetch_keeps_foreign_folder(self, tmp_path, upstream) -> None:
+        """Test a folder not checked out by the cache is never removed."""
+        _, url = upstream
+        dest = tmp_path / "mine"
+        dest.mkdir()
+        (dest / "keep.txt").write_text("keep", encoding="utf-8")
+        fetcher = GitFetcher(url, GitCache(tmp_path / "git"))
+
+        with pytest.raises(RepositoryConnnectFailedError):
+            fetcher.fetch(["File"], dest=dest, branch="main")
+
+        assert sorted(i.name for i in dest.iterdir()) == ["keep.txt"]
+        assert (fetcher.fetch(["File"], dest=dest, branch="main", clean=True) / "File" / "index.yaml").is_file()
+
+    def test_update_keeps_local_top_level_files(self, tmp_path, upstream) -> None:
+        """Test only top level files deleted upstream are removed, not files added locally."""
+        root, url = upstream
+        (root / "File" / "README.md").write_text("readme", encoding="utf-8")
+        _commit(root)
+        repo = _repo(tmp_path, "File", f"{url}#main:File")
+        updater = RepositoryUpdater(store=BlobStore(tmp_path / "store"), git_cache=GitCache(tmp_path / "git"))
+        updater.update([repo])
+        local = Path(repo.path)
+        (local / "notes.txt").write_text("mine", encoding="utf-8")
+
+        (root / "File" / "README.md").unlink()
+        (root / "File" / "index.yaml").write_text("name: File\nscripts:\n  - Z2V0RmlsZUNvdW50\n", encoding="utf-8")
+        _commit(root)
+        updater.update([repo])
+
+        assert updater.changes == {repo.path: []}
+        assert not (local / "README.md").exists()
+        assert (local / "notes.txt").read_text(encoding="utf-8") == "mine"
@@ -0,0 +1,51 @@
+"""Tests for nameindex module."""
+import pytest
+
+from tutils.exceptions import ScriptAmbiguousError
+from tutils.nameindex import NameIndex
+
+
+def _script(repository, name, aliases=()):
+    return {
+        "repository": repository,
+        "name": name,
+        "aliases": list(aliases),
+        "repository_path": f"/repos/{repository}",
+        "folder": f"{name}-folder",
+        "run": f"{name}.py",
+    }
+
+
+class TestNameIndex:
+    """Test script name resolution."""
+
+    def test_resolve(self) -> None:
+        """Test fully qualified names, short names and aliases resolve by lookup."""
+        index = NameIndex([
+            _script("File", "tcount", aliases=["count"]),
+            _script("File", "tree"),
+            _script("Net", "ping"),
+        ])
+
+        assert index.resolve("File.tcount") == "File.tcount"
+        assert index.resolve("File.count") == "File.tcount"
+        assert index.resolve("tcount") == "File.tcount"
+        assert index.resolve("count") == "File.tcount"
+        assert index.resolve("ping") == "Net.ping"
+        assert index.resolve("ount") is None
+        assert index.targets["File.tcount"] == ("/repos/File", "tcount-folder", "tcount.py")
+
+    def test_ambiguous(self) -> None:
+        """Test short names shared by repositories are ambiguous, qualified names are not."""
+        index = NameIndex([
+            _script("File", "tcount"),
+            _script("Other", "tcount"),
+            _script("Other", "stat", aliases=["tcount"]),
+        ])
+
+        assert index.ambiguous == {"tcount": ["File.tcount", "Other.tcount", "Other.stat"]}
+        assert index.resolve("Other.tcount") == "Other.tcount"
+        assert index.resolve("stat") == "Other.stat"
+        with pytest.raises(ScriptAmbiguousError) as e:
+            index.resolve("tcount")
+        assert e.value.candidates == ["File.tcount", "Other.tcount", "Other.stat"]
@@ -0,0 +1,49 @@
+"""Tests for runner module."""
+from tutils.runner import ProcessRunner
+
+SCRIPT = """
+import sys
+for i in range(int(sys.argv[1])):
+    print("line", i)
+print("done", file=sys.stderr)
+"""
+
+
+class TestProcessRunner:
+    """Test captured script runs."""
+
+    def test_capture_keeps_last_lines(self, tmp_path) -> None:
+        """Test captured output is kept in a bounded buffer with counts."""
+        script = tmp_path / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+
+        res = ProcessRunner().run_script(str(script), [":100"], capture=True, echo=False, buffer_lines=3)
+
+        assert res["exit_code"] == 0
+        assert res["stdout_lines"] == ["line 97", "line 98", "line 99"]
+        assert res["stderr_lines"] == ["done"]
+        assert res["stdout_line_count"] == 100
+        assert res["stdout_bytes"] == sum(len(f"line {i}\n") for i in range(100))
+        assert not res["killed_by_limit"]
+
+    def test_max_lines_kills_script(self, tmp_path) -> None:
+        """Test a script printing more than max_lines lines is killed."""
+        script = tmp_path / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+
+        res = ProcessRunner().run_script(str(script), [":100000000"], max_lines=50, echo=False)
+
+        assert res["killed_by_limit"]
+        assert res["exit_code"] != 0
+        assert res["stdout_line_count"] + res["stderr_line_count"] == 50
+
+    def test_zero_max_lines_keeps_nothing(self, tmp_path) -> None:
+        """Test a last line without newline counts against max_lines=0 too."""
+        script = tmp_path / "script.py"
+        script.write_text("import sys\nsys.stdout.write('partial')\n", encoding="utf-8")
+
+        res = ProcessRunner().run_script(str(script), [], max_lines=0, echo=False)
+
+        assert res["stdout_lines"] == []
+        assert res["stdout_line_count"] == 0
+        assert res["stdout_bytes"] == 0
@@ -0,0 +1,83 @@
+"""Tests for search index module."""
+import random
+from collections import Counter
+from difflib import SequenceMatcher
+
+from tutils import searchindex
+from tutils.searchindex import SearchIndex
+
+
+def _scan(names, query, cutoff=0.4):
+    """Fuzzy search by scanning every name, as ScriptManager did before the index."""
+    results = []
+    for path in names:
+        name = path.split(".", 1)[-1].lower()
+        if query.lower() in name:
+            score = 0.9 + 0.1 * (len(query) / len(name))
+        else:
+            score = SequenceMatcher(None, query.lower(), name).ratio()
+        if score >= cutoff:
+            results.append((path, round(score, 3)))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results
+
+
+class TestSearchIndex:
+    """Test search index."""
+
+    NAMES = ["File.tcount", "File.tcopy", "File.rename", "Image.rmbg", "Image.icon", "Image.resize"]
+
+    def _index(self):
+        return SearchIndex(
+            {"path": i, "repository": i.split(".")[0], "name": i.split(".")[1], "author": "Jared3Dev"}
+            for i in self.NAMES
+        )
+
+    def test_same_results_as_scan(self) -> None:
+        """Test index results match a full scan."""
+        index = self._index()
+        for query in ["tc", "tcont", "count", "rmb", "resize", "ico", "x"]:
+            assert index.search(query) == _scan(self.NAMES, query)
+
+    def test_filters_and_fields(self) -> None:
+        """Test repository filter, limit and author field."""
+        index = self._index()
+        assert all(i.startswith("File.") for i, _ in index.search("ico", repositories=["File"]))
+        assert [score for _, score in index.search("jared", fields=("author",), limit=2)] == [0.956, 0.956]
+        assert all(score < 0.9 for _, score in index.search("jared"))
+
+    def test_index_finds_substrings_and_close_names(self, monkeypatch) -> None:
+        """Test the n-gram lookup finds every substring match and the best fuzzy ones."""
+        monkeypatch.setattr(searchindex, "MAX_CANDIDATES", 2)
+        index = self._index()
+        assert index.search("re") == [i for i in _scan(self.NAMES, "re") if i[1] >= 0.9]
+        assert index.search("tcont")[0] == _scan(self.NAMES, "tcont")[0]
+
+    def test_repository_filter_before_ranking(self, monkeypatch) -> None:
+        """Test close names of the filtered repository are found past MAX_CANDIDATES better ones elsewhere."""
+        monkeypatch.setattr(searchindex, "MAX_CANDIDATES", 4)
+        docs = [{"path": f"Big.tcount{i}", "repository": "Big", "name": f"tcount{i}"} for i in range(20)]
+        docs.append({"path": "Small.tcnt", "repository": "Small", "name": "tcnt"})
+        index = SearchIndex(docs)
+
+        assert [i for i, _ in index.search("tcoumt", repositories=["Small"])] == ["Small.tcnt"]
+
+    def test_large_index_touches_few_postings(self, monkeypatch) -> None:
+        """Test candidates of a 50k script index come from a bounded part of the postings."""
+        rng = random.Random(0)
+        names = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(10)) for _ in range(50000)]
+        index = SearchIndex({"path": f"Repo.{i}", "repository": "Repo", "name": i} for i in names)
+        fed = []
+
+        class _Counter(Counter):
+            def update(self, ids=None, **kwargs) -> None:
+                fed.append(len(ids or ()))
+                super().update(ids, **kwargs)
+
+        monkeypatch.setattr(searchindex, "Counter", _Counter)
+        for query in ["renameall", names[123][:7], "qzxv"]:
+            fed.clear()
+            candidates = set(index._candidates(query, "name"))
+            assert len(candidates) <= searchindex.MAX_CANDIDATES + sum(query in i for i in names)
+            assert sum(fed) < len(names) // 4
+        assert f"Repo.{names[123]}" in [i for i, _ in index.search(names[123][:7])]
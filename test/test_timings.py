@@ -0,0 +1,74 @@
+"""Tests for timings module."""
+import json
+import threading
+
+import pytest
+
+from tutils import timings
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    monkeypatch.setattr(timings, "_enabled", False)
+    monkeypatch.setattr(timings, "_root", None)
+    monkeypatch.setattr(timings, "_local", threading.local())
+    monkeypatch.setattr(timings, "_profiler", None)
+    monkeypatch.setattr(timings.atexit, "register", lambda fn: None)
+    monkeypatch.delenv(timings.ENV_NAME, raising=False)
+    return timings
+
+
+class TestTimings:
+    """Test span recording and reports."""
+
+    def test_disabled(self, monkeypatch) -> None:
+        """Test spans are shared no-ops while timings are off."""
+        monkeypatch.setattr(timings, "_enabled", False)
+        with timings.span("a", x=1) as first:
+            first.set(y=2)
+        assert timings.span("b") is first
+
+    def test_span_tree(self, recording, tmp_path, capsys) -> None:
+        """Test nesting, merged siblings, thread spans and errors in the printed report."""
+        trace = tmp_path / "trace.json"
+        recording.install(trace=str(trace))
+        with recording.span("config.load", path="/x") as span:
+            span.set(cached=True)
+        with recording.span("resolve"):
+            for _ in range(3):
+                with recording.span("catalog.read_script"):
+                    pass
+        worker = threading.Thread(target=lambda: recording.span("download").__enter__().__exit__(None, None, None))
+        worker.start()
+        worker.join()
+        with pytest.raises(ValueError):
+            with recording.span("run"):
+                raise ValueError
+
+        root = recording._root
+        assert [i.name for i in root.children] == ["config.load", "resolve", "download", "run"]
+        assert root.children[0].attrs == {"path": "/x", "cached": True}
+        assert root.children[3].attrs == {"error": "ValueError"}
+
+        recording.report()
+        err = capsys.readouterr().err
+        assert "config.load  path=/x cached=True" in err
+        assert "    catalog.read_script x3" in err
+        assert not recording.is_enabled()
+
+        events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+        assert len(events) == 8
+        assert all(i["ph"] == "X" and i["dur"] >= 0 for i in events)
+
+    def test_json_report(self, recording, tmp_path, monkeypatch) -> None:
+        """Test a path in the env var gets the span tree as JSON."""
+        target = tmp_path / "timings.json"
+        monkeypatch.setenv(timings.ENV_NAME, str(target))
+        recording.install()
+        with recording.span("catalog.load"):
+            pass
+        recording.report()
+
+        report = json.loads(target.read_text(encoding="utf-8"))
+        assert report["name"] == "tutils"
+        assert [i["name"] for i in report["children"]] == ["catalog.load"]
@@ -0,0 +1,269 @@
+"""Tests for repository updater."""
+import functools
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from tutils.model import RepositoryModel
+from tutils.repository.blobstore import BlobStore, hash_file
+from tutils.repository.manifest import publish
+from tutils.repository.repositoryindexfile import RepositoryIndexFile
+from tutils.repository.updater import STAGING_NAME, RepositoryUpdater
+
+EXAMPLE_REPO = Path(__file__).parent.parent / "examples" / "Scripts" / "default"
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Serve a copy of the example repository over HTTP."""
+    root = tmp_path / "remote"
+    shutil.copytree(EXAMPLE_REPO, root / "default")
+    handler = functools.partial(_Handler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_address[1]}/default/index.yaml"
+    server.shutdown()
+    server.server_close()
+
+
+class TestRepositoryUpdater:
+    """Test concurrent repository update."""
+
+    def test_update_downloads_all_files(self, tmp_path, remote) -> None:
+        """Test update replaces local repository with the remote files."""
+        _, link = remote
+        local = tmp_path / "local"
+        local.mkdir()
+        (local / "notes.txt").write_text("mine", encoding="utf-8")
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+
+        results = RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update([repo])
+
+        assert results == {str(local): None}
+        assert repo.name == "File"
+        assert (local / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes() == \
+            (EXAMPLE_REPO / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes()
+        assert (local / "notes.txt").read_text(encoding="utf-8") == "mine"
+
+    def test_update_removes_only_dropped_scripts(self, tmp_path, remote) -> None:
+        """Test scripts dropped from the index are removed, other local files kept."""
+        _, link = remote
+        local = tmp_path / "local"
+        local.mkdir()
+        shutil.copytree(EXAMPLE_REPO, local, dirs_exist_ok=True)
+        (local / "dropped").mkdir()
+        index = local / "index.yaml"
+        index.write_text(index.read_text(encoding="utf-8").rstrip("\n") + "\n  - dropped\n", encoding="utf-8")
+        (local / "mine").mkdir()
+        (local / "mine" / "script.py").write_text("pass", encoding="utf-8")
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+
+        assert RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo]) == {str(local): None}
+
+        assert not (local / "dropped").exists()
+        assert (local / "mine" / "script.py").is_file()
+        assert not [i for i in local.iterdir() if i.name.endswith((".old", ".updating"))]
+
+    def test_failed_update_keeps_local_files(self, tmp_path, remote) -> None:
+        """Test a failed update leaves the local repository untouched."""
+        root, link = remote
+        (root / "default" / "Z2V0RmlsZUNvdW50" / "getfilecount.py").unlink()
+        local = tmp_path / "local"
+        local.mkdir()
+        (local / "keep.txt").write_text("keep", encoding="utf-8")
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+
+        results = RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update([repo])
+
+        assert results[str(local)] is not None
+        assert (local / "keep.txt").exists()
+        assert not [i for i in tmp_path.iterdir() if i.name.startswith(".")]
+        assert [i.name for i in local.iterdir()] == ["keep.txt"]
+
+    def test_failed_install_restores_repository(self, tmp_path, remote, monkeypatch) -> None:
+        """Test a rename failing while installing puts every replaced entry back."""
+        root, link = remote
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo])
+        (root / "default" / "Z2V0RmlsZUNvdW50" / "getfilecount.py").write_text("print(2)\n", encoding="utf-8")
+        before = {i.relative_to(local).as_posix(): i.read_bytes() for i in local.rglob("*") if i.is_file()}
+
+        rename = Path.rename
+
+        def failing(self, target):
+            if self.name == "index.yaml" and self.parent.name == STAGING_NAME:
+                raise OSError("rename failed")
+            return rename(self, target)
+
+        monkeypatch.setattr(Path, "rename", failing)
+        results = RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo])
+
+        assert "rename failed" in str(results[str(local)])
+        assert {i.relative_to(local).as_posix(): i.read_bytes() for i in local.rglob("*") if i.is_file()} == before
+
+    def test_second_update_revalidates(self, tmp_path, remote) -> None:
+        """Test files unchanged upstream are reused instead of downloaded again."""
+        _, link = remote
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        src = local / "Z2V0RmlsZUNvdW50" / "getfilecount.py"
+
+        RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update([repo])
+        inode = src.stat().st_ino
+        assert RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update([repo]) == {str(local): None}
+
+        assert src.stat().st_ino == inode
+        assert (local / ".tutils-sync.json").exists()
+
+    def test_repository_on_other_device(self, tmp_path, remote) -> None:
+        """Test a repository on another file system than the home folder is updated."""
+        if not os.path.isdir("/dev/shm") or os.stat("/dev/shm").st_dev == os.stat(tmp_path).st_dev:
+            pytest.skip("no second file system")
+        _, link = remote
+        local = Path(tempfile.mkdtemp(dir="/dev/shm")) / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        try:
+            results = RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update([repo])
+
+            assert results == {str(local): None}
+            assert (local / "Z2V0RmlsZUNvdW50" / "getfilecount.py").is_file()
+            assert sorted(i.name for i in local.parent.iterdir()) == ["local"]
+        finally:
+            shutil.rmtree(local.parent, ignore_errors=True)
+
+    def test_identical_files_are_stored_once(self, tmp_path, remote) -> None:
+        """Test repositories sharing a file link the same blob."""
+        _, link = remote
+        repos = []
+        for name in ("first", "second"):
+            (tmp_path / name).mkdir()
+            repos.append(RepositoryModel(config={"path": str(tmp_path / name), "type": "remote", "link": link}))
+
+        RepositoryUpdater(jobs=4, store=BlobStore(tmp_path / "store")).update(repos)
+
+        first, second = (tmp_path / i / "Z2V0RmlsZUNvdW50" / "getfilecount.py" for i in ("first", "second"))
+        assert first.stat().st_ino == second.stat().st_ino
+        assert len(list((tmp_path / "store" / "objects").glob("*/*"))) == 1
+
+
+class TestArchiveUpdate:
+    """Test repositories synced from one archive."""
+
+    @pytest.mark.parametrize("fmt", ["gztar", "zip"])
+    def test_update_extracts_archive(self, tmp_path, remote, fmt) -> None:
+        """Test the archive is extracted into the repository and revalidated next time."""
+        root, _ = remote
+        archive = shutil.make_archive(str(root / "repo"), fmt, root, "default")
+        base = remote[1].rsplit("/default/", 1)[0]
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": "",
+                                       "archive": f"{base}/{Path(archive).name}"})
+        src = local / "Z2V0RmlsZUNvdW50" / "getfilecount.py"
+
+        assert RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo]) == {str(local): None}
+        assert repo.name == "File"
+        assert src.read_bytes() == (EXAMPLE_REPO / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes()
+
+        inode = src.stat().st_ino
+        assert RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo]) == {str(local): None}
+        assert src.stat().st_ino == inode
+
+    def test_invalid_archive_keeps_local_files(self, tmp_path, remote) -> None:
+        """Test a broken archive leaves the local repository untouched."""
+        root, link = remote
+        (root / "repo.tar.gz").write_bytes(b"not an archive")
+        local = tmp_path / "local"
+        local.mkdir()
+        (local / "keep.txt").write_text("keep", encoding="utf-8")
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link,
+                                       "archive": link.replace("default/index.yaml", "repo.tar.gz")})
+
+        results = RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo])
+
+        assert results[str(local)] is not None
+        assert (local / "keep.txt").exists()
+        assert not [i for i in tmp_path.iterdir() if i.name.startswith(".")]
+
+
+class TestManifestUpdate:
+    """Test delta updates driven by the hash manifest of the repository index."""
+
+    def test_publish_writes_manifest(self, tmp_path) -> None:
+        """Test publish hashes script index and src files into index.yaml."""
+        repo = tmp_path / "repo"
+        shutil.copytree(EXAMPLE_REPO, repo)
+
+        files = publish(repo, jobs=2)
+
+        assert sorted(files) == ["Z2V0RmlsZUNvdW50/getfilecount.py", "Z2V0RmlsZUNvdW50/index.yaml"]
+        src = repo / "Z2V0RmlsZUNvdW50" / "getfilecount.py"
+        assert files["Z2V0RmlsZUNvdW50/getfilecount.py"] == {"sha256": hash_file(src), "size": src.stat().st_size}
+        assert RepositoryIndexFile(repo / "index.yaml").get_instance().files == files
+
+    def test_unchanged_files_are_not_requested(self, tmp_path, remote, monkeypatch) -> None:
+        """Test files matching the manifest are reused without any request."""
+        root, link = remote
+        publish(root / "default")
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo])
+        (local / ".tutils-sync.json").unlink()
+
+        requested = []
+        original = _Handler.send_head
+        monkeypatch.setattr(_Handler, "send_head", lambda self: requested.append(self.path) or original(self))
+        assert RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo]) == {str(local): None}
+
+        assert requested == ["/default/index.yaml"]
+
+    def test_mismatching_download_fails(self, tmp_path, remote) -> None:
+        """Test a source file differing from the manifest fails the update."""
+        root, link = remote
+        publish(root / "default")
+        (root / "default" / "Z2V0RmlsZUNvdW50" / "getfilecount.py").write_text("print('changed')\n", encoding="utf-8")
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+
+        results = RepositoryUpdater(store=BlobStore(tmp_path / "store")).update([repo])
+
+        assert "manifest" in str(results[str(local)])
+
+    def test_malformed_manifest_entries_are_ignored(self, tmp_path, remote) -> None:
+        """Test digests that are not sha256 hex never reach the store as paths."""
+        root, link = remote
+        publish(root / "default")
+        secret = tmp_path / "secret.txt"
+        secret.write_text("secret", encoding="utf-8")
+        index = RepositoryIndexFile(root / "default" / "index.yaml")
+        index.get_instance().files["Z2V0RmlsZUNvdW50/getfilecount.py"]["sha256"] = f"xx{secret}"
+        index.save_file()
+        local = tmp_path / "local"
+        local.mkdir()
+        repo = RepositoryModel(config={"path": str(local), "type": "remote", "link": link})
+        store = BlobStore(tmp_path / "store")
+
+        assert not store.has(f"xx{secret}")
+        assert "Z2V0RmlsZUNvdW50/getfilecount.py" not in RepositoryIndexFile(root / "default" / "index.yaml").get_instance().files
+        assert RepositoryUpdater(store=store).update([repo]) == {str(local): None}
+        assert (local / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes() == \
+            (EXAMPLE_REPO / "Z2V0RmlsZUNvdW50" / "getfilecount.py").read_bytes()
@@ -0,0 +1,105 @@
+"""Tests for warmpool module."""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from tutils import const as C
+from tutils.runner import ProcessRunner
+from tutils.warmpool import WarmPool, is_supported
+
+SCRIPT = """
+import os, sys, time
+print(os.getcwd(), os.environ.get("WARM_TEST"), sys.argv[1:])
+print("err", file=sys.stderr)
+time.sleep(float(sys.argv[1]))
+sys.exit(int(sys.argv[2]))
+"""
+
+pytestmark = pytest.mark.skipif(not is_supported(), reason="warm worker needs POSIX fd passing")
+
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    """Run a private worker daemon under tmp_path."""
+    monkeypatch.setattr(C, "RUN_DIR", tmp_path / "run")
+    yield tmp_path
+    WarmPool().request("stop")
+
+
+class TestWarmPool:
+    """Test scripts forked from the warm worker."""
+
+    def test_run_captured(self, run_dir, monkeypatch) -> None:
+        """Test argv, cwd, env, output and exit code match a normal run."""
+        script = run_dir / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+        monkeypatch.setenv("WARM_TEST", "yes")
+
+        runner = ProcessRunner(warm=True)
+        res = runner.run_script(str(script), ["0", "3"], capture=True, echo=False, raw_args=True)
+
+        assert runner.pool.request("ping")["pid"] != os.getpid()
+        assert res["exit_code"] == 3
+        assert res["stdout_lines"] == [f"{os.getcwd()} yes ['0', '3']"]
+        assert res["stderr_lines"] == ["err"]
+
+    def test_timeout(self, run_dir) -> None:
+        """Test a warm script is killed on timeout."""
+        script = run_dir / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+
+        res = ProcessRunner(warm=True).run_script(str(script), ["30", "0"], timeout=0.5, capture=True, echo=False, raw_args=True)
+
+        assert res["timed_out"]
+        assert res["exit_code"] != 0
+
+    def test_restart_while_script_runs(self, run_dir) -> None:
+        """Test a stopped worker is replaced at once while its scripts still run."""
+        script = run_dir / "script.py"
+        script.write_text(SCRIPT, encoding="utf-8")
+        pool = WarmPool()
+        proc = pool.spawn([sys.executable, str(script), "30", "0"], dict(os.environ), str(run_dir),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            old = pool.request("ping")["pid"]
+            pool.request("stop")
+            deadline = time.monotonic() + 5
+            while pool.socket_path.exists() and time.monotonic() < deadline:
+                time.sleep(0.02)
+
+            start = time.monotonic()
+            conn = pool.connect()
+
+            assert conn is not None
+            conn.close()
+            assert time.monotonic() - start < 3
+            assert pool.request("ping")["pid"] != old
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def test_pythonpath_selects_worker(self, run_dir, monkeypatch) -> None:
+        """Test scripts see the PYTHONPATH of their caller, as in a cold run."""
+        for name in ("a", "b"):
+            (run_dir / name).mkdir()
+            (run_dir / name / "warm_mod.py").write_text(f"NAME = {name!r}\n", encoding="utf-8")
+        script = run_dir / "script.py"
+        script.write_text("import warm_mod\nprint(warm_mod.NAME)\n", encoding="utf-8")
+
+        names, pools = [], []
+        try:
+            for name in ("a", "b"):
+                monkeypatch.setenv("PYTHONPATH", str(run_dir / name))
+                runner = ProcessRunner(warm=True)
+                pools.append(runner.pool)
+                res = runner.run_script(str(script), [], capture=True, echo=False, raw_args=True)
+                names.append(res["stdout_lines"])
+        finally:
+            for pool in pools:
+                pool.request("stop")
+
+        assert names == [["a"], ["b"]]
+        assert pools[0].socket_path != pools[1].socket_path
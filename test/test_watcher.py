@@ -0,0 +1,97 @@
+"""Tests for watcher module."""
+import os
+import threading
+import time
+
+import pytest
+import yaml
+
+from tutils.catalog import Catalog
+from tutils.watcher import CatalogWatcher, is_running
+
+
+def _setup(tmp_path):
+    repo = tmp_path / "repo"
+    script_dir = repo / "c2NyaXB0"
+    script_dir.mkdir(parents=True)
+    (repo / "index.yaml").write_text("name: Demo\nscripts:\n  - c2NyaXB0\n", encoding="utf-8")
+    (script_dir / "index.yaml").write_text("name: demo\nrun: demo.py\n", encoding="utf-8")
+    config_path = tmp_path / "home" / "config.yaml"
+    config_path.parent.mkdir()
+    config_path.write_text(
+        yaml.safe_dump({"repository": [{"path": str(repo), "type": "local", "link": ""}]}),
+        encoding="utf-8",
+    )
+    return repo, config_path
+
+
+def _wait(predicate, timeout=10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _names(cache_path):
+    names = Catalog(cache_path).names
+    return set(names["index"].targets) if names else set()
+
+
+class TestIsRunning:
+    """Test heartbeat file checks."""
+
+    def test_is_running(self, tmp_path) -> None:
+        """Test only a fresh heartbeat of a live process counts."""
+        pid_file = tmp_path / "watcher.pid"
+        assert not is_running(pid_file)
+
+        pid_file.write_text(str(os.getpid()), encoding="utf-8")
+        assert is_running(pid_file)
+
+        os.utime(pid_file, (0, 0))
+        assert not is_running(pid_file)
+
+
+class TestCatalogWatcher:
+    """Test the catalog file follows repository changes."""
+
+    @pytest.mark.parametrize("poll", [True, False])
+    def test_updates_catalog(self, tmp_path, poll) -> None:
+        """Test a renamed script reaches the catalog file and the heartbeat is removed on stop."""
+        repo, config_path = _setup(tmp_path)
+        cache_path = tmp_path / "catalog.pickle"
+        pid_file = tmp_path / "watcher.pid"
+        watcher = CatalogWatcher(Catalog(cache_path), poll=poll, interval=0.1,
+                                 pid_file=pid_file, config_path=config_path)
+        if not poll and watcher.backend != "inotify":
+            pytest.skip("inotify not available")
+
+        thread = threading.Thread(target=watcher.run, daemon=True)
+        thread.start()
+        try:
+            assert _wait(lambda: _names(cache_path) == {"Demo.demo"})
+            assert is_running(pid_file)
+
+            (repo / "c2NyaXB0" / "index.yaml").write_text("name: renamed\nrun: demo.py\n", encoding="utf-8")
+            assert _wait(lambda: _names(cache_path) == {"Demo.renamed"})
+        finally:
+            watcher.stop()
+            thread.join(5)
+        assert not thread.is_alive()
+        assert not pid_file.exists()
+
+    def test_trusted_catalog(self, tmp_path) -> None:
+        """Test a trusted catalog serves cached scripts without checking index files."""
+        repo, _ = _setup(tmp_path)
+        config = {"path": str(repo), "type": "local", "link": ""}
+        cache_path = tmp_path / "catalog.pickle"
+        catalog = Catalog(cache_path)
+        catalog.refresh([catalog.get_repository(config)])
+        catalog.save()
+
+        (repo / "c2NyaXB0" / "index.yaml").write_text("name: renamed\nrun: demo.py\n", encoding="utf-8")
+        catalog = Catalog(cache_path, trusted=True)
+        assert [i.name for i in catalog.get_scripts(catalog.get_repository(config))] == ["demo"]
+        assert not catalog.dirty
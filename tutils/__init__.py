@@ -1,15 +1,15 @@
 """TUtils - A command-line tool."""
 import platform
-from .env import env
 import pathlib
-from . import const as C
 
-# 在模块导入时自动初始化配置
-from .config import init_config
+from . import importprofile
 
+# 尽早开始记录导入耗时，需在其他模块导入前安装
+if importprofile.is_requested():
+    importprofile.install()
 
-# 初始化配置（使用默认位置 ~/.tutils/config.yaml）
-_config_manager = init_config()
+from .env import env
+from . import const as C
 
 __version__ = C.version
 __author__ = C.author
@@ -19,4 +19,12 @@ __all__ = ["__version__", "__author__", "__email__", "init_config"]
 
 
 env.OS_TYPE = platform.system()
-env.WORK_DIR = pathlib.Path.cwd()
\ No newline at end of file
+env.WORK_DIR = pathlib.Path.cwd()
+
+
+def __getattr__(name: str):
+    # 配置在首次使用时才加载（~/.tutils/config.yaml），避免拖慢启动
+    if name == "init_config":
+        from .config import init_config
+        return init_config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
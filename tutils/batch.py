@@ -0,0 +1,211 @@
+"""
+    Run many scripts, or one script over many inputs, in parallel.
+
+ Every job runs in its own process through ProcessRunner with captured
+ output, so the output of concurrent jobs never interleaves. Results are
+ aggregated into one JSON report.
+
+ Job file format, one job per line, blank lines and ``#`` comments ignored::
+
+    File.tcount --show ./src
+    {"script": "tcount", "args": ["./docs"], "timeout": 5, "id": "docs"}
+
+ With a default script every plain line holds only the arguments::
+
+    tutils batch dirs.txt --script tcount
+"""
+from __future__ import annotations
+
+import json
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+
+from . import const as C
+from .runner import ProcessRunner
+
+
+class BatchJob:
+    """One line of a job file."""
+
+    def __init__(
+        self,
+        id: str,
+        script: str,
+        args: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.id = id
+        self.script = script
+        self.args = list(args or [])
+        self.timeout = timeout
+        # resolved script file path, None if the script can not be found
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+
+
+def parse_jobs(lines: Iterable[str], script: Optional[str] = None) -> List[BatchJob]:
+    """
+        parse job lines, see module docstring for the format.
+    :param lines: job file lines
+    :param script: default script, plain lines are its arguments if given
+    :return: list of BatchJob
+    """
+    jobs = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {lineno}: invalid JSON job: {e}") from None
+            if not isinstance(data, dict) or not (data.get("script") or script):
+                raise ValueError(f"line {lineno}: job has no script")
+            args = data.get("args", [])
+            if isinstance(args, str):
+                args = shlex.split(args)
+            jobs.append(BatchJob(
+                id=str(data.get("id", lineno)),
+                script=data.get("script") or script,
+                args=[str(i) for i in args],
+                timeout=data.get("timeout"),
+            ))
+            continue
+
+        try:
+            parts = shlex.split(line)
+        except ValueError as e:
+            raise ValueError(f"line {lineno}: {e}") from None
+        if script is None:
+            jobs.append(BatchJob(id=str(lineno), script=parts[0], args=parts[1:]))
+        else:
+            jobs.append(BatchJob(id=str(lineno), script=script, args=parts))
+    return jobs
+
+
+def _status(res: Dict) -> str:
+    if res["timed_out"]:
+        return "timeout"
+    if res["killed_by_limit"]:
+        return "killed"
+    return "ok" if res["exit_code"] == 0 else "failed"
+
+
+class BatchRunner:
+    """
+    Run jobs on a bounded pool of script processes.
+
+    Usage::
+
+        runner = BatchRunner(jobs=4, timeout=30)
+        report = runner.run(parse_jobs(open("jobs.txt")))
+    """
+
+    def __init__(
+        self,
+        jobs: int = C.DEFAULT_BATCH_JOBS,
+        timeout: Optional[float] = None,
+        max_lines: Optional[int] = None,
+        buffer_lines: int = C.DEFAULT_BUFFER_LINES,
+        show_output: Optional[TextIO] = None,
+        runner: Optional[ProcessRunner] = None,
+    ):
+        """
+        :param jobs: max count of scripts running at once
+        :param timeout: default timeout seconds of a job, a job may set its own
+        :param max_lines: kill a job once it printed more lines than this
+        :param buffer_lines: last lines of stdout/stderr kept per job
+        :param show_output: stream to print the output of each finished job to
+        :param runner: ProcessRunner to use
+        """
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.max_lines = max_lines
+        self.buffer_lines = buffer_lines
+        self.show_output = show_output
+        self.runner = runner or ProcessRunner()
+        self._lock = threading.Lock()
+
+    def resolve(self, jobs: List[BatchJob], resolver: Callable[[str], Optional[str]]) -> None:
+        """
+            resolve script of every job to a file path, once per distinct script.
+        :param jobs: jobs to resolve
+        :param resolver: maps a script name to its file path, None if not found
+        """
+        cache: Dict[str, tuple] = {}
+        for job in jobs:
+            if job.script not in cache:
+                path = Path(job.script)
+                try:
+                    cache[job.script] = (str(path.resolve()) if path.is_file() else resolver(job.script), None)
+                except Exception as e:
+                    # e.g. an ambiguous script name, reported by the job
+                    cache[job.script] = (None, str(e))
+            job.path, job.error = cache[job.script]
+
+    def _run_job(self, job: BatchJob) -> Dict:
+        result = {"id": job.id, "script": job.script, "args": job.args, "path": job.path}
+        if job.path is None:
+            result.update(status="error", error=job.error or f"Script {job.script} not found.")
+            return result
+
+        start = time.monotonic()
+        try:
+            res = self.runner.run_script(
+                job.path,
+                args=job.args,
+                timeout=job.timeout if job.timeout is not None else self.timeout,
+                max_lines=self.max_lines,
+                capture=True,
+                echo=False,
+                buffer_lines=self.buffer_lines,
+                raw_args=True,
+            )
+        except Exception as e:
+            result.update(status="error", error=str(e), duration=round(time.monotonic() - start, 3))
+            return result
+
+        result.update(status=_status(res), duration=round(time.monotonic() - start, 3), **res)
+        if self.show_output is not None:
+            self._print_output(result)
+        return result
+
+    def _print_output(self, result: Dict) -> None:
+        """Print output of one finished job as one block."""
+        lines = [f"==> [{result['id']}] {result['script']} {shlex.join(result['args'])} ({result['status']})"]
+        lines += result["stdout_lines"] + result["stderr_lines"]
+        with self._lock:
+            self.show_output.write("\n".join(lines) + "\n")
+            self.show_output.flush()
+
+    def run(self, jobs: List[BatchJob]) -> Dict:
+        """
+            run jobs, return report dict with keys jobs (in input order) and summary.
+        :param jobs: resolved jobs, see resolve()
+        :return: report dict
+        """
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix="tutils-batch") as executor:
+            results = list(executor.map(self._run_job, jobs))
+
+        summary = {status: 0 for status in ("ok", "failed", "timeout", "killed", "error")}
+        for result in results:
+            summary[result["status"]] += 1
+        summary["total"] = len(results)
+        summary["duration"] = round(time.monotonic() - start, 3)
+        return {"jobs": results, "summary": summary}
+
+
+def write_report(report: Dict, output: Optional[Path] = None) -> None:
+    """Write JSON report to *output*, stdout if None."""
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output is None:
+        sys.stdout.write(text + "\n")
+    else:
+        Path(output).write_text(text + "\n", encoding="utf-8")
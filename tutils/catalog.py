@@ -0,0 +1,433 @@
+"""
+    Persistent compiled script catalog.
+
+ The catalog keeps every configured repository and its scripts in a pickle
+ file under ``~/.tutils/cache``. Repository and script entries are stamped
+ with the ``(mtime_ns, size)`` of their ``index.yaml``, so a warm lookup only
+ stats index files and never parses YAML, and a changed script index is read
+ again alone. Looking up one script by name checks two index files only.
+
+ The fuzzy search index and the name index over all scripts are persisted in
+ the same file and rebuilt only when one of the repository entries changed.
+"""
+import os
+import pickle
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import completion
+from . import const as C
+from . import timings
+from .model import RepositoryModel, ScriptHandle, ScriptModel
+from .nameindex import NameIndex
+from .searchindex import SearchIndex
+
+CATALOG_VERSION = 4
+
+Stamp = Optional[Tuple[int, int]]
+
+# stamp of a script not read yet, never equal to a real stamp
+_UNREAD = (-1, -1)
+
+
+def _stat(path: str) -> Stamp:
+    """Return ``(mtime_ns, size)`` of *path*, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Catalog:
+    """On-disk cache of repository and script metadata."""
+
+    def __init__(self, cache_path: Optional[Path] = None, trusted: bool = False,
+                 completion_path: Optional[Path] = None):
+        """
+        Initialize catalog.
+
+        Args:
+            cache_path: Path to catalog file.
+                        If None, uses ~/.tutils/cache/catalog.pickle
+            trusted: Use cached entries without checking index files,
+                     when a watcher keeps the catalog file up to date.
+            completion_path: Shell completion file written along the catalog.
+                             If None, uses completion.txt next to the catalog file.
+        """
+        self.cache_path = Path(cache_path) if cache_path is not None else C.CATALOG_FILE
+        self.completion_path = (
+            Path(completion_path) if completion_path is not None else self.cache_path.with_name(C.COMPLETION_FILE.name)
+        )
+        self.trusted = trusted
+        self.entries: Dict[str, dict] = {}
+        self.search: Optional[dict] = None
+        self.names: Optional[dict] = None
+        # entry generations the completion file was written for
+        self.completion: Optional[tuple] = None
+        self.dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """Load catalog file, ignore it if missing, corrupt or outdated."""
+        try:
+            with timings.span("catalog.load"), open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception:
+            return
+        if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+            return
+        self.entries = data.get("entries", {})
+        self.search = data.get("search")
+        self.names = data.get("names")
+        self.completion = data.get("completion")
+
+    def save(self) -> None:
+        """Write catalog file atomically if anything changed, and the completion file with it."""
+        if self.trusted:
+            # a trusted catalog is written by the watcher only
+            return
+        self._save_completion()
+        if not self.dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with timings.span("catalog.save"), open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {
+                        "version": CATALOG_VERSION,
+                        "entries": self.entries,
+                        "search": self.search,
+                        "names": self.names,
+                        "completion": self.completion,
+                    },
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # cache is an optimization only, never fail the command for it
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.dirty = False
+
+    def _save_completion(self) -> None:
+        """Write the shell completion file if any entry changed since it was written."""
+        for path, entry in self.entries.items():
+            unread = [i for i in entry["scripts"] if entry["items"][i]["stamp"] == _UNREAD]
+            if unread:
+                # the file lists every script, read those no command has used yet
+                self._refresh(entry, path, unread)
+        signature = tuple((path, entry["generation"]) for path, entry in self.entries.items())
+        if signature == self.completion and self.completion_path.exists():
+            return
+        content = completion.build(
+            (entry["name"], path, [
+                dict(entry["items"][folder]["script"], folder=folder)
+                for folder in entry["scripts"]
+                if entry["items"][folder]["script"] is not None
+            ])
+            for path, entry in self.entries.items()
+        )
+        completion.write(self.completion_path, content)
+        self.completion = signature
+        self.dirty = True
+
+    # ---- repository entries ----
+    #
+    # entry = {
+    #     "stamp": stamp of the repository index.yaml,
+    #     "generation": changes whenever the entry changes,
+    #     "name": repository name, "scripts": script folders,
+    #     "items": {folder: {"stamp": stamp of script index.yaml, "script": ScriptModel dict or None}},
+    #     "by_name": {script name: folder},
+    # }
+
+    @staticmethod
+    def _build_entry(config: dict, old: Optional[dict]) -> dict:
+        """Parse the repository index file, keep already read scripts of *old*."""
+        index_file_path = str(Path(config["path"]) / "index.yaml")
+        # stamp before parsing, a change during parsing invalidates the entry next time
+        stamp = _stat(index_file_path)
+        with timings.span("catalog.read_repository", path=config["path"]):
+            repo = RepositoryModel(config)
+        old_items = old["items"] if old is not None and old["name"] == repo.name else {}
+        entry = {
+            "stamp": stamp,
+            "generation": time.time_ns(),
+            "name": repo.name,
+            "scripts": list(repo.scripts),
+            "items": {i: old_items.get(i, {"stamp": _UNREAD, "script": None}) for i in repo.scripts},
+            "by_name": {},
+        }
+        Catalog._index_names(entry)
+        return entry
+
+    @staticmethod
+    def _index_names(entry: dict) -> None:
+        by_name = {}
+        for folder in entry["scripts"]:
+            script = entry["items"][folder]["script"]
+            if script is not None:
+                # first script wins, like a scan of the script list
+                by_name.setdefault(script["name"], folder)
+        entry["by_name"] = by_name
+
+    def _get_entry(self, config: dict) -> dict:
+        """Return entry of repository *config*, rebuild it if its index file changed."""
+        entry = self.entries.get(config["path"])
+        if entry is not None and self.trusted:
+            return entry
+        if entry is None or _stat(str(Path(config["path"]) / "index.yaml")) != entry["stamp"]:
+            entry = self._build_entry(config, entry)
+            self.entries[config["path"]] = entry
+            self.dirty = True
+        return entry
+
+    def _refresh(self, entry: dict, repo_path: str, folders: Optional[Iterable[str]] = None) -> None:
+        """Read again the script index files of *folders* (all if None) which changed."""
+        changed = False
+        for folder in entry["scripts"] if folders is None else folders:
+            item = entry["items"][folder]
+            if self.trusted and item["stamp"] != _UNREAD:
+                continue
+            script_index_path = str(Path(repo_path) / folder / "index.yaml")
+            stamp = _stat(script_index_path)
+            if stamp == item["stamp"]:
+                continue
+            repo = RepositoryModel.model_construct(name=entry["name"], path=repo_path)
+            with timings.span("catalog.read_script"):
+                script = repo.read_script(folder) if stamp is not None else None
+            item["stamp"] = stamp
+            item["script"] = script.model_dump() if script is not None else None
+            changed = True
+        if changed:
+            entry["generation"] = time.time_ns()
+            self._index_names(entry)
+            self.dirty = True
+
+    def _fresh_entry(self, config: dict) -> dict:
+        """Return entry of repository *config* with every script up to date."""
+        entry = self._get_entry(config)
+        self._refresh(entry, config["path"])
+        return entry
+
+    @staticmethod
+    def _script_dicts(entry: dict) -> List[dict]:
+        items = entry["items"]
+        return [items[i]["script"] for i in entry["scripts"] if items[i]["script"] is not None]
+
+    def get_repository(self, config: dict) -> RepositoryModel:
+        """
+            get repository model by config dict without parsing yaml if cached.
+            only the repository index file is checked, scripts are checked when used.
+        :param config: repository config, like {"path": "path/to/repo", "type": "local", "link": ""}
+        :return: RepositoryModel instance
+        """
+        entry = self._get_entry(config)
+        return RepositoryModel.model_construct(
+            name=entry["name"],
+            path=config["path"],
+            type=config["type"],
+            link=config["link"],
+            archive=config.get("archive", ""),
+            scripts=list(entry["scripts"]),
+            index_file_path=str(Path(config["path"]) / "index.yaml"),
+        )
+
+    def get_scripts(self, repo: RepositoryModel) -> List[ScriptModel]:
+        """
+            get script list of repository without parsing yaml if cached.
+        :param repo: RepositoryModel instance
+        :return: list of ScriptModel
+        """
+        entry = self._fresh_entry(repo.to_config())
+        return [ScriptModel.model_construct(**i) for i in self._script_dicts(entry)]
+
+    def get_script_handles(self, repo: RepositoryModel) -> List[ScriptHandle]:
+        """
+            get name-only handles of the scripts of repository, metadata is built on first use.
+        :param repo: RepositoryModel instance
+        :return: list of ScriptHandle
+        """
+        entry = self._fresh_entry(repo.to_config())
+        return [
+            ScriptHandle(i["repository"], i["name"], i["folder_path"], partial(ScriptModel.model_construct, **i))
+            for i in self._script_dicts(entry)
+        ]
+
+    def get_script(self, repo: RepositoryModel, name: str) -> Optional[ScriptModel]:
+        """
+            get one script of repository by name.
+            only the index files of the repository and of that script are checked,
+            the others only if the name is unknown or the script was renamed.
+        :param repo: RepositoryModel instance
+        :param name: script name
+        :return: ScriptModel instance or None if not found
+        """
+        config = repo.to_config()
+        entry = self._get_entry(config)
+        folder = entry["by_name"].get(name)
+        if folder is not None:
+            self._refresh(entry, config["path"], [folder])
+            script = entry["items"][folder]["script"]
+            if script is not None and script["name"] == name:
+                return ScriptModel.model_construct(**script)
+
+        self._refresh(entry, config["path"])
+        folder = entry["by_name"].get(name)
+        if folder is None:
+            return None
+        return ScriptModel.model_construct(**entry["items"][folder]["script"])
+
+    def get_search_index(self, repos: Iterable[RepositoryModel]) -> SearchIndex:
+        """
+            get search index over scripts of *repos*, rebuild it if any of them changed.
+        :param repos: repositories to index
+        :return: SearchIndex instance
+        """
+        entries = [(i.path, self._fresh_entry(i.to_config())) for i in repos]
+        signature = tuple((path, entry["generation"]) for path, entry in entries)
+        if self.search is not None and self.search["signature"] == signature:
+            return self.search["index"]
+
+        index = SearchIndex(
+            {
+                "path": f'{entry["name"]}.{script["name"]}',
+                "repository": entry["name"],
+                "name": script["name"],
+                "description": script["description"],
+                "author": script["author"],
+            }
+            for _, entry in entries
+            for script in self._script_dicts(entry)
+        )
+        self.search = {"signature": signature, "index": index}
+        self.dirty = True
+        return index
+
+    def get_name_index(self, repos: Iterable[RepositoryModel]) -> NameIndex:
+        """
+            get name index over scripts of *repos*, rebuild it if any of them changed.
+            only repository index files are checked while the index is valid, see resolve().
+        :param repos: repositories to index, earlier ones win names
+        :return: NameIndex instance
+        """
+        repos = list(repos)
+        signature = tuple((i.path, self._get_entry(i.to_config())["generation"]) for i in repos)
+        if self.names is not None and self.names["signature"] == signature:
+            return self.names["index"]
+
+        entries = [(i.path, self._fresh_entry(i.to_config())) for i in repos]
+        index = NameIndex(
+            {
+                "repository": entry["name"],
+                "name": script["name"],
+                "aliases": script.get("aliases", []),
+                "repository_path": path,
+                "folder": folder,
+                "run": script["run"],
+            }
+            for path, entry in entries
+            for folder in entry["scripts"]
+            for script in [entry["items"][folder]["script"]]
+            if script is not None
+        )
+        self.names = {"signature": tuple((path, entry["generation"]) for path, entry in entries), "index": index}
+        self.dirty = True
+        return index
+
+    def resolve(self, repos: Iterable[RepositoryModel], name: str) -> Optional[ScriptModel]:
+        """
+            resolve script *name* (repo.script, repo.alias, script or alias) with the name index.
+            only the index files of the repositories and of the found script are checked; on a
+            miss or a stale hit every script is checked and the name index rebuilt if needed.
+        :param repos: repositories to search, earlier ones win names
+        :param name: script name
+        :return: ScriptModel instance or None if not found
+        :raise ScriptAmbiguousError: short name or alias used by several scripts
+        """
+        repos = list(repos)
+        for full_check in (False, True):
+            if full_check:
+                for repo in repos:
+                    self._fresh_entry(repo.to_config())
+            fq = self.get_name_index(repos).resolve(name)
+            if fq is None:
+                continue
+            path, folder, _ = self.names["index"].targets[fq]
+            entry = self.entries[path]
+            self._refresh(entry, path, [folder])
+            script = entry["items"][folder]["script"]
+            if script is not None and f'{script["repository"]}.{script["name"]}' == fq:
+                return ScriptModel.model_construct(**script)
+        return None
+
+    def refresh(self, repos: Iterable[RepositoryModel], paths: Optional[Iterable[str]] = None) -> bool:
+        """
+            check every index file of *repos*, rebuild the search and name indexes if anything changed.
+        :param repos: repositories, in config order
+        :param paths: check only the repositories with these paths, trust the others
+        :return: True if the catalog changed
+        """
+        repos = list(repos)
+        paths = set(paths) if paths is not None else None
+        before = {path: entry["generation"] for path, entry in self.entries.items()}
+        for repo in repos:
+            if paths is None or repo.path in paths:
+                self._fresh_entry(repo.to_config())
+        changed = before != {path: entry["generation"] for path, entry in self.entries.items()}
+        trusted, self.trusted = self.trusted, True
+        try:
+            self.get_search_index(repos)
+            self.get_name_index(repos)
+        finally:
+            self.trusted = trusted
+        return changed
+
+    def invalidate(self, path: str, folders: Optional[Iterable[str]] = None) -> None:
+        """
+        Forget what was read of a repository, also in trusted mode.
+
+        Args:
+            path: repository path
+            folders: script folders to read again, the whole repository if None
+        """
+        entry = self.entries.get(path)
+        if entry is None:
+            return
+        if folders is None:
+            del self.entries[path]
+        else:
+            for folder in folders:
+                if folder in entry["items"]:
+                    entry["items"][folder]["stamp"] = _UNREAD
+        self.dirty = True
+
+    def prune(self, paths: Iterable[str]) -> None:
+        """Drop entries of repositories which are no longer configured."""
+        keep = set(paths)
+        for path in [i for i in self.entries if i not in keep]:
+            del self.entries[path]
+            self.dirty = True
+
+
+# 全局脚本目录实例
+_catalog: Optional[Catalog] = None
+
+
+def get_catalog() -> Catalog:
+    """
+    Get or create global catalog.
+
+    Returns:
+        Catalog instance
+    """
+    global _catalog
+    if _catalog is None:
+        from .watcher import is_running
+        _catalog = Catalog(trusted=is_running())
+    return _catalog
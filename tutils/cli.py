@@ -2,16 +2,13 @@
 from pathlib import Path
 from typing import Optional, Annotated, Literal, List
 import typer
-from rich.console import Console
-from rich import print as rprint
 
-from .repository.repositoryindexfile import RepositoryIndexFile
 from . import const as C
-from .model import ScriptModel,RepositoryModel
-from .runner import ProcessRunner
-from .config import get_config, get_config_manager
-from .scripts import get_script_manager
-from . import utils
+from . import importprofile
+from . import timings
+
+# 重量级模块（rich、pydantic、yaml、仓库解析等）均在子命令内按需导入，
+# 使 `tutils version`、`tutils run ./x.py` 等命令启动更快。
 
 # 创建 Typer 应用
 app = typer.Typer(
@@ -33,19 +30,41 @@ script_app = typer.Typer(
 )
 app.add_typer(script_app,name="script")
 
+worker_app = typer.Typer(
+    help="Warm worker commands, see `run --warm`. ",
+)
+app.add_typer(worker_app,name="worker")
+
+daemon_app = typer.Typer(
+    help="Daemon answering list, search, info and run lookups from memory. ",
+)
+app.add_typer(daemon_app,name="daemon")
+
 # ==================== Main Command ====================
 
+def rprint(*objects, **kwargs) -> None:
+    """Print with rich, import it only when something is printed."""
+    from rich import print as _rprint
+    _rprint(*objects, **kwargs)
+
 def _first_run_setup() -> None:
     """Initialize default repositories on first run."""
+    import shutil
+    from .config import get_config, get_config_manager
+    from .model import RepositoryModel
+    from .repository.updater import RepositoryUpdater
+
     rprint("[bold]First run detected. Setting up default repositories...[/bold]")
     cm = get_config_manager()
     config = get_config()
     config.repository = C.DEFAULT_REPO_LIST
+    repos = []
     for repo_config in config.repository:
         path = Path(repo_config["path"])
         path.mkdir(parents=True, exist_ok=True)
-        repo = RepositoryModel(config=repo_config)
-        repo.update_to_local()
+        repos.append(RepositoryModel(config=repo_config))
+    # the default repositories share one GitHub repository, one git fetch gets them all
+    RepositoryUpdater(git=shutil.which("git") is not None).update(repos)
 
     config.is_first_run = False
     cm.save_config(config)
@@ -62,11 +81,50 @@ def main(
                 is_eager=True,
             )
         ] = None,
+        import_profile: Annotated[
+            bool,
+            typer.Option(
+                importprofile.FLAG,
+                help=f"Report import time at exit. Or set {importprofile.ENV_NAME}=1 (or a JSON report path).",
+            )
+        ] = False,
+        show_timings: Annotated[
+            bool,
+            typer.Option(
+                "--timings",
+                help=f"Report a span tree of where the time went at exit. Or set {timings.ENV_NAME}=1 (or a JSON report path).",
+            )
+        ] = False,
+        trace: Annotated[
+            Optional[Path],
+            typer.Option(
+                "--trace",
+                envvar=timings.TRACE_ENV_NAME,
+                dir_okay=False,
+                help="Also write the timings as Chrome trace JSON to this file. Implies --timings.",
+            )
+        ] = None,
+        profile: Annotated[
+            Optional[Path],
+            typer.Option(
+                "--profile",
+                envvar=timings.PROFILE_ENV_NAME,
+                dir_okay=False,
+                help="Also dump cProfile stats to this file, see `python -m pstats`. Implies --timings.",
+            )
+        ] = None,
 ) -> None:
+    import os
+
     try:
-        config = get_config()
-        if config.is_first_run:
-            _first_run_setup()
+        if import_profile:
+            importprofile.install()
+
+        if show_timings or os.environ.get(timings.ENV_NAME) or trace or profile:
+            timings.install(
+                trace=str(trace) if trace else None,
+                profile=str(profile) if profile else None,
+            )
 
         if version_flag:
             version()
@@ -77,14 +135,42 @@ def main(
         raise typer.Exit(code=-1)
 
 
+def _ensure_setup() -> None:
+    """Load config, run first run setup if needed."""
+    from .config import get_config
+    if get_config().is_first_run:
+        _first_run_setup()
+
+def _get_script_manager():
+    """Get global script manager after config is ready."""
+    from .scripts import get_script_manager
+    _ensure_setup()
+    return get_script_manager()
+
+def _query(op: str, **params):
+    """Answer a script query (see daemon.answer) by the daemon if one is running, else in this process."""
+    from .daemon import answer, connect
+    client = connect()
+    if client is not None:
+        with client:
+            try:
+                with timings.span("daemon", op=op):
+                    return client.call(op, **params)
+            except ConnectionError:
+                # daemon went away, answer it ourselves
+                pass
+    return answer(_get_script_manager(), {"op": op, **params})
+
+
 @app.command()
 def show_script() -> None:
     """
     Show scripts list.
     """
+    from .utils import print_script_names
+
     try:
-        scripts = get_script_manager()
-        scripts.list_scripts(None,True)
+        print_script_names(_query("list"))
     except Exception as e:
         rprint(e)
         raise typer.Exit(code=-1)
@@ -92,7 +178,7 @@ def show_script() -> None:
 @app.command()
 def version() -> None:
     """Show version information."""
-    rprint(f'TUtils {C.version}')
+    typer.echo(f'TUtils {C.version}')
 
 @app.command("run")
 def run_script(
@@ -113,6 +199,18 @@ def run_script(
         Optional[float],
         typer.Option("--timeout", help="Timeout seconds (float).")
     ] = None,
+    max_lines: Annotated[
+        Optional[int],
+        typer.Option("--max-lines", min=0, help="Kill the script once it printed more lines than this. Implies --capture.")
+    ] = None,
+    capture: Annotated[
+        bool,
+        typer.Option("--capture", help="Read script output through pipes, keeping the last lines and byte/line counts.")
+    ] = False,
+    warm: Annotated[
+        bool,
+        typer.Option("--warm", envvar="TUTILS_WARM", help="Fork the script from a warm worker with common modules imported (POSIX).")
+    ] = False,
     debug: Annotated[
         Optional[bool],
         typer.Option(...,"-d","--debug", help="Enable debug mode.")
@@ -121,39 +219,42 @@ def run_script(
     """
     Run a python script with streaming output and controls.
     """
+    from .runner import ProcessRunner
+
     try:
 
-        runner = ProcessRunner()
-        script_model:ScriptModel
+        runner = ProcessRunner(warm=warm)
 
         # assume script is path
         if not script.exists():
             # if not exist, try to find in repositories
-            scripts = get_script_manager()
-            script_list = scripts.list_scripts(printit=False)
-            name = next((i for i in script_list if i.endswith(script.name)), None)
-            if name is None:
+            found = _query("run", name=script.name)
+            if found["path"] is None:
                 # fuzzy search fallback
-                matches = scripts.fuzzy_search(script.name)
+                matches = found["suggestions"]
                 if not matches:
                     rprint(f"Script [bold]{script.name}[/bold] not found.")
                     raise typer.Exit(code=-1)
 
                 rprint(f"Script [bold]{script.name}[/bold] not found. Did you mean:")
-                for m, score in matches[:5]:
+                for m in matches:
                     rprint(f"  - {m}")
                 raise typer.Exit(code=-1)
 
-            script_model = scripts.get_script_by_path(name)
-            script = Path(script_model.folder_path) / script_model.run
+            script = Path(found["path"])
 
         args_list = args if args else []
 
         res = runner.run_script(str(script),
                                 args=args_list,
                                 timeout=timeout,
-                                debug=debug)
+                                max_lines=max_lines,
+                                debug=debug,
+                                capture=capture)
+        if res["killed_by_limit"]:
+            rprint(f"[red]Script killed: more than {max_lines} lines of output.[/red]")
         if debug:
+            from rich.console import Console
             Console().rule()
             rprint("Debug:")
             rprint(res)
@@ -161,6 +262,80 @@ def run_script(
         rprint(e)
         raise typer.Exit(code=-1)
 
+@app.command("batch")
+def batch_run(
+    jobs_file: Annotated[
+        str,
+        typer.Argument(help="Job file, one job per line. '-' reads jobs from stdin.")
+    ] = "-",
+    script: Annotated[
+        Optional[str],
+        typer.Option("--script", "-s", help="Run this script for every line, lines hold only its arguments.")
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="Max count of scripts running at once.")
+    ] = C.DEFAULT_BATCH_JOBS,
+    timeout: Annotated[
+        Optional[float],
+        typer.Option("--timeout", help="Timeout seconds (float) of every job without its own timeout.")
+    ] = None,
+    max_lines: Annotated[
+        Optional[int],
+        typer.Option("--max-lines", min=0, help="Kill a job once it printed more lines than this.")
+    ] = None,
+    output: Annotated[
+        Optional[Path],
+        typer.Option("--output", "-o", help="Write the JSON report to this file instead of stdout.", dir_okay=False)
+    ] = None,
+    show_output: Annotated[
+        bool,
+        typer.Option("--show-output", help="Print the output of every job to stderr once it finished.")
+    ] = False,
+    warm: Annotated[
+        bool,
+        typer.Option("--warm", envvar="TUTILS_WARM", help="Fork the scripts from a warm worker with common modules imported (POSIX).")
+    ] = False,
+) -> None:
+    """
+    Run many scripts in parallel, report the results as JSON.
+    """
+    import sys
+    from .batch import BatchRunner, parse_jobs, write_report
+    from .runner import ProcessRunner
+
+    try:
+        if jobs_file == "-":
+            job_list = parse_jobs(sys.stdin, script)
+        else:
+            with open(jobs_file, encoding="utf-8") as f:
+                job_list = parse_jobs(f, script)
+
+        runner = BatchRunner(
+            jobs=jobs,
+            timeout=timeout,
+            max_lines=max_lines,
+            show_output=sys.stderr if show_output else None,
+            runner=ProcessRunner(warm=warm),
+        )
+
+        def _resolve(name: str) -> Optional[str]:
+            script_model = _get_script_manager().resolve_script(name)
+            if script_model is None:
+                return None
+            return str(Path(script_model.folder_path) / script_model.run)
+
+        runner.resolve(job_list, _resolve)
+        report = runner.run(job_list)
+        write_report(report, output)
+    except Exception as e:
+        rprint(e)
+        raise typer.Exit(code=-1)
+
+    summary = report["summary"]
+    if summary["ok"] != summary["total"]:
+        raise typer.Exit(code=1)
+
 @app.command("doc")
 def doc_server(
     port: Annotated[
@@ -171,10 +346,23 @@ def doc_server(
         bool,
         typer.Option("--no-browser", help="Do not open the browser automatically."),
     ] = False,
+    build: Annotated[
+        Optional[Path],
+        typer.Option("--build", help="Pre-render the docs to static HTML in this directory and exit.", file_okay=False),
+    ] = None,
 ) -> None:
     """Start a local documentation server and open it in the browser."""
     import webbrowser
-    from .docs_server import create_server
+    from .docs_server import build_site, create_server
+
+    if build is not None:
+        try:
+            count = build_site(build)
+        except (FileNotFoundError, OSError) as e:
+            rprint(f"[red]{e}[/red]")
+            raise typer.Exit(code=-1)
+        rprint(f"[bold green]Rendered {count} pages to {build}[/bold green]")
+        return
 
     try:
         server = create_server(port)
@@ -199,6 +387,83 @@ def doc_server(
         rprint("\n[bold]Documentation server stopped.[/bold]")
 
 
+@app.command("completion")
+def completion_script(
+    shell: Annotated[
+        Optional[str],
+        typer.Argument(help="Shell: bash, zsh or fish. Defaults to the shell in $SHELL."),
+    ] = None,
+    refresh: Annotated[
+        bool,
+        typer.Option("--refresh", help="Read every script index and rewrite the completion file, then exit."),
+    ] = False,
+) -> None:
+    """
+    Print a shell completion script reading the precomputed completion file.
+
+    Load it with: eval "$(tutils completion bash)"
+    """
+    import os
+    from . import completion
+    from typer.main import get_command
+
+    if shell is None:
+        shell = Path(os.environ.get("SHELL", "bash")).name
+    if shell not in completion.SHELLS:
+        raise typer.BadParameter(f"unsupported shell {shell}, choose from {', '.join(completion.SHELLS)}.")
+
+    if refresh or not C.COMPLETION_FILE.exists():
+        try:
+            sm = _get_script_manager()
+            sm.catalog.refresh([i for i in sm.repository if Path(i.index_file_path).exists()])
+            sm.catalog.save()
+        except Exception as e:
+            rprint(e)
+            raise typer.Exit(code=-1)
+        if refresh:
+            rprint(f"Completion file written to {sm.catalog.completion_path}")
+            return
+
+    commands = {
+        name: sorted(getattr(cmd, "commands", {}))
+        for name, cmd in get_command(app).commands.items()
+        if not cmd.hidden
+    }
+    typer.echo(completion.script(shell, C.COMPLETION_FILE, commands), nl=False)
+
+@app.command("watch")
+def watch_repos(
+    poll: Annotated[
+        bool,
+        typer.Option("--poll", help="Poll index files instead of using inotify."),
+    ] = False,
+    interval: Annotated[
+        float,
+        typer.Option("--interval", help="Polling interval in seconds.", min=0.1),
+    ] = C.WATCH_INTERVAL,
+) -> None:
+    """Watch repositories and keep the script catalog up to date."""
+    from .watcher import CatalogWatcher, is_running
+
+    _ensure_setup()
+    if is_running():
+        rprint("[yellow]A watcher is already running.[/yellow]")
+        raise typer.Exit(code=1)
+
+    import signal
+    # stop cleanly on kill too, removing the heartbeat file
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    watcher = CatalogWatcher(poll=poll, interval=interval)
+    rprint(f"[bold green]Watching repositories ({watcher.backend})[/bold green]")
+    rprint("[dim]Press Ctrl+C to stop.[/dim]")
+    try:
+        watcher.run(on_change=lambda paths: rprint(
+            f"[dim]Catalog updated: {', '.join(sorted(paths)) if paths else 'all repositories'}[/dim]"
+        ))
+    except KeyboardInterrupt:
+        rprint("\n[bold]Watcher stopped.[/bold]")
+
+
 
 # ==================== repository Command ====================
 
@@ -209,7 +474,7 @@ def repository_default(ctx: typer.Context) -> None:
         return
     try:
         # show repo list
-        scripts = get_script_manager()
+        scripts = _get_script_manager()
         repos = scripts.list_repo(True)
         if not len(repos):
             rprint("empty.")
@@ -229,7 +494,7 @@ def show_repo_scripts(
 ) -> None:
     """Show all scripts repository."""
     try:
-        scripts = get_script_manager()
+        scripts = _get_script_manager()
         scripts.list_repo_scripts(repo_name)
 
     except Exception as e:
@@ -256,7 +521,7 @@ def add(
             )
         ],
         source: Annotated[
-            Literal["local","remote"],
+            Literal["local","remote","git"],
             typer.Option("--type","-t"),
         ] = "local",
         link: Annotated[
@@ -266,10 +531,21 @@ def add(
                 help="Path to repository.",
             )
         ] = "",
+        archive: Annotated[
+            str,
+            typer.Option(
+                "--archive",
+                help="tar.gz/zip archive of the repository, updated with one download instead of file by file.",
+            )
+        ] = "",
 ) -> None:
     """Add new repository."""
+    from .config import get_config, get_config_manager
+    from .repository.repositoryindexfile import RepositoryIndexFile
+    from . import utils
+
     try:
-        if source == "remote" and not len(link):
+        if source != "local" and not len(link) and not (source == "remote" and archive):
             rprint("empty link.")
             return None
         config = get_config()
@@ -281,7 +557,7 @@ def add(
         if cm.check_repo_exist(path):
             rprint("Repository already exists in config.")
             raise typer.Exit()
-        sm = get_script_manager()
+        sm = _get_script_manager()
         repos = sm.list_repo()
         if any(i for i in repos if i.name == str(name)):
             rprint(f"Repository name {name} already exists in repositories.")
@@ -297,6 +573,8 @@ def add(
             raise typer.Exit()
 
         repo = {"path": str(path), "type": source, "link": link}
+        if archive:
+            repo["archive"] = archive
         config.repository.append(repo)
         cm.save_config(config)
         rprint("Repository added successfully!")
@@ -323,8 +601,11 @@ def remove(
         ] = False,
 ) -> None:
     """Remove repository."""
+    from .config import get_config, get_config_manager
+    from . import utils
+
     try:
-        repos = get_script_manager().list_repo()
+        repos = _get_script_manager().list_repo()
         exist_repo_list = [i for i in repos if i.name in repo_name]
         no_repo_list = [i for i in repo_name if i not in [j.name for j in exist_repo_list]]
         if len(no_repo_list):
@@ -335,8 +616,7 @@ def remove(
         cm = get_config_manager()
 
         for repo in exist_repo_list:
-            repo_config = {"path": repo.path, "type": repo.type, "link": repo.link}
-            config.repository.remove(repo_config)
+            config.repository.remove(repo.to_config())
 
         cm.save_config(config)
         if remove_file:
@@ -357,8 +637,10 @@ def remove(
 @repository_app.command("clean")
 def delete_nonexist_repo() -> None:
     """Remove repository which is non-exist."""
+    from .config import get_config, get_config_manager
+
     try:
-        script = get_script_manager()
+        script = _get_script_manager()
         list_repo = script.list_repo()
         nonexist_list_repo = [i.to_config() for i in list_repo if len(i.name) == 0]
 
@@ -389,10 +671,19 @@ def link_repo(
                 help="repository link.",
             )
         ],
+        archive: Annotated[
+            Optional[str],
+            typer.Option(
+                "--archive",
+                help="tar.gz/zip archive of the repository, updated with one download. Empty to remove it.",
+            )
+        ] = None,
 ) -> None:
     """Link local repository to remote repository."""
+    from .config import get_config, get_config_manager
+
     try:
-        script = get_script_manager()
+        script = _get_script_manager()
         list_repo = script.list_repo()
         repo = next((i for i in list_repo if i.name == repo_name), None)
         if repo is None:
@@ -403,8 +694,13 @@ def link_repo(
         cm = get_config_manager()
         for r in config.repository:
             if r["path"] == repo.path:
-                r["type"] = "remote"
+                if r["type"] == "local":
+                    r["type"] = "remote"
                 r["link"] = link
+                if archive:
+                    r["archive"] = archive
+                elif archive is not None:
+                    r.pop("archive", None)
 
         cm.save_config(config)
     except Exception as e:
@@ -421,23 +717,25 @@ def type_repo(
             )
         ],
         type: Annotated[
-            Literal["local", "remote"],
+            Literal["local", "remote", "git"],
             typer.Argument(
                 ...,
-                help="repository type. local or remote.",
+                help="repository type. local, remote or git.",
             )
         ],
 ) -> None:
     """Type local repository."""
+    from .config import get_config, get_config_manager
+
     try:
-        script = get_script_manager()
+        script = _get_script_manager()
         list_repo = script.list_repo()
         repo = next((i for i in list_repo if i.name == repo_name), None)
         if repo is None:
             rprint(f'Repository {repo_name} not found.')
             raise typer.Exit(code=-1)
 
-        if type == "remote" and repo.link is None:
+        if type != "local" and not (repo.link or (type == "remote" and repo.archive)):
             rprint(f'Repository {repo_name} no link!,use link set it first')
             raise typer.Exit(code=-1)
 
@@ -452,6 +750,18 @@ def type_repo(
         rprint(e)
         raise typer.Exit(code=-1)
 
+def _refresh_catalog(changes: dict) -> None:
+    """Read again the script folders an update replaced, and save the catalog for the next command."""
+    from .catalog import Catalog
+    from .config import get_config
+
+    catalog = Catalog()
+    for path, folders in changes.items():
+        catalog.invalidate(path, folders)
+    repos = [catalog.get_repository(i) for i in get_config().repository]
+    catalog.refresh([i for i in repos if Path(i.index_file_path).exists()], changes.keys())
+    catalog.save()
+
 @repository_app.command()
 def update(
         repo_name:Annotated[
@@ -461,10 +771,27 @@ def update(
                 help="repository update.",
             )
         ]= None,
+        jobs: Annotated[
+            int,
+            typer.Option(
+                "--jobs", "-j",
+                min=1,
+                help="Maximum concurrent downloads across all repositories.",
+            )
+        ] = C.DEFAULT_UPDATE_JOBS,
+        git: Annotated[
+            bool,
+            typer.Option(
+                "--git",
+                help="Also sync remote repositories on raw.githubusercontent.com by git, one fetch per GitHub repository.",
+            )
+        ] = False,
 ) -> None:
     """Update remote repository to local."""
+    from .repository.updater import RepositoryUpdater
+
     try:
-        script = get_script_manager()
+        script = _get_script_manager()
         repos = script.list_repo()
         repos_name = [i.name for i in repos]
         if repo_name is None:
@@ -473,10 +800,12 @@ def update(
             rprint(f"Repository name has not found.")
             raise typer.Exit(code=-1)
 
-        repos = [i for i in repos if i.name in repo_name and i.type == "remote"]
+        repos = [i for i in repos if i.name in repo_name and i.type in ("remote", "git")]
 
-        for repo in repos:
-            repo.update_to_local()
+        updater = RepositoryUpdater(jobs, git=git)
+        updater.update(repos)
+        if updater.changes:
+            _refresh_catalog(updater.changes)
 
 
     except Exception as e:
@@ -485,6 +814,42 @@ def update(
 
 
 
+@repository_app.command()
+def publish(
+        repo_name: Annotated[
+            str,
+            typer.Argument(
+                ...,
+                help="repository name.",
+            )
+        ],
+        jobs: Annotated[
+            int,
+            typer.Option(
+                "--jobs", "-j",
+                min=1,
+                help="Files hashed at once.",
+            )
+        ] = C.DEFAULT_HASH_JOBS,
+) -> None:
+    """Write the hash manifest of all script files into the repository index file."""
+    from .repository.manifest import publish as publish_manifest
+
+    try:
+        repo = next((i for i in _get_script_manager().list_repo() if i.name == repo_name), None)
+        if repo is None:
+            rprint(f'Repository {repo_name} not found.')
+            raise typer.Exit(code=-1)
+
+        files = publish_manifest(Path(repo.path), jobs)
+        rprint(f"Published {len(files)} files ({sum(i['size'] for i in files.values())} bytes) "
+               f"in {Path(repo.path) / 'index.yaml'}")
+    except Exception as e:
+        rprint(e)
+        raise typer.Exit(code=-1)
+
+
+
 # ==================== Script Command ====================
 @script_app.callback(invoke_without_command=True)
 def script_default(ctx: typer.Context) -> None:
@@ -513,11 +878,32 @@ def script_search(
                 help="repository name.",
             )
         ] = None,
+        field: Annotated[
+            Optional[List[str]],
+            typer.Option(
+                "--field", "-f",
+                help="Field to match against: name, description or author. Can be repeated. Defaults to name.",
+            )
+        ] = None,
+        limit: Annotated[
+            Optional[int],
+            typer.Option(
+                "--limit", "-n",
+                min=1,
+                help="Show top N matches only.",
+            )
+        ] = None,
 ) -> None:
     """Fuzzy search scripts by name."""
+    from . import utils
+    from .searchindex import FIELDS
+
+    unknown = [i for i in field or [] if i not in FIELDS]
+    if unknown:
+        raise typer.BadParameter(f"unknown field {', '.join(unknown)}, choose from {', '.join(FIELDS)}.")
+
     try:
-        sm = get_script_manager()
-        matches = sm.fuzzy_search(script, repo_name)
+        matches = _query("search", query=script, repos=repo_name, fields=field or ["name"], limit=limit)
         if not matches:
             rprint(f"No scripts matching [bold]{script}[/bold].")
             raise typer.Exit()
@@ -571,22 +957,17 @@ def script_info(
             ),
         ] = False,
 ) -> None:
-    try:
-        script_manager = get_script_manager()
-        script_list = script_manager.list_scripts()
-        if repo_name is None:
-            name = next((i for i in script_list if i.endswith(script_name)), None)
-        else:
-            name = next((i for i in script_list if i == f'{repo_name}.{script_name}'), None)
+    from types import SimpleNamespace
+    from . import utils
 
-        if name is None:
-            rprint(f"Script {script_name} not found.")
-            raise typer.Exit(code=-1)
+    try:
+        name = script_name if repo_name is None else f'{repo_name}.{script_name}'
 
-        script = script_manager.get_script_by_path(name)
-        if script is None:
+        info = _query("info", name=name)
+        if info is None:
             rprint(f"Script {script_name} not found.")
             raise typer.Exit(code=-1)
+        script = SimpleNamespace(**info)
 
         if description:
             rprint(script.description)
@@ -607,6 +988,8 @@ def script_info(
 
         table.add_row('repository',script.repository,end_section=True)
         table.add_row("name", script.name,end_section=True)
+        if script.aliases:
+            table.add_row("aliases", ", ".join(script.aliases),end_section=True)
         table.add_row("author", script.author,end_section=True)
         table.add_row("version", script.version,end_section=True)
         table.add_row("description", script.description,end_section=True)
@@ -622,5 +1005,118 @@ def script_info(
         raise typer.Exit(code=-1)
 
 
+# ==================== worker Command ====================
+
+@worker_app.command("status")
+def worker_status() -> None:
+    """Show whether the warm worker is running."""
+    from .warmpool import WarmPool
+
+    reply = WarmPool().request("ping")
+    if reply is None:
+        rprint("Warm worker is not running.")
+        return
+    rprint(f"Warm worker is running (pid {reply['pid']}), preloaded: {', '.join(reply['preload'])}")
+
+@worker_app.command("stop")
+def worker_stop() -> None:
+    """Stop the warm worker, it starts again on the next warm run."""
+    from .warmpool import WarmPool
+
+    if WarmPool().request("stop") is None:
+        rprint("Warm worker is not running.")
+        return
+    rprint("Warm worker stopped.")
+
+
+# ==================== daemon Command ====================
+
+@daemon_app.command("start")
+def daemon_start(
+    background: Annotated[
+        bool,
+        typer.Option("--background", "-b", help="Detach and return once the daemon is listening."),
+    ] = False,
+) -> None:
+    """Start the daemon, in the foreground unless --background."""
+    from .daemon import connect, serve
+
+    _ensure_setup()
+    client = connect()
+    if client is not None:
+        client.close()
+        rprint("[yellow]Daemon is already running.[/yellow]")
+        raise typer.Exit(code=1)
+
+    if background:
+        import subprocess
+        import sys
+        import time
+
+        subprocess.Popen(
+            [sys.executable, "-m", "tutils.daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + 10
+        while (client := connect()) is None:
+            if time.monotonic() > deadline:
+                rprint("[red]Daemon did not start.[/red]")
+                raise typer.Exit(code=-1)
+            time.sleep(0.05)
+        client.close()
+        rprint(f"[bold green]Daemon listening on {C.DAEMON_SOCKET}[/bold green]")
+        return
+
+    import signal
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    rprint(f"[bold green]Daemon listening on {C.DAEMON_SOCKET}[/bold green]")
+    rprint("[dim]Press Ctrl+C to stop.[/dim]")
+    try:
+        if not serve():
+            rprint("[yellow]Daemon is already running.[/yellow]")
+            raise typer.Exit(code=1)
+    except KeyboardInterrupt:
+        rprint("\n[bold]Daemon stopped.[/bold]")
+
+@daemon_app.command("status")
+def daemon_status() -> None:
+    """Show whether the daemon is running."""
+    from .daemon import connect
+
+    client = connect()
+    if client is None:
+        rprint("Daemon is not running.")
+        return
+    try:
+        with client:
+            reply = client.call("ping")
+    except ConnectionError:
+        rprint("Daemon is not running.")
+        return
+    rprint(f"Daemon is running (pid {reply['pid']}), {reply['requests']} requests served.")
+
+@daemon_app.command("stop")
+def daemon_stop() -> None:
+    """Stop the daemon, commands answer lookups themselves again."""
+    from .daemon import connect
+
+    client = connect()
+    if client is None:
+        rprint("Daemon is not running.")
+        return
+    import time
+
+    with client:
+        client.call("stop")
+    # wait until it stopped listening
+    deadline = time.monotonic() + 5
+    while (client := connect()) is not None and time.monotonic() < deadline:
+        client.close()
+        time.sleep(0.02)
+    rprint("Daemon stopped.")
+
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
@@ -0,0 +1,192 @@
+"""
+    Shell completion from a precomputed completion file.
+
+ The catalog writes a flat, tab separated completion file whenever its
+ repositories or scripts change, and the shell completion scripts read it
+ with awk, so pressing Tab never starts python::
+
+    repo    File
+    script  File.tcount     get current folder file count
+    script  tcount          get current folder file count
+    param   tcount          --show  show each file
+
+ ``script`` lines hold every name ``tutils run`` accepts, ``param`` lines the
+ ``param`` entries of a script index file, once for each name of the script.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .nameindex import NameIndex
+
+SHELLS = ("bash", "zsh", "fish")
+
+HEADER = "# tutils completion file, generated from the script catalog\n"
+
+# (command, subcommand) -> what the next positional argument completes to
+_TARGETS = {
+    ("run", ""): "script",
+    ("script", "info"): "script",
+    ("repository", "show"): "repo",
+    ("repository", "remove"): "repo",
+    ("repository", "link"): "repo",
+    ("repository", "type"): "repo",
+    ("repository", "update"): "repo",
+    ("repository", "publish"): "repo",
+}
+
+
+def _clean(text) -> str:
+    return " ".join(str(text or "").split())
+
+
+def _param_name(param: Dict) -> str:
+    return _clean(param.get("name") or param.get("option") or next(iter(param.values()), ""))
+
+
+def build(repos: Iterable[Tuple[str, str, List[Dict]]]) -> str:
+    """
+        build completion file content.
+    :param repos: (repository name, repository path, script dicts of folders) in config order,
+                  a script dict is a ScriptModel dict with the extra key folder
+    :return: file content
+    """
+    repos = list(repos)
+    scripts = [dict(script, repository=name, repository_path=path) for name, path, items in repos for script in items]
+    index = NameIndex(scripts)
+    by_fq = {f'{i["repository"]}.{i["name"]}': i for i in scripts}
+
+    names: Dict[str, List[str]] = {}
+    for name, fq in list(index.qualified.items()) + list(index.short.items()):
+        names.setdefault(fq, []).append(name)
+
+    lines = [HEADER]
+    lines += [f"repo\t{_clean(name)}\n" for name, _, _ in repos]
+    for fq, script_names in names.items():
+        script = by_fq[fq]
+        description = _clean(script.get("description"))
+        for name in script_names:
+            lines.append(f"script\t{name}\t{description}\n")
+        for param in script.get("param") or ():
+            param_name = _param_name(param)
+            if not param_name:
+                continue
+            help_text = _clean(param.get("description") or param.get("help"))
+            lines += [f"param\t{name}\t{param_name}\t{help_text}\n" for name in script_names]
+    return "".join(lines)
+
+
+def write(path: Path, content: str) -> None:
+    """Write completion file atomically, shells may read it at any time."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+# ==================== shell scripts ====================
+
+_BASH = r'''# tutils shell completion, reads __FILE__ without starting python.
+# Load it with: eval "$(tutils completion bash)"
+_tutils_complete() {
+    local file="__FILE__" cur="${COMP_WORDS[COMP_CWORD]}"
+    local cmd="${COMP_WORDS[1]}" sub="" target="" words=""
+    [ "$cmd" = "repo" ] && cmd="repository"
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=($(compgen -W "__COMMANDS__" -- "$cur"))
+        return
+    fi
+    case "$cmd" in
+__SUBCOMMANDS__
+    esac
+    if [ -n "$subcommands" ]; then
+        if [ "$COMP_CWORD" -eq 2 ]; then
+            COMPREPLY=($(compgen -W "$subcommands" -- "$cur"))
+            return
+        fi
+        sub="${COMP_WORDS[2]}"
+    fi
+    case "$cmd:$sub" in
+__TARGETS__
+    esac
+    [ -r "$file" ] || return
+    local pos=$((COMP_CWORD - 1))
+    [ -n "$sub" ] && pos=$((pos - 1))
+    if [ "$target" = "script" ] && [ "$pos" -gt 1 ] && [ "$cmd" = "run" ]; then
+        words=$(awk -F'\t' -v s="${COMP_WORDS[2]}" '$1=="param" && $2==s {print $3}' "$file")
+    elif [ -n "$target" ] && [ "$pos" -eq 1 ]; then
+        words=$(awk -F'\t' -v k="$target" '$1==k {print $2}' "$file")
+    fi
+    local IFS=$'\n'
+    COMPREPLY=($(compgen -W "$words" -- "$cur"))
+}
+complete -o default -o bashdefault -F _tutils_complete tutils
+'''
+
+_FISH = r'''# tutils shell completion, reads __FILE__ without starting python.
+# Load it with: tutils completion fish | source
+function __tutils_entries
+    test -r "__FILE__"; or return
+    awk -F'\t' -v k=$argv[1] -v s="$argv[2]" '$1==k && k!="param" {print $2"\t"$3} $1==k && k=="param" && $2==s {print $3"\t"$4}' "__FILE__"
+end
+function __tutils_args
+    set -l words (commandline -opc)
+    set -e words[1]
+    test "$words[1]" = repo; and set words[1] repository
+    string join ' ' -- $words
+end
+complete -c tutils -n "__fish_use_subcommand" -f -a "__COMMANDS__"
+__FISH_LINES__
+'''
+
+
+def _commands(commands: Dict[str, List[str]]) -> Tuple[str, Dict[str, List[str]]]:
+    return " ".join(commands), {k: v for k, v in commands.items() if v}
+
+
+def script(shell: str, path: Path, commands: Dict[str, List[str]]) -> str:
+    """
+        return the completion script of *shell*.
+    :param shell: bash, zsh or fish
+    :param path: completion file
+    :param commands: top level command names mapped to their subcommand names
+    :raise ValueError: unsupported shell
+    """
+    if shell not in SHELLS:
+        raise ValueError(f"unsupported shell {shell}, choose from {', '.join(SHELLS)}")
+    top, groups = _commands(commands)
+
+    if shell == "fish":
+        lines = []
+        for cmd, subs in groups.items():
+            lines.append(f'complete -c tutils -n "__fish_seen_subcommand_from {cmd}; and test (count (commandline -opc)) -eq 2" -f -a "{" ".join(subs)}"')
+        for (cmd, sub), target in _TARGETS.items():
+            args = f"{cmd} {sub}".strip()
+            count = len(args.split()) + 1
+            # run also takes script paths
+            files = "" if cmd == "run" else "-f "
+            lines.append(
+                f'complete -c tutils -n "test (__tutils_args) = \'{args}\'; and test (count (commandline -opc)) -eq {count}" '
+                f'{files}-a "(__tutils_entries {target})"'
+            )
+        lines.append(
+            'complete -c tutils -n "string match -q \'run *\' -- (__tutils_args)" '
+            '-a "(__tutils_entries param (commandline -opc)[3])"'
+        )
+        return _FISH.replace("__COMMANDS__", top).replace("__FISH_LINES__", "\n".join(lines)).replace("__FILE__", str(path))
+
+    subcommands = "\n".join(f'        {cmd}) local subcommands="{" ".join(subs)}" ;;' for cmd, subs in groups.items())
+    subcommands += '\n        *) local subcommands="" ;;'
+    targets = "\n".join(f'        "{cmd}:{sub}") target="{target}" ;;' for (cmd, sub), target in _TARGETS.items())
+    text = (_BASH.replace("__COMMANDS__", top)
+            .replace("__SUBCOMMANDS__", subcommands)
+            .replace("__TARGETS__", targets)
+            .replace("__FILE__", str(path)))
+    if shell == "zsh":
+        text = text.replace('eval "$(tutils completion bash)"', 'eval "$(tutils completion zsh)"')
+        text = "autoload -U +X bashcompinit && bashcompinit\n" + text
+    return text
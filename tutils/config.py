@@ -1,13 +1,52 @@
 """Configuration management module with auto-initialization."""
 
+import copy
 import json
+import os
+import pickle
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 import typer
-import yaml
 from . import const as C
+from . import timings
 from .model import AppConfig
 
+# 编译后配置缓存的格式版本，格式变化时递增
+CONFIG_CACHE_VERSION = 1
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    """Return ``(mtime_ns, size)`` of *path*, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _dump(data: Dict[str, Any], fmt: str) -> str:
+    """Serialize config dict as yaml or json text."""
+    if fmt in ["yaml", "yml"]:
+        import yaml
+        return yaml.dump(data, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    if fmt == "json":
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write *text* to a temporary file next to *path*, then rename it over *path*."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 class ConfigManager:
     """Manage application configuration with auto-initialization."""
 
@@ -33,8 +72,40 @@ class ConfigManager:
         # 确保配置目录存在
         self.config_dir.mkdir(parents=True, exist_ok=True)
 
+        # 编译后的配置缓存，源文件未变化时跳过 YAML 解析
+        self.cache_path = self.config_dir / "cache" / f"{self.config_path.name}.pickle"
+
+        # 配置的字典视图，get/set 直接读写它；以及最近一次保存（或加载）的内容
+        self._config: Optional[AppConfig] = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._saved: Optional[Dict[str, Any]] = None
+
         # 加载或创建配置
-        self.config: AppConfig = self._load_or_create_config()
+        self.config = self._load_or_create_config()
+        if self._saved is None:
+            self._saved = copy.deepcopy(self._view())
+
+    @property
+    def config(self) -> AppConfig:
+        """
+        Current configuration, callers may change it in place before save_config().
+
+        get() reads the dict view, which sees such changes once they are saved.
+        """
+        if self._config is None:
+            self._config = AppConfig(**self._data)
+        return self._config
+
+    @config.setter
+    def config(self, config: AppConfig) -> None:
+        self._config = config
+        self._data = None
+
+    def _view(self) -> Dict[str, Any]:
+        """Return dict view of the configuration, dump the model only if needed."""
+        if self._data is None:
+            self._data = self._config.model_dump()
+        return self._data
 
     def _load_or_create_config(self) -> AppConfig:
         """
@@ -52,26 +123,67 @@ class ConfigManager:
         """
         Load configuration from repository.
 
+        The compiled cache is used if it was written for the current
+        ``(mtime, size)`` of the config file, otherwise the file is parsed
+        and the cache written again.
+
         Returns:
             AppConfig object
         """
         try:
-            suffix = self.config_path.suffix.lower()
-
-            if suffix in [".yaml", ".yml"]:
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f) or {}
-            elif suffix == ".json":
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            else:
-                return AppConfig()
-
-            config = AppConfig(**data)
-            return config
+            with timings.span("config.load", path=str(self.config_path)) as span:
+                stamp = _stat(self.config_path)
+                data = self._load_cache(stamp)
+                span.set(cached=data is not None)
+                if data is None:
+                    suffix = self.config_path.suffix.lower()
+
+                    if suffix in [".yaml", ".yml"]:
+                        import yaml
+                        with open(self.config_path, "r", encoding="utf-8") as f:
+                            data = yaml.safe_load(f) or {}
+                    elif suffix == ".json":
+                        with open(self.config_path, "r", encoding="utf-8") as f:
+                            data = json.load(f)
+                    else:
+                        return AppConfig()
+                    self._save_cache(data, stamp)
+
+                config = AppConfig(**data)
+                return config
         except Exception as e:
             return AppConfig()
 
+    def _cache_header(self, stamp: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+        return {"version": CONFIG_CACHE_VERSION, "source": str(self.config_path), "stamp": stamp}
+
+    def _load_cache(self, stamp: Optional[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+        """Return config dict from the compiled cache, None if it is missing or stale."""
+        try:
+            with open(self.cache_path, "rb") as f:
+                if pickle.load(f) != self._cache_header(stamp):
+                    return None
+                data = pickle.load(f)
+        except Exception:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _save_cache(self, data: Dict[str, Any], stamp: Optional[Tuple[int, int]]) -> None:
+        """Write compiled cache of *data* parsed from the config file with *stamp*."""
+        if stamp is None:
+            return
+        tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                # header first, a stale cache is rejected without loading the data
+                pickle.dump(self._cache_header(stamp), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            # cache is an optimization only, never fail the command for it
+            tmp_path.unlink(missing_ok=True)
+
     def _create_default_config(self) -> AppConfig:
         """
         Create and save default configuration.
@@ -93,35 +205,45 @@ class ConfigManager:
         repo = next((i for i in self.config.repository if Path(i["path"]).resolve() == path), None)
         return repo is not None
 
-    def save_config(self, config: Optional[AppConfig] = None) -> None:
+    @property
+    def dirty(self) -> bool:
+        """Whether configuration differs from the saved file."""
+        if self._config is not None:
+            # the model may have been changed in place
+            return self._config.model_dump() != self._saved
+        return self._view() != self._saved
+
+    def save_config(self, config: Optional[AppConfig] = None) -> bool:
         """
-        Save configuration to repository.
+        Save configuration to repository if it changed.
+
+        The file is written to a temporary file first and renamed over the
+        old one, so an interrupted save never leaves a truncated config.
 
         Args:
             config: AppConfig object to save. If None, uses self.config
+
+        Returns:
+            True if the file was written, False if nothing changed
         """
-        if config is None:
-            config = self.config
+        if config is not None and config is not self._config:
+            self.config = config
+        elif self._config is not None:
+            # self.config may have been changed in place
+            self._data = None
 
-        try:
-            suffix = self.config_path.suffix.lower()
+        data = self._view()
+        if data == self._saved and self.config_path.exists():
+            return False
 
-            if suffix in [".yaml", ".yml"]:
-                with open(self.config_path, "w", encoding="utf-8") as f:
-                    yaml.dump(
-                        config.model_dump(),
-                        f,
-                        default_flow_style=False,
-                        allow_unicode=True,
-                        sort_keys=False,
-                    )
-            elif suffix == ".json":
-                with open(self.config_path, "w", encoding="utf-8") as f:
-                    json.dump(config.model_dump(), f, indent=2, ensure_ascii=False)
-            else:
-                raise ValueError(f"Unsupported format: {suffix}")
+        try:
+            with timings.span("config.save", path=str(self.config_path)):
+                _write_atomic(self.config_path, _dump(data, self.config_path.suffix.lower().lstrip(".")))
         except Exception as e:
             raise typer.Exit(code=1)
+        self._saved = copy.deepcopy(data)
+        self._save_cache(self._saved, _stat(self.config_path))
+        return True
 
     @staticmethod
     def load_from_file(filepath: Path) -> AppConfig:
@@ -140,6 +262,7 @@ class ConfigManager:
             suffix = filepath.suffix.lower()
 
             if suffix in [".yaml", ".yml"]:
+                import yaml
                 with open(filepath, "r", encoding="utf-8") as f:
                     data = yaml.safe_load(f) or {}
             elif suffix == ".json":
@@ -167,21 +290,7 @@ class ConfigManager:
 
         try:
             filepath.parent.mkdir(parents=True, exist_ok=True)
-
-            if format.lower() in ["yaml", "yml"]:
-                with open(filepath, "w", encoding="utf-8") as f:
-                    yaml.dump(
-                        config.model_dump(),
-                        f,
-                        default_flow_style=False,
-                        allow_unicode=True,
-                        sort_keys=False,
-                    )
-            elif format.lower() == "json":
-                with open(filepath, "w", encoding="utf-8") as f:
-                    json.dump(config.model_dump(), f, indent=2, ensure_ascii=False)
-            else:
-                raise ValueError(f"Unsupported format: {format}")
+            _write_atomic(filepath, _dump(config.model_dump(), format.lower()))
 
             typer.echo(f"✓ Config saved to: {filepath}", color=True)
         except Exception as e:
@@ -200,7 +309,7 @@ class ConfigManager:
             Configuration value
         """
         keys = key.split(".")
-        value: any = self.config.model_dump()
+        value: any = self._view()
 
         for k in keys:
             if isinstance(value, dict):
@@ -221,8 +330,10 @@ class ConfigManager:
             value: Value to set
         """
         keys = key.split(".")
-        config_dict = self.config.model_dump()
-        current = config_dict
+        if self._config is not None:
+            # keep changes made to the model in place
+            self._data = None
+        current = self._view()
 
         for k in keys[:-1]:
             if k not in current:
@@ -230,7 +341,8 @@ class ConfigManager:
             current = current[k]
 
         current[keys[-1]] = value
-        self.config = AppConfig(**config_dict)
+        # model is rebuilt from the view on next access of self.config
+        self._config = None
 
 # 全局配置管理器实例
 _config_manager: Optional[ConfigManager] = None
@@ -255,15 +367,15 @@ def get_config_manager() -> ConfigManager:
     """
     Get global config manager.
 
+    Initialize it with the default location on first use,
+    so config is only loaded by commands which need it.
+
     Returns:
         ConfigManager instance
-
-    Raises:
-        RuntimeError: If config manager not initialized
     """
     global _config_manager
     if _config_manager is None:
-        raise RuntimeError("Config manager not initialized. Call init_config() first.")
+        _config_manager = ConfigManager()
     return _config_manager
 
 
@@ -1,4 +1,5 @@
 """some const values for tutils"""
+import os
 from pathlib import Path
 from importlib.metadata import version as _get_version
 
@@ -32,6 +33,42 @@ info = f"""TUtils - A powerful command-line tool.
 
 CONFIG_DIR = Path.home() / ".tutils"
 SCRIPTS_DIR = CONFIG_DIR / "Scripts"
+CACHE_DIR = CONFIG_DIR / "cache"
+CATALOG_FILE = CACHE_DIR / "catalog.pickle"
+COMPLETION_FILE = CACHE_DIR / "completion.txt"
+STORE_DIR = CONFIG_DIR / "store"
+# 所有 git 远程仓库共用的对象缓存（bare 仓库）及各远程的稀疏工作树
+GIT_CACHE_DIR = CACHE_DIR / "git"
+
+# 仓库更新的默认并发数
+DEFAULT_UPDATE_JOBS = 8
+
+# 下载：初始读取字节数，以及读满时翻倍的上限
+DOWNLOAD_READ_SIZE = 64 * 1024
+DOWNLOAD_MAX_READ_SIZE = 4 * 1024 * 1024
+
+# 捕获脚本输出时每个流保留的最后行数，以及单行最大字节数
+DEFAULT_BUFFER_LINES = 1000
+DEFAULT_MAX_LINE_BYTES = 64 * 1024
+
+# 发布仓库时计算文件哈希的线程数
+DEFAULT_HASH_JOBS = os.cpu_count() or 4
+
+# 批量运行脚本时同时运行的进程数
+DEFAULT_BATCH_JOBS = os.cpu_count() or 4
+
+# 预热解释器守护进程：套接字目录、空闲退出秒数、预先导入的模块
+RUN_DIR = CONFIG_DIR / "run"
+WORKER_IDLE_TIMEOUT = 600
+WORKER_PRELOAD = ("typer", "rich", "rich.console", "rich.table", "rich.progress", "yaml", "pydantic")
+
+# 目录监视：轮询间隔秒数、心跳间隔秒数、心跳文件
+WATCH_INTERVAL = 2.0
+WATCHER_HEARTBEAT = 5.0
+WATCHER_PID_FILE = RUN_DIR / "watcher.pid"
+
+# 常驻守护进程的套接字
+DAEMON_SOCKET = RUN_DIR / "daemon.sock"
 # DEFAULT_REPO_DIR = SCRIPTS_DIR / "default"
 
 DEFAULT_REPO_LIST = [
@@ -0,0 +1,273 @@
+"""
+    Long-running daemon answering script queries over a Unix socket.
+
+ The daemon keeps the config, the script catalog and its search and name
+ indexes in memory, so list, search, info and run lookups cost a few stat
+ calls instead of a python start, a config load and a catalog load. The CLI
+ forwards these commands to the daemon while one is running and answers
+ them itself otherwise; scripts always run in the CLI process, the daemon
+ only resolves them.
+
+ Protocol, newline delimited JSON, any number of requests per connection::
+
+    {"op": "search", "query": "count", "limit": 5}
+    {"ok": true, "result": [["File.tcount", 1.0]]}
+    {"op": "info", "name": "count"}
+    {"ok": false, "error": "Script count is ambiguous: ...", "candidates": ["File.count", "Net.count"]}
+
+ Set ``TUTILS_NO_DAEMON=1`` to make the CLI ignore a running daemon.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from . import const as C
+
+ENV_NAME = "TUTILS_NO_DAEMON"
+
+# seconds to wait for a reply
+_TIMEOUT = 5.0
+
+
+def answer(sm, request: Dict) -> Any:
+    """
+        answer one query with *sm*, used by the daemon and by the CLI without daemon.
+    :param sm: ScriptManager instance
+    :param request: dict with key op (list, search, info, run) and its parameters
+    :return: JSON serializable result
+    :raise ScriptAmbiguousError: script name used by several scripts
+    :raise ValueError: unknown op
+    """
+    op = request.get("op")
+    if op == "list":
+        return sm.script_names(request.get("repos"))
+    if op == "search":
+        matches = sm.fuzzy_search(
+            request["query"],
+            request.get("repos"),
+            cutoff=request.get("cutoff", 0.4),
+            fields=request.get("fields") or ("name",),
+            limit=request.get("limit"),
+        )
+        return [list(i) for i in matches]
+    if op == "info":
+        script = sm.resolve_script(request["name"])
+        return script.model_dump() if script is not None else None
+    if op == "run":
+        script = sm.resolve_script(request["name"])
+        if script is None:
+            return {"path": None, "suggestions": [i for i, _ in sm.fuzzy_search(request["name"], limit=5)]}
+        return {"path": str(Path(script.folder_path) / script.run), "suggestions": []}
+    raise ValueError(f"unknown op {op!r}")
+
+
+class DaemonClient:
+    """
+    Connection to a running daemon.
+
+    Usage::
+
+        client = connect()
+        if client is not None:
+            with client:
+                client.call("search", query="count", limit=5)
+    """
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.conn.settimeout(_TIMEOUT)
+        self.rfile = conn.makefile("rb")
+
+    def call(self, op: str, **params) -> Any:
+        """
+            send one request and return its result.
+        :raise ScriptAmbiguousError: script name used by several scripts
+        :raise TUtilsError: the daemon failed to answer
+        :raise ConnectionError: daemon went away
+        """
+        from .exceptions import ScriptAmbiguousError, TUtilsError
+
+        try:
+            self.conn.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+            line = self.rfile.readline()
+        except OSError as e:
+            raise ConnectionError(f"daemon connection failed: {e}") from None
+        if not line:
+            raise ConnectionError("daemon connection closed")
+        reply = json.loads(line)
+        if reply.get("ok"):
+            return reply.get("result")
+        if "candidates" in reply:
+            raise ScriptAmbiguousError(reply["name"], reply["candidates"])
+        raise TUtilsError(reply.get("error", "daemon error"))
+
+    def close(self) -> None:
+        self.rfile.close()
+        self.conn.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def connect(socket_path: Optional[Path] = None) -> Optional[DaemonClient]:
+    """
+        connect to a running daemon.
+    :param socket_path: daemon socket, ~/.tutils/run/daemon.sock if None
+    :return: DaemonClient, None if no daemon is running or TUTILS_NO_DAEMON is set
+    """
+    if os.environ.get(ENV_NAME) or not hasattr(socket, "AF_UNIX"):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(str(socket_path or C.DAEMON_SOCKET))
+    except OSError:
+        conn.close()
+        return None
+    return DaemonClient(conn)
+
+
+# ==================== daemon ====================
+
+class ScriptService:
+    """Config and script catalog kept in memory, checked for changes on every request."""
+
+    def __init__(self, config_path: Optional[Path] = None):
+        """
+        :param config_path: config file, ~/.tutils/config.yaml if None
+        """
+        from .catalog import Catalog
+
+        self.config_path = config_path
+        # own catalog: the global one may trust a watcher, the daemon outlives it
+        self.catalog = Catalog()
+        self.started = time.time()
+        self.requests = 0
+        self._cm = None
+        self._config_stamp = None
+        self._lock = threading.Lock()
+
+    def _stamp(self):
+        try:
+            st = os.stat(self._cm.config_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def manager(self):
+        """Return a ScriptManager over the current config, reload config if its file changed."""
+        from .config import ConfigManager
+        from .scripts import ScriptManager
+
+        if self._cm is None or self._stamp() != self._config_stamp:
+            self._cm = ConfigManager(self.config_path)
+            self._config_stamp = self._stamp()
+        # cheap: one stat per repository, entries come from the in-memory catalog
+        return ScriptManager(self._cm.config, self.catalog)
+
+    def handle(self, request: Dict) -> Dict:
+        """Answer *request*, return reply dict."""
+        from .exceptions import ScriptAmbiguousError
+
+        with self._lock:
+            self.requests += 1
+            if request.get("op") in ("ping", "stop"):
+                return {"ok": True, "result": {"pid": os.getpid(), "started": self.started, "requests": self.requests}}
+            try:
+                return {"ok": True, "result": answer(self.manager(), request)}
+            except ScriptAmbiguousError as e:
+                return {"ok": False, "error": str(e), "name": e.name, "candidates": e.candidates}
+            except Exception as e:
+                return {"ok": False, "error": str(e) or type(e).__name__}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = {"op": None}
+            if not isinstance(request, dict):
+                request = {"op": None}
+            reply = self.server.service.handle(request)
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+            if request.get("op") == "stop":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server of a ScriptService."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, service: ScriptService, lock=None):
+        self.service = service
+        self.socket_path = Path(socket_path)
+        # lock file held while serving, see create_server()
+        self.lock = lock
+        super().__init__(str(self.socket_path), _Handler)
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+        if self.lock is not None:
+            self.lock.close()
+
+
+def create_server(socket_path: Optional[Path] = None, config_path: Optional[Path] = None) -> Optional[DaemonServer]:
+    """
+        create the daemon server, call serve_forever() on it.
+    :param socket_path: socket to listen on, ~/.tutils/run/daemon.sock if None
+    :param config_path: config file, ~/.tutils/config.yaml if None
+    :return: DaemonServer, None if another daemon serves *socket_path*
+    """
+    import fcntl
+
+    socket_path = Path(socket_path or C.DAEMON_SOCKET)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    os.chmod(socket_path.parent, 0o700)
+    lock = open(socket_path.with_name(socket_path.name + ".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+
+    # left over by a daemon which did not exit cleanly
+    socket_path.unlink(missing_ok=True)
+    service = ScriptService(config_path)
+    # load config and catalog now, not on the first request
+    service.manager()
+    return DaemonServer(socket_path, service, lock)
+
+
+def serve(socket_path: Optional[Path] = None, config_path: Optional[Path] = None) -> bool:
+    """
+        run the daemon until stopped.
+    :return: False if another daemon is already running
+    """
+    server = create_server(socket_path, config_path)
+    if server is None:
+        return False
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    return True
+
+
+if __name__ == "__main__":
+    serve()
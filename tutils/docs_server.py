@@ -1,6 +1,9 @@
 """Documentation server for TUtils - serves Markdown docs as HTML."""
+import gzip
+import hashlib
 import http.server
-import socketserver
+import re
+import threading
 from pathlib import Path
 from urllib.parse import urlparse, unquote
 
@@ -13,6 +16,11 @@ except ImportError:
     def _render_markdown(text: str) -> str:
         return f"<pre style='white-space:pre-wrap'>{text}</pre>"
 
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+
 
 _HTML_TEMPLATE = """\
 <!DOCTYPE html>
@@ -90,17 +98,18 @@ def _get_docs_dir() -> Path | None:
     return None
 
 
-def _build_nav(docs_dir: Path, current_path: str) -> str:
-    """Generate navigation HTML from the docs directory layout."""
-    parts: list[str] = []
+def _label(stem: str) -> str:
+    return stem.replace("-", " ").replace("_", " ").title()
 
-    def _label(stem: str) -> str:
-        return stem.replace("-", " ").replace("_", " ").title()
 
-    def _active(href: str) -> str:
-        if current_path == href or current_path == href + "/" or current_path == href + ".md":
-            return ' class="active"'
-        return ""
+def _nav_entries(docs_dir: Path) -> list[tuple]:
+    """
+    Scan the docs directory layout once.
+
+    Returns ``("section", label)`` and ``("link", href, label, subdir, is_index)``
+    entries in navigation order, ``subdir`` is None for root-level files.
+    """
+    entries: list[tuple] = []
 
     # Root-level .md files — index first, then alphabetical
     root_files = sorted(
@@ -110,28 +119,196 @@ def _build_nav(docs_dir: Path, current_path: str) -> str:
     for f in root_files:
         href = "/" if f.stem == "index" else f"/{f.stem}"
         label = "Home" if f.stem == "index" else _label(f.stem)
-        parts.append(f'<a href="{href}"{_active(href)}>{label}</a>')
+        entries.append(("link", href, label, None, f.stem == "index"))
 
     # Sub-directories
     for subdir in sorted(d for d in docs_dir.iterdir() if d.is_dir() and not d.name.startswith(".")):
-        section_label = _label(subdir.name)
-        parts.append(f'<div class="section">{section_label}</div>')
+        entries.append(("section", _label(subdir.name)))
         sub_files = sorted(subdir.glob("*.md"), key=lambda f: (f.stem != "index", f.stem))
         for f in sub_files:
             href = f"/{subdir.name}/" if f.stem == "index" else f"/{subdir.name}/{f.stem}"
             label = "Overview" if f.stem == "index" else _label(f.stem)
-            active = ""
-            if current_path.startswith(f"/{subdir.name}"):
-                # Check more specifically
-                if current_path in (href, href + "/", href + ".md") or (
-                    f.stem == "index" and current_path == f"/{subdir.name}"
-                ):
-                    active = ' class="active"'
-            parts.append(f'<a href="{href}"{active}>{label}</a>')
+            entries.append(("link", href, label, subdir.name, f.stem == "index"))
+
+    return entries
+
+
+def _render_nav(entries: list[tuple], current_path: str) -> str:
+    """Generate navigation HTML from scanned entries, marking *current_path* active."""
+    parts: list[str] = []
+    for entry in entries:
+        if entry[0] == "section":
+            parts.append(f'<div class="section">{entry[1]}</div>')
+            continue
+        _, href, label, subdir, is_index = entry
+        active = ""
+        if subdir is None:
+            if current_path == href or current_path == href + "/" or current_path == href + ".md":
+                active = ' class="active"'
+        elif current_path.startswith(f"/{subdir}"):
+            # Check more specifically
+            if current_path in (href, href + "/", href + ".md") or (
+                is_index and current_path == f"/{subdir}"
+            ):
+                active = ' class="active"'
+        parts.append(f'<a href="{href}"{active}>{label}</a>')
 
     return "\n".join(parts)
 
 
+def _build_nav(docs_dir: Path, current_path: str) -> str:
+    """Generate navigation HTML from the docs directory layout."""
+    return _render_nav(_nav_entries(docs_dir), current_path)
+
+
+def _stamp(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def _render_page(md_text: str) -> tuple[str, str]:
+    """Render markdown, return ``(content_html, title_suffix)``."""
+    content_html = _render_markdown(md_text)
+
+    # Extract <title> from first H1
+    title_suffix = ""
+    for line in md_text.splitlines():
+        if line.startswith("# "):
+            title_suffix = " – " + line[2:].strip()
+            break
+    return content_html, title_suffix
+
+
+# 内存中最多缓存的页面数
+MAX_CACHED_PAGES = 256
+
+# 每种内容编码的 ETag 后缀，强校验器须随编码不同而不同
+_ETAG_SUFFIXES = {"identity": "", "gzip": "-gz", "br": "-br"}
+
+
+class _Page:
+    """Rendered page with its ETag and compressed bodies."""
+
+    def __init__(self, html: str, etag: str):
+        self.html = html
+        self.etag = etag
+        self.body = html.encode("utf-8")
+        self._encoded: dict[str, bytes] = {"identity": self.body}
+        self._lock = threading.Lock()
+
+    def etag_for(self, encoding: str) -> str:
+        """Return the ETag of the body compressed with *encoding*."""
+        return f'{self.etag[:-1]}{_ETAG_SUFFIXES[encoding]}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        """Return body compressed with *encoding* (identity, gzip or br), compress once."""
+        with self._lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = _brotli.compress(self.body)
+                else:
+                    data = gzip.compress(self.body, mtime=0)
+                self._encoded[encoding] = data
+            return data
+
+
+class DocsCache:
+    """
+    In-memory cache of rendered pages and navigation.
+
+    A page is rendered again only when the ``(mtime, size)`` of its markdown
+    file changed. The navigation is scanned again only when the docs directory
+    or one of its sub-directories changed (a file was added, removed or renamed).
+    """
+
+    def __init__(self, docs_dir: Path):
+        self.docs_dir = docs_dir
+        self._lock = threading.Lock()
+        # doc path -> (stamp, content_html, title_suffix)
+        self._pages: dict[Path, tuple] = {}
+        self._nav_signature: tuple | None = None
+        self._nav_entries: list[tuple] = []
+        # canonical page url -> (doc stamp, _Page), valid for the current nav signature
+        self._html: dict[str, tuple] = {}
+
+    def _tree_signature(self) -> tuple:
+        dirs = [self.docs_dir] + [
+            d for d in self.docs_dir.iterdir() if d.is_dir() and not d.name.startswith(".")
+        ]
+        return tuple((d.name, d.stat().st_mtime_ns) for d in dirs)
+
+    def _entries(self) -> list[tuple]:
+        signature = self._tree_signature()
+        if signature != self._nav_signature:
+            self._nav_entries = _nav_entries(self.docs_dir)
+            self._nav_signature = signature
+            self._html.clear()
+        return self._nav_entries
+
+    @staticmethod
+    def _remember(cache: dict, key, value) -> None:
+        """Store *value* in *cache*, dropping the oldest entries past MAX_CACHED_PAGES."""
+        cache.pop(key, None)
+        cache[key] = value
+        while len(cache) > MAX_CACHED_PAGES:
+            del cache[next(iter(cache))]
+
+    def get(self, url_path: str) -> _Page | None:
+        """Return rendered page of *url_path*, None if there is no such page."""
+        doc_path = _resolve_path(self.docs_dir, url_path)
+        if doc_path is None:
+            return None
+        # every URL of a page shares one cache entry, unknown URLs never get one
+        url = _page_url(self.docs_dir, doc_path)
+        if url is None:
+            return None
+        stamp = _stamp(doc_path)
+        with self._lock:
+            entries = self._entries()
+            signature = self._nav_signature
+            cached = self._html.get(url)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            source = self._pages.get(doc_path)
+
+        # render without the lock, other pages are served meanwhile
+        if source is None or source[0] != stamp:
+            source = (stamp, *_render_page(doc_path.read_text(encoding="utf-8")))
+        _, content_html, title_suffix = source
+        html = _HTML_TEMPLATE.format(
+            title_suffix=title_suffix,
+            nav_html=_render_nav(entries, url),
+            content_html=content_html,
+        )
+        # strong validator of the sources: the page file and the docs tree
+        etag = hashlib.sha1(repr((stamp, signature)).encode("utf-8")).hexdigest()[:20]
+        page = _Page(html, f'"{etag}"')
+
+        with self._lock:
+            self._remember(self._pages, doc_path, source)
+            if signature == self._nav_signature:
+                self._remember(self._html, url, (stamp, page))
+        return page
+
+    def render(self, url_path: str) -> str | None:
+        """Return full HTML page of *url_path*, None if there is no such page."""
+        page = self.get(url_path)
+        return None if page is None else page.html
+
+
+def _page_url(docs_dir: Path, doc_path: Path) -> str | None:
+    """Return the canonical URL of doc *doc_path*, as the navigation links it; None if outside *docs_dir*."""
+    try:
+        rel = doc_path.resolve().relative_to(docs_dir.resolve()).with_suffix("")
+    except ValueError:
+        return None
+    if rel.name == "index":
+        parent = rel.parent.as_posix()
+        return "/" if parent == "." else f"/{parent}/"
+    return f"/{rel.as_posix()}"
+
+
 def _resolve_path(docs_dir: Path, url_path: str) -> Path | None:
     """Map a URL path to a .md file on disk."""
     path = url_path.rstrip("/") or "/index"
@@ -153,56 +330,151 @@ def _resolve_path(docs_dir: Path, url_path: str) -> Path | None:
     return None
 
 
+def _accepted_encodings(header: str) -> set[str]:
+    """Parse Accept-Encoding, return codings with a non zero quality."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
 class _DocsHandler(http.server.BaseHTTPRequestHandler):
     docs_dir: Path  # set when handler class is created
+    cache: DocsCache
 
-    def do_GET(self) -> None:
-        url_path = unquote(urlparse(self.path).path)
-        doc_path = _resolve_path(self.docs_dir, url_path)
+    # keep-alive; idle connections are closed after timeout seconds
+    protocol_version = "HTTP/1.1"
+    timeout = 30
 
-        if doc_path is None:
-            self._respond(404, _NOT_FOUND)
-            return
+    def do_GET(self) -> None:
+        self._serve(head=False)
 
-        md_text = doc_path.read_text(encoding="utf-8")
-        content_html = _render_markdown(md_text)
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
 
-        # Extract <title> from first H1
-        title_suffix = ""
-        for line in md_text.splitlines():
-            if line.startswith("# "):
-                title_suffix = " – " + line[2:].strip()
-                break
+    def _serve(self, head: bool) -> None:
+        url_path = unquote(urlparse(self.path).path)
+        page = self.cache.get(url_path)
 
-        html = _HTML_TEMPLATE.format(
-            title_suffix=title_suffix,
-            nav_html=_build_nav(self.docs_dir, url_path),
-            content_html=content_html,
-        )
-        self._respond(200, html)
+        if page is None:
+            self._respond(404, _NOT_FOUND.encode("utf-8"), head=head)
+            return
 
-    def _respond(self, code: int, body: str) -> None:
-        data = body.encode("utf-8")
+        accepted = _accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        encoding = "identity"
+        if _brotli is not None and "br" in accepted:
+            encoding = "br"
+        elif "gzip" in accepted:
+            encoding = "gzip"
+
+        # each coding is a representation of its own, with its own strong ETag
+        etag = page.etag_for(encoding)
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = {i.strip() for i in if_none_match.split(",")}
+            if etag in tags or "*" in tags:
+                self._respond(304, b"", headers, head=True)
+                return
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        self._respond(200, page.encoded(encoding), headers, head=head)
+
+    def _respond(self, code: int, data: bytes, headers: dict | None = None, head: bool = False) -> None:
         self.send_response(code)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(data)))
+        if code != 304:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
         self.end_headers()
-        self.wfile.write(data)
+        if not head:
+            self.wfile.write(data)
 
     def log_message(self, format: str, *args) -> None:  # noqa: A002
         pass  # suppress request logs
 
 
-def create_server(port: int = 8765) -> socketserver.TCPServer:
+def create_server(port: int = 8765, docs_dir: Path | None = None) -> http.server.ThreadingHTTPServer:
     """Create (but do not start) the documentation HTTP server.
 
+    Each connection is served by its own thread, so a slow client does not
+    block others.
+
     Raises OSError if the port is already in use.
     """
-    docs_dir = _get_docs_dir()
+    docs_dir = docs_dir or _get_docs_dir()
+    if docs_dir is None:
+        raise FileNotFoundError("Documentation directory not found.")
+
+    handler = type("DocsHandler", (_DocsHandler,), {"docs_dir": docs_dir, "cache": DocsCache(docs_dir)})
+    return http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+_MD_LINK = re.compile(r'href="(?![a-z][a-z0-9+.-]*:|/|#)([^"#]*?)\.md(#[^"]*)?"')
+
+
+def _url_path(docs_dir: Path, doc_path: Path) -> str:
+    """URL path the server serves *doc_path* at."""
+    rel = doc_path.relative_to(docs_dir).with_suffix("").as_posix()
+    if rel == "index":
+        return "/"
+    if rel.endswith("/index"):
+        return "/" + rel[:-len("index")]
+    return "/" + rel
+
+
+def build_site(out_dir: Path, docs_dir: Path | None = None) -> int:
+    """Pre-render the whole docs tree to static HTML under *out_dir*.
+
+    Every page is written to ``<url path>/index.html``, so the output can be
+    served by any static file server with the same URLs as ``tutils doc``.
+    Relative links to ``.md`` files are rewritten to page URLs.
+
+    Returns the count of rendered pages.
+    """
+    docs_dir = docs_dir or _get_docs_dir()
     if docs_dir is None:
         raise FileNotFoundError("Documentation directory not found.")
+    out_dir = Path(out_dir)
+    entries = _nav_entries(docs_dir)
+
+    count = 0
+    for doc_path in sorted(docs_dir.rglob("*.md")):
+        rel_parts = doc_path.relative_to(docs_dir).parts
+        if any(part.startswith(".") for part in rel_parts):
+            continue
+        url_path = _url_path(docs_dir, doc_path)
+        content_html, title_suffix = _render_page(doc_path.read_text(encoding="utf-8"))
+        base = doc_path.parent
+
+        def _link(m: re.Match) -> str:
+            target = (base / (m.group(1) + ".md")).resolve()
+            try:
+                href = _url_path(docs_dir.resolve(), target)
+            except ValueError:
+                return m.group(0)
+            return f'href="{href}{m.group(2) or ""}"'
+
+        html = _HTML_TEMPLATE.format(
+            title_suffix=title_suffix,
+            nav_html=_render_nav(entries, url_path),
+            content_html=_MD_LINK.sub(_link, content_html),
+        )
+        dest = out_dir / url_path.strip("/") / "index.html"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_text(html, encoding="utf-8")
+        count += 1
 
-    handler = type("DocsHandler", (_DocsHandler,), {"docs_dir": docs_dir})
-    server = socketserver.TCPServer(("127.0.0.1", port), handler)
-    server.allow_reuse_address = True
-    return server
\ No newline at end of file
+    (out_dir / "404.html").write_text(_NOT_FOUND, encoding="utf-8")
+    return count
@@ -45,3 +45,10 @@ class ScriptError(TUtilsError):
 class ScriptNotFoundError(ScriptError):
     """Raised when a script cannot be found."""
 
+class ScriptAmbiguousError(ScriptError):
+    """Raised when a script name matches scripts of several repositories."""
+
+    def __init__(self, name: str, candidates: list):
+        self.name = name
+        self.candidates = list(candidates)
+        super().__init__(f"Script {name} is ambiguous: {', '.join(self.candidates)}")
@@ -0,0 +1,169 @@
+"""Keep-alive HTTP connection pool shared by downloads."""
+import http.client
+import threading
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from . import const as C
+
+_REDIRECT_STATUS = (301, 302, 303, 307, 308)
+
+# errors raised when a kept-alive connection was closed by the server meanwhile
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_DEFAULT_HEADERS = {
+    "User-Agent": f"TUtils/{C.version}",
+    "Connection": "keep-alive",
+}
+
+_Key = Tuple[str, str, int]
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP(S) connections, per host.
+
+    Usage::
+
+        pool = ConnectionPool()
+        with pool.open("https://example.com/index.yaml") as response:
+            data = response.read()
+    """
+
+    def __init__(self, maxsize: int = C.DEFAULT_UPDATE_JOBS, timeout: float = 30, max_redirects: int = 5):
+        """
+        :param maxsize:       Maximum idle connections kept per host.
+        :param timeout:       Socket timeout in seconds.
+        :param max_redirects: Maximum redirects followed per request.
+        """
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self._idle: Dict[_Key, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, key: _Key) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and not urllib.request.proxy_bypass(host):
+            parsed = urlparse(proxy)
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+                conn.set_tunnel(host, port)
+                return conn
+            return http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key: _Key) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection for *key* and whether it is reused."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(key), False
+
+    def _release(self, key: _Key, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        """Put *conn* back if *response* was fully read and server keeps it open."""
+        if response.isclosed() and not response.will_close:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.maxsize:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def _send(
+        self, method: str, url: str, headers: Dict[str, str]
+    ) -> Tuple[_Key, http.client.HTTPConnection, http.client.HTTPResponse]:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported url: {url}")
+        key = (parsed.scheme, parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80))
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+        if parsed.scheme == "http" and urllib.request.getproxies().get("http") \
+                and not urllib.request.proxy_bypass(parsed.hostname):
+            target = url
+
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request(method, target, headers={**_DEFAULT_HEADERS, **headers})
+                return key, conn, conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+            except Exception:
+                conn.close()
+                raise
+
+    @contextmanager
+    def open(
+        self, url: str, headers: Optional[Dict[str, str]] = None, method: str = "GET"
+    ) -> Iterator[http.client.HTTPResponse]:
+        """
+        Send a request and yield the response, following redirects.
+
+        The connection goes back to the pool on exit if the body was read.
+
+        :raises urllib.error.HTTPError: If the server returns an error status.
+        """
+        headers = headers or {}
+        for _ in range(self.max_redirects + 1):
+            key, conn, response = self._send(method, url, headers)
+            location = response.getheader("Location")
+            if response.status in _REDIRECT_STATUS and location:
+                response.read()
+                self._release(key, conn, response)
+                url = urljoin(url, location)
+                continue
+            break
+        else:
+            raise urllib.error.HTTPError(url, 310, "Too many redirects", response.headers, None)
+
+        if response.status >= 400:
+            conn.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+
+        try:
+            response.url = url
+            yield response
+        finally:
+            self._release(key, conn, response)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+# 全局连接池实例
+_pool: Optional[ConnectionPool] = None
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Get or create global connection pool.
+
+    Returns:
+        ConnectionPool instance
+    """
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool()
+    return _pool
@@ -0,0 +1,107 @@
+"""
+    Import time profiler for CLI startup.
+
+ Enabled by ``--import-profile`` or the ``TUTILS_IMPORT_PROFILE`` env var,
+ it wraps ``builtins.__import__`` from ``tutils/__init__.py`` on, and reports
+ the slowest first-time imports when the process exits.
+
+ ``TUTILS_IMPORT_PROFILE=1`` prints a text report to stderr, any other value
+ is used as a path to write a JSON report to, for CI budget checks.
+"""
+import atexit
+import builtins
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+ENV_NAME = "TUTILS_IMPORT_PROFILE"
+FLAG = "--import-profile"
+
+# (module, cumulative seconds, self seconds, depth)
+_records: List[Tuple[str, float, float, int]] = []
+_stack: List[float] = []
+_start: Optional[float] = None
+_original_import = None
+
+
+def _resolve(name: str, globals_: Optional[dict], level: int) -> str:
+    """Return the absolute module name of a (maybe relative) import."""
+    if not level:
+        return name
+    package = (globals_ or {}).get("__package__") or ""
+    base = package.rsplit(".", level - 1)[0] if level > 1 else package
+    return f"{base}.{name}" if name else base
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    absolute = _resolve(name, globals, level)
+    if absolute in sys.modules and not fromlist:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    is_new = absolute not in sys.modules
+    before = len(sys.modules)
+    depth = len(_stack)
+    _stack.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - t0
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        if len(sys.modules) > before:
+            label = absolute if is_new else f"{absolute}.{{{','.join(fromlist)}}}"
+            _records.append((label, elapsed, elapsed - children, depth))
+
+
+def is_requested() -> bool:
+    """Check if import profiling was requested by flag or env var."""
+    return FLAG in sys.argv or bool(os.environ.get(ENV_NAME))
+
+
+def install() -> None:
+    """Start recording imports and register the report at exit."""
+    global _original_import, _start
+    if _original_import is not None:
+        return
+    _start = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+    atexit.register(report)
+
+
+def summary() -> dict:
+    """Return the recorded imports as a dict, slowest first."""
+    total = sum(i[1] for i in _records if i[3] == 0)
+    return {
+        "elapsed_ms": round((time.perf_counter() - (_start or time.perf_counter())) * 1000, 3),
+        "import_ms": round(total * 1000, 3),
+        "count": len(_records),
+        "imports": [
+            {"module": m, "cumulative_ms": round(c * 1000, 3), "self_ms": round(s * 1000, 3), "depth": d}
+            for m, c, s, d in sorted(_records, key=lambda x: x[1], reverse=True)
+        ],
+    }
+
+
+def report(limit: int = 20) -> None:
+    """Print text report to stderr, or write JSON report if env var is a path."""
+    data = summary()
+    target = os.environ.get(ENV_NAME, "")
+    if target and target.lower() not in ("1", "true", "yes", "on"):
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return
+
+    lines = [
+        f"Import profile: {data['import_ms']:.1f} ms in {data['count']} imports, "
+        f"{data['elapsed_ms']:.1f} ms since tutils import",
+        f"{'cumulative':>12} {'self':>10}  module",
+    ]
+    for item in data["imports"][:limit]:
+        indent = "  " * item["depth"]
+        lines.append(f"{item['cumulative_ms']:>9.1f} ms {item['self_ms']:>7.1f} ms  {indent}{item['module']}")
+    print("\n".join(lines), file=sys.stderr)
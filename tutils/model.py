@@ -1,12 +1,10 @@
 """Configuration data models using Pydantic."""
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List
 from .repository.repositoryindexfile import RepositoryIndexFile
 from .repository.scriptindexfile import ScriptIndexFile
 from pydantic import BaseModel, Field
-from . import utils
-from . import exceptions
-from rich.console import Console
+from . import const as C
 
 
 class AppConfig(BaseModel):
@@ -56,12 +54,48 @@ class ScriptModel(BaseModel):
     run:str = Field(default="",description="EnterPoint of the script")
     src:List[str] = Field(default_factory=list,description="Source code of the script")
     license:str = Field(default="",description="License of the script")
+    param:List[Dict[str, str]] = Field(default_factory=list,description="Parameters of the script")
+    aliases:List[str] = Field(default_factory=list,description="Other names to run the script by")
     folder_path:str = Field(default="",description="Path to the script")
 
     def read_by_index_file(self) -> None:
         """As Option, just try load if used"""
         pass
 
+
+class ScriptHandle:
+    """
+    Name-only reference to a script, full metadata is loaded on first access.
+
+    Usage::
+
+        handle = ScriptHandle("File", "tcount", "path/to/folder", loader)
+        handle.name          # no loading
+        handle.description   # loads ScriptModel once
+    """
+    __slots__ = ("repository", "name", "folder_path", "_loader", "_model")
+
+    def __init__(self, repository: str, name: str, folder_path: str, loader: Callable[[], ScriptModel]):
+        self.repository = repository
+        self.name = name
+        self.folder_path = folder_path
+        self._loader = loader
+        self._model: Optional[ScriptModel] = None
+
+    def load(self) -> ScriptModel:
+        """Return full ScriptModel, load it on first call."""
+        if self._model is None:
+            self._model = self._loader()
+        return self._model
+
+    def __getattr__(self, item: str):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.load(), item)
+
+    def __repr__(self) -> str:
+        return f"ScriptHandle({self.repository}.{self.name})"
+
 class RepositoryModel(BaseModel):
     """Repository model."""
     def __init__(self,config:Optional[dict] = None,**kwargs) -> None:
@@ -72,6 +106,7 @@ class RepositoryModel(BaseModel):
     path:str = Field(default="",description="Path to the repository")
     type: str = Field(default="local",description="Type of the repository")
     link:str = Field(default="",description="Link to the repository")
+    archive:str = Field(default="",description="Link to a tar or zip archive of the repository, synced instead of single files")
     scripts:List[str] = Field(default_factory=list,description="Script files in the repository")
     index_file_path:str = Field(default="",description="Path to the index file")
 
@@ -81,27 +116,39 @@ class RepositoryModel(BaseModel):
             self.name = repository_index.name
             self.scripts = repository_index.scripts
 
+    def read_script(self, script: str) -> Optional[ScriptModel]:
+        """
+            read one script by parsing only its index file.
+        :param script: script folder in the repository
+        :return: ScriptModel instance or None if it has no index file
+        """
+        dirpath = Path(self.path)
+        script_path = dirpath / script / "index.yaml"
+        if not script_path.exists():
+            return None
+        script_model = ScriptIndexFile(script_path).get_instance()
+        return ScriptModel(
+            repository=self.name,
+            name=script_model.name,
+            version=script_model.version,
+            description=script_model.description,
+            author=script_model.author,
+            email=script_model.email,
+            run=script_model.run,
+            src=script_model.src,
+            license=script_model.license,
+            param=script_model.param,
+            aliases=script_model.aliases,
+            folder_path=str(dirpath / script)
+        )
+
     def read_script_list(self) -> List[ScriptModel]:
         """As Option, just try load if used"""
         scriptlist:list[ScriptModel] = []
-        dirpath = Path(self.path)
-        for idx,script in enumerate(self.scripts):
-            script_path = dirpath / script / "index.yaml"
-            if not script_path.exists():
-                continue
-            script_model = ScriptIndexFile(script_path).get_instance()
-            scriptlist.append(ScriptModel(
-                repository=self.name,
-                name=script_model.name,
-                version=script_model.version,
-                description=script_model.description,
-                author=script_model.author,
-                email=script_model.email,
-                run=script_model.run,
-                src=script_model.src,
-                license=script_model.license,
-                folder_path=str(dirpath / script)
-            ))
+        for script in self.scripts:
+            script_model = self.read_script(script)
+            if script_model is not None:
+                scriptlist.append(script_model)
         return scriptlist
 
     def set_by_config(self,config:dict):
@@ -109,6 +156,7 @@ class RepositoryModel(BaseModel):
         self.path = config["path"]
         self.type = config["type"]
         self.link = config["link"]
+        self.archive = config.get("archive", "")
         self.index_file_path = (str)(Path(self.path) / "index.yaml")
         self.set_by_index_file()
 
@@ -116,59 +164,16 @@ class RepositoryModel(BaseModel):
         return f'name:{self.name} path:{self.path} type:{self.type} link:{self.link}'
 
     def to_config(self):
-        return {
+        config = {
             "path": self.path,
             "type": self.type,
             "link": self.link
         }
-
-    def update_to_local(self):
-
-        console = Console()
-
-        try:
-            console.log(f'Update {self.name}')
-            if self.type == "local":
-                return
-            if self.link is None:
-                return
-
-            path = Path(self.path)
-
-            if not path.exists():
-                raise exceptions.RepositoryLocalPathNotExistError(f"Path does not exist: {self.path}")
-
-            if not utils.is_url(self.link):
-                raise exceptions.RepositoryInvalidLinkError(f"Invalid url: {self.link}")
-
-            if not utils.is_url_status_ok(self.link):
-                raise exceptions.RepositoryConnnectFailedError(f"Connect Failed: {self.link}")
-
-            # download repository index file
-            repo_index_file_path = path / "index.yaml"
-            utils.download_file(self.link, repo_index_file_path)
-            self.set_by_index_file()
-
-            repo_remote_dir_path = utils.url_dirname(self.link)
-
-            # download script
-            for idx,script in enumerate(self.scripts):
-                script_local_dir_path = path / script
-                script_local_index_file_path = script_local_dir_path / "index.yaml"
-                script_remote_dir_path = utils.url_join(repo_remote_dir_path, script)
-                script_remote_index_file_path = utils.url_join(script_remote_dir_path, "index.yaml")
-
-                utils.download_file(script_remote_index_file_path, script_local_index_file_path)
-
-                script_model = ScriptIndexFile(script_local_index_file_path).get_instance()
-                files = script_model.src
-                for file in files:
-                    file_remote_path = utils.url_join(script_remote_dir_path, file)
-                    file_local_path = script_local_dir_path / file
-
-                    utils.download_file(file_remote_path, file_local_path)
-
-            console.log(f"[green]Repository {self.name} is updated![/green]")
-        except Exception as e:
-            console.log(f'{e}')
-            console.print('[red]Update Failed[/red]')
\ No newline at end of file
+        if self.archive:
+            config["archive"] = self.archive
+        return config
+
+    def update_to_local(self, jobs: int = C.DEFAULT_UPDATE_JOBS) -> None:
+        """Download remote repository to local, see RepositoryUpdater."""
+        from .repository.updater import RepositoryUpdater
+        RepositoryUpdater(jobs).update([self])
@@ -0,0 +1,79 @@
+"""
+    Name index resolving script names to scripts with dict lookups.
+
+ A script can be named by its fully qualified ``repo.script`` name, by
+ ``repo.alias`` for each of its aliases, and by its short name or an alias
+ alone. Short names and aliases used by more than one script are recorded as
+ ambiguous when the index is built, instead of being checked on every lookup.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .exceptions import ScriptAmbiguousError
+
+
+class NameIndex:
+    """
+    Map script names to ``(repository path, script folder, entry point)``.
+
+    Usage::
+
+        index = NameIndex([{"repository": "File", "name": "tcount", "aliases": ["count"],
+                            "repository_path": "/path/File", "folder": "Z2V0", "run": "getfilecount.py"}])
+        index.resolve("count")
+        # "File.tcount"
+        index.targets["File.tcount"]
+        # ("/path/File", "Z2V0", "getfilecount.py")
+    """
+
+    def __init__(self, scripts: Iterable[Dict]):
+        """
+        :param scripts: dicts with keys repository, name, aliases, repository_path, folder and run,
+                        in repository order; the first script of a repository wins a name.
+        """
+        self.targets: Dict[str, Tuple[str, str, str]] = {}
+        # fully qualified names and repo.alias
+        self.qualified: Dict[str, str] = {}
+        # short names and aliases used by exactly one script
+        self.short: Dict[str, str] = {}
+        # short names and aliases used by several scripts
+        self.ambiguous: Dict[str, List[str]] = {}
+
+        owners: Dict[str, List[str]] = {}
+        for script in scripts:
+            fq = f'{script["repository"]}.{script["name"]}'
+            if fq in self.targets:
+                continue
+            self.targets[fq] = (script["repository_path"], script["folder"], script["run"])
+            self.qualified[fq] = fq
+            for name in [script["name"], *script.get("aliases", ())]:
+                if name != script["name"]:
+                    self.qualified.setdefault(f'{script["repository"]}.{name}', fq)
+                fqs = owners.setdefault(name, [])
+                if fq not in fqs:
+                    fqs.append(fq)
+
+        for name, fqs in owners.items():
+            if len(fqs) == 1:
+                self.short[name] = fqs[0]
+            else:
+                self.ambiguous[name] = fqs
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+            resolve *name* to a fully qualified script name.
+        :param name: repo.script, repo.alias, script or alias
+        :return: fully qualified name, None if unknown
+        :raise ScriptAmbiguousError: short name or alias used by several scripts
+        """
+        fq = self.qualified.get(name)
+        if fq is not None:
+            return fq
+        fq = self.short.get(name)
+        if fq is not None:
+            return fq
+        if name in self.ambiguous:
+            raise ScriptAmbiguousError(name, self.ambiguous[name])
+        return None
@@ -0,0 +1,143 @@
+"""Extract repository archives (tar, tar.gz/bz2/xz, zip) member by member."""
+from __future__ import annotations
+
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Callable, Optional
+from urllib.parse import urlparse
+
+from ..exceptions import RepositoryError
+
+# 解压时每次读写的字节数
+CHUNK_SIZE = 1 << 20
+
+_ZIP_TYPES = ("application/zip", "application/x-zip-compressed")
+
+
+def archive_format(url: str, content_type: str = "") -> str:
+    """
+        guess the archive format of *url*.
+    :param url: archive URL
+    :param content_type: Content-Type of the response
+    :return: "zip", or "tar" for tar archives of any compression
+    """
+    if urlparse(url).path.lower().endswith(".zip") or content_type.split(";")[0].strip() in _ZIP_TYPES:
+        return "zip"
+    return "tar"
+
+
+def _member_path(name: str, prefix: str) -> Optional[str]:
+    """
+        return the path of archive member *name* inside folder *prefix*, None if outside.
+
+    A single folder wrapping the whole archive, like ``repo-main/`` of GitHub
+    archives, may precede *prefix*.
+    """
+    parts = [i for i in PurePosixPath(name.replace("\\", "/")).parts if i not in ("", ".")]
+    if not prefix:
+        return "/".join(parts)
+    prefix_parts = [i for i in prefix.split("/") if i]
+    for skip in (0, 1):
+        if parts[skip:skip + len(prefix_parts)] == prefix_parts:
+            return "/".join(parts[skip + len(prefix_parts):])
+    return None
+
+
+def _target(dest: Path, relative: str) -> Path:
+    """Join *relative* to *dest*, refuse paths escaping *dest*."""
+    path = (dest / relative).resolve()
+    if path != dest and dest not in path.parents:
+        raise RepositoryError(f"Invalid path in archive: {relative}")
+    return path
+
+
+def _write(src: IO[bytes], target: Path, executable: bool) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as f:
+        shutil.copyfileobj(src, f, CHUNK_SIZE)
+    if executable:
+        os.chmod(target, 0o755)
+
+
+def extract_tar(fileobj: IO[bytes], dest: Path, prefix: str = "",
+                on_file: Optional[Callable[[], None]] = None) -> int:
+    """
+        extract a tar stream into *dest* while reading it, without seeking.
+
+    Only regular files and directories are extracted, links and devices are skipped.
+    :param fileobj: stream, like an HTTP response; compression is detected
+    :param dest: directory to extract to
+    :param prefix: folder inside the archive to extract, all if empty
+    :param on_file: called after each extracted file
+    :return: count of extracted files
+    :raises RepositoryError: If the archive is invalid.
+    """
+    dest = dest.resolve()
+    count = 0
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                relative = _member_path(member.name, prefix)
+                if not relative:
+                    continue
+                target = _target(dest, relative)
+                if member.isdir():
+                    target.mkdir(parents=True, exist_ok=True)
+                elif member.isfile():
+                    _write(tar.extractfile(member), target, bool(member.mode & 0o111))
+                    count += 1
+                    if on_file is not None:
+                        on_file()
+    except (tarfile.TarError, EOFError) as e:
+        raise RepositoryError(f"Invalid tar archive: {e}") from e
+    return count
+
+
+def extract_zip(fileobj: IO[bytes], dest: Path, prefix: str = "",
+                on_file: Optional[Callable[[], None]] = None) -> int:
+    """
+        extract a zip stream into *dest*, see :func:`extract_tar`.
+
+    A zip file lists its members at its end, so the stream is spooled to a
+    temporary file next to *dest* first; members are then copied one by one.
+    """
+    dest = dest.resolve()
+    count = 0
+    with tempfile.TemporaryFile(dir=dest.parent, prefix=".archive-") as spool:
+        shutil.copyfileobj(fileobj, spool, CHUNK_SIZE)
+        spool.seek(0)
+        try:
+            with zipfile.ZipFile(spool) as archive:
+                for info in archive.infolist():
+                    relative = _member_path(info.filename, prefix)
+                    if not relative:
+                        continue
+                    target = _target(dest, relative)
+                    if info.is_dir():
+                        target.mkdir(parents=True, exist_ok=True)
+                        continue
+                    with archive.open(info) as src:
+                        _write(src, target, bool((info.external_attr >> 16) & 0o111))
+                    count += 1
+                    if on_file is not None:
+                        on_file()
+        except zipfile.BadZipFile as e:
+            raise RepositoryError(f"Invalid zip archive: {e}") from e
+    return count
+
+
+def unwrap(dest: Path) -> None:
+    """Move the contents of a single folder holding the repository index file up into *dest*."""
+    if (dest / "index.yaml").exists():
+        return
+    children = list(dest.iterdir())
+    if len(children) != 1 or not (children[0] / "index.yaml").is_file():
+        return
+    inner = children[0].rename(dest / f".{children[0].name}.unwrap")
+    for child in inner.iterdir():
+        child.rename(dest / child.name)
+    inner.rmdir()
@@ -0,0 +1,136 @@
+"""Content-addressed store of script files, shared by all repositories."""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import stat
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .. import const as C
+
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def is_digest(digest: object) -> bool:
+    """Check if *digest* is a sha256 hex digest, the only names objects may have."""
+    return isinstance(digest, str) and _DIGEST.fullmatch(digest) is not None
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return sha256 hex digest of file *path*."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """
+    Store files by sha256 under ``~/.tutils/store/objects/ab/cdef...``.
+
+    Script folders hardlink into the store, so identical files of different
+    repositories are stored once. Hardlinks fall back to copies if the store
+    and the repository are on different file systems.
+
+    Usage::
+
+        store = BlobStore()
+        digest = store.add(Path("repo/script/helper.py"))
+        store.link(digest, Path("other/script/helper.py"))
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        :param root: store directory, ~/.tutils/store if None.
+        """
+        self.root = Path(root) if root is not None else C.STORE_DIR
+
+    def path(self, digest: str) -> Path:
+        """
+        Return path of object *digest*.
+
+        :raises ValueError: If *digest* is not a sha256 hex digest, like one from an untrusted manifest.
+        """
+        if not is_digest(digest):
+            raise ValueError(f"Invalid object digest: {digest!r}")
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def has(self, digest: str) -> bool:
+        """Check if object *digest* is in the store, False for anything but a sha256 hex digest."""
+        return is_digest(digest) and self.path(digest).is_file()
+
+    def add(self, path: Path, digest: Optional[str] = None) -> str:
+        """
+        Move file *path* into the store and link it back, deduplicating it.
+
+        :param path: file to add.
+        :param digest: sha256 of the file if already known, like hashed while downloading.
+        :return: sha256 digest of the file.
+        """
+        digest = digest or hash_file(path)
+        obj = self.path(digest)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, obj)
+                self._protect(obj)
+                return digest
+            except FileExistsError:
+                # added by another download meanwhile
+                pass
+            except OSError:
+                # other file system, keep a copy in the store, *path* stays a plain file
+                tmp = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                shutil.copyfile(path, tmp)
+                os.replace(tmp, obj)
+                self._protect(obj)
+                return digest
+
+        if not os.path.samefile(path, obj):
+            path.unlink()
+            self.link(digest, path)
+        return digest
+
+    def link(self, digest: str, dest: Path) -> None:
+        """Hardlink object *digest* to *dest*, copy it if hardlinks fail."""
+        obj = self.path(digest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(obj, dest)
+        except OSError:
+            shutil.copyfile(obj, dest)
+
+    def gc(self) -> int:
+        """
+        Remove objects no script folder links to anymore.
+
+        :return: count of removed objects.
+        """
+        removed = 0
+        objects = self.root / "objects"
+        if not objects.is_dir():
+            return removed
+        for obj in objects.glob("*/*"):
+            try:
+                if obj.stat().st_nlink <= 1:
+                    obj.chmod(stat.S_IWUSR | stat.S_IRUSR)
+                    obj.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    @staticmethod
+    def _protect(obj: Path) -> None:
+        """Make object read only, editing a linked script file must not change other copies."""
+        if os.name != "nt":
+            obj.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
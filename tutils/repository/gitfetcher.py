@@ -1,94 +1,417 @@
-"""Fetch specific paths from a remote git repository using sparse-checkout."""
+"""Fetch specific paths from remote git repositories using sparse-checkout."""
 from __future__ import annotations
 
+import hashlib
+import re
 import subprocess
 import shutil
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Set
+from urllib.parse import urlparse
 
+from .. import const as C
 from ..exceptions import (
     RepositoryInvalidLinkError,
     RepositoryConnnectFailedError,
 )
-from .. import utils
 
+if TYPE_CHECKING:
+    from ..model import RepositoryModel
 
-def _run(cmd: List[str], cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+_GIT_SCHEMES = ("http", "https", "ssh", "git", "file")
+# git@github.com:owner/repo.git
+_SCP_LIKE = re.compile(r"^[\w.-]+@[\w.-]+:")
+_RAW_GITHUB = "raw.githubusercontent.com"
+
+
+def _run(cmd: List[str], cwd: Optional[Path] = None, input: Optional[str] = None) -> subprocess.CompletedProcess:
     return subprocess.run(
         cmd,
         cwd=cwd,
+        input=input,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
     )
 
 
+def is_git_url(url: str) -> bool:
+    """Check if a string is a git remote URL (http/https/ssh/git/file or scp-like user@host:path)."""
+    url = url.strip()
+    if _SCP_LIKE.match(url):
+        return True
+    try:
+        result = urlparse(url)
+    except ValueError:
+        return False
+    return result.scheme in _GIT_SCHEMES and bool(result.netloc or result.scheme == "file")
+
+
+class GitSource(NamedTuple):
+    """Folder *path* of *ref* in the git repository *remote*."""
+    remote: str
+    ref: str
+    path: str
+
+
+def parse_git_link(link: str) -> GitSource:
+    """
+        parse the link of a git repository, ``<remote>#<ref>:<path>``.
+
+    ``https://github.com/owner/repo.git#main:File`` is folder File of branch
+    main. Without ``<ref>:`` the remote HEAD is used, without a fragment the
+    repository root: ``https://github.com/owner/repo.git#File``.
+    :param link: repository link
+    :return: GitSource
+    :raises RepositoryInvalidLinkError: If the remote is not a git URL.
+    """
+    remote, _, fragment = link.strip().partition("#")
+    ref, sep, path = fragment.partition(":")
+    if not sep:
+        ref, path = "", fragment
+    if not is_git_url(remote):
+        raise RepositoryInvalidLinkError(f"Invalid git repository URL: {remote}")
+    return GitSource(remote, ref or "HEAD", path.strip("/"))
+
+
+def github_raw_source(link: str) -> Optional[GitSource]:
+    """
+        map a raw.githubusercontent.com link of a repository index file to its git source.
+    :param link: like https://raw.githubusercontent.com/owner/repo/main/File/index.yaml
+    :return: GitSource, None if the link is not a raw GitHub index file link
+    """
+    parsed = urlparse(link.strip())
+    if parsed.netloc != _RAW_GITHUB:
+        return None
+    parts = [i for i in parsed.path.split("/") if i]
+    if parts[2:4] == ["refs", "heads"]:
+        parts = parts[:2] + parts[4:]
+    if len(parts) < 4 or parts[-1] != "index.yaml":
+        return None
+    owner, repo, ref = parts[:3]
+    return GitSource(f"https://github.com/{owner}/{repo}.git", ref, "/".join(parts[3:-1]))
+
+
+def git_source(repo: RepositoryModel, github: bool = False) -> Optional[GitSource]:
+    """
+        return where *repo* is synced from by git.
+    :param repo: repository
+    :param github: also map remote repositories with raw GitHub links
+    :return: GitSource, None if the repository is not synced by git
+    """
+    if repo.type == "git":
+        return parse_git_link(repo.link)
+    if github and repo.type == "remote":
+        return github_raw_source(repo.link)
+    return None
+
+
+class GitCache:
+    """
+    Bare git repository holding the objects of every fetched remote.
+
+    Each remote is a blob-less promisor remote named after a hash of its URL.
+    Its refs are fetched to ``refs/tutils/<remote>/<ref>`` and checked out into
+    sparse worktrees of the cache, so an object is downloaded and stored once
+    however many remotes, worktrees and repositories use it.
+
+    Layout::
+
+        ~/.tutils/cache/git/objects.git          shared bare repository
+        ~/.tutils/cache/git/worktrees/<key>/     sparse worktree of one remote ref
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        :param root: cache directory, ~/.tutils/cache/git if None.
+        """
+        self.root = Path(root) if root is not None else C.GIT_CACHE_DIR
+        self.git_dir = self.root / "objects.git"
+        # one git command at a time: fetches of the shallow cache share shallow.lock
+        self._lock = threading.RLock()
+
+    def git(self, *args: str, cwd: Optional[Path] = None, input: Optional[str] = None) -> str:
+        """
+            run git on the cache, in worktree *cwd* if given, return stdout.
+        :raises RepositoryConnnectFailedError: If git fails.
+        """
+        cmd = ["git"] + ([] if cwd is not None else [f"--git-dir={self.git_dir}"]) + list(args)
+        try:
+            result = _run(cmd, cwd=cwd, input=input)
+        except FileNotFoundError as e:
+            raise RepositoryConnnectFailedError("git is not installed") from e
+        if result.returncode != 0:
+            raise RepositoryConnnectFailedError(f"git {args[0]} failed:\n{result.stderr.strip()}")
+        return result.stdout
+
+    def init(self) -> None:
+        """Create the bare repository if missing."""
+        with self._lock:
+            if (self.git_dir / "HEAD").exists():
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            self.git("init", "--quiet", "--bare", str(self.git_dir))
+            # partial clone needs repository format 1
+            self.git("config", "core.repositoryformatversion", "1")
+
+    @staticmethod
+    def remote_name(url: str) -> str:
+        return "r" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+    def worktree_path(self, url: str, ref: str) -> Path:
+        """Return the worktree of *ref* of remote *url*."""
+        ref_key = re.sub(r"[^\w.-]", "_", ref)
+        return self.root / "worktrees" / f"{self.remote_name(url)}-{ref_key}"
+
+    def add_remote(self, url: str) -> str:
+        """Register *url* as a blob-less promisor remote, return its name."""
+        name = self.remote_name(url)
+        with self._lock:
+            self.init()
+            if self.git("config", "--default", "", "--get", f"remote.{name}.url").strip() == url:
+                return name
+            self.git("config", f"remote.{name}.url", url)
+            self.git("config", f"remote.{name}.promisor", "true")
+            self.git("config", f"remote.{name}.partialclonefilter", "blob:none")
+            if not self.git("config", "--default", "", "--get", "extensions.partialClone").strip():
+                self.git("config", "extensions.partialClone", name)
+        return name
+
+    def fetch(self, url: str, ref: str = "HEAD") -> str:
+        """
+            fetch the tip commit of *ref* of *url* without blobs.
+        :return: commit id
+        """
+        name = self.add_remote(url)
+        local_ref = f"refs/tutils/{name}/{ref}"
+        with self._lock:
+            self.git("fetch", "--quiet", "--no-tags", "--filter=blob:none", "--depth=1", name, f"+{ref}:{local_ref}")
+            return self.git("rev-parse", f"{local_ref}^{{commit}}").strip()
+
+    def is_worktree(self, dest: Path) -> bool:
+        """Check if *dest* is a worktree of the cache, as listed by ``git worktree list``."""
+        if not (self.git_dir / "HEAD").exists():
+            return False
+        dest = dest.resolve()
+        with self._lock:
+            listing = self.git("worktree", "list", "--porcelain")
+        return any(
+            line.startswith("worktree ") and Path(line[len("worktree "):]).resolve() == dest
+            for line in listing.splitlines()
+        )
+
+    def remove_worktree(self, dest: Path) -> None:
+        """Remove worktree *dest* of the cache, leave any other folder alone."""
+        with self._lock:
+            if not self.is_worktree(dest):
+                return
+            shutil.rmtree(dest, ignore_errors=True)
+            self.git("worktree", "prune")
+
+    def checkout(self, url: str, commit: str, paths: List[str], dest: Path) -> Path:
+        """
+            check out *paths* of *commit* into a new sparse worktree *dest*.
+
+        The blobs under *paths* missing from the cache are fetched from *url*
+        in one request before the checkout.
+        """
+        name = self.add_remote(url)
+        with self._lock:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            # forget worktrees deleted by hand
+            self.git("worktree", "prune")
+            self.git("worktree", "add", "--quiet", "--no-checkout", "--detach", str(dest), commit)
+            paths = [i for i in paths if i]
+            if paths:
+                self.git("sparse-checkout", "set", "--cone", "--", *paths, cwd=dest)
+            self._prefetch(name, commit, paths, dest)
+            self.git("checkout", "--quiet", "--force", "--detach", commit, cwd=dest)
+        return dest
+
+    def head(self, dest: Path) -> Optional[str]:
+        """Return the commit worktree *dest* is at, None if *dest* is not a worktree."""
+        if not (dest / ".git").is_file():
+            return None
+        try:
+            return self.git("rev-parse", "HEAD", cwd=dest).strip()
+        except RepositoryConnnectFailedError:
+            return None
+
+    def sparse_paths(self, dest: Path) -> Optional[List[str]]:
+        """Return the sparse-checkout folders of worktree *dest*, None if it checks out everything."""
+        if self.git("config", "--default", "false", "--bool", "core.sparseCheckout", cwd=dest).strip() != "true":
+            return None
+        return sorted(self.git("sparse-checkout", "list", cwd=dest).splitlines())
+
+    def advance(self, url: str, old: str, commit: str, paths: List[str], dest: Path) -> List[str]:
+        """
+            move worktree *dest* from commit *old* to *commit*, rewriting only the files that differ.
+        :return: changed files under *paths*, relative to the git repository root
+        """
+        if old == commit:
+            return []
+        name = self.add_remote(url)
+        with self._lock:
+            paths = [i for i in paths if i]
+            self._prefetch(name, commit, paths, dest)
+            self.git("checkout", "--quiet", "--force", "--detach", commit, cwd=dest)
+            return self.changed_files(old, commit, paths)
+
+    def changed_files(self, old: str, new: str, paths: List[str], deleted: bool = False) -> List[str]:
+        """Return files under *paths* which differ between commits *old* and *new*, only deleted ones if *deleted*."""
+        options = ["--diff-filter=D"] if deleted else []
+        output = self.git("diff", "--name-only", "--no-renames", "-z", *options, old, new, "--", *[i for i in paths if i])
+        return [i for i in output.split("\0") if i]
+
+    def ref_commit(self, ref: str) -> str:
+        """Return the commit *ref* of the cache points to, empty if it does not exist."""
+        if not self.git_dir.exists():
+            return ""
+        return self.git("for-each-ref", "--format=%(objectname)", ref).strip()
+
+    def set_ref(self, ref: str, commit: str) -> None:
+        """Point *ref* to *commit*, which also keeps its objects in the cache."""
+        with self._lock:
+            self.git("update-ref", ref, commit)
+
+    def _prefetch(self, name: str, commit: str, paths: List[str], cwd: Path) -> None:
+        """Fetch blobs missing under *paths* (and the root files cone mode checks out) in one request."""
+        # ':(glob)*' matches files at the root only
+        pathspec = [*paths, ":(glob)*"] if paths else []
+        listing = self.git("rev-list", "--objects", "--missing=print", commit, "--", *pathspec, cwd=cwd)
+        wanted = {i[1:] for i in listing.splitlines() if i.startswith("?")}
+        if wanted:
+            self.git(
+                "-c", "fetch.negotiationAlgorithm=noop",
+                "fetch", "--quiet", "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+                "--filter=blob:none", name, "--stdin",
+                cwd=cwd, input="\n".join(sorted(wanted)) + "\n",
+            )
+
+
+class GitUpdate(NamedTuple):
+    """Result of :meth:`GitFetcher.update`."""
+    path: Path
+    old: Optional[str]
+    new: str
+    # files changed under the fetched paths, None if the worktree was checked out anew
+    changed: Optional[List[str]]
+
+    def folders(self, prefix: str) -> Optional[Set[str]]:
+        """
+            return the folders right below *prefix* with changed files, "" for files in *prefix* itself.
+        :param prefix: repository-relative folder, like the folder of a script repository
+        :return: folder names, None if everything changed
+        """
+        return folders_below(self.changed, prefix) if self.changed is not None else None
+
+
+def folders_below(files: List[str], prefix: str) -> Set[str]:
+    """Return the folders right below *prefix* containing *files*, "" for files in *prefix* itself."""
+    prefix = f"{prefix.strip('/')}/" if prefix.strip("/") else ""
+    folders = set()
+    for file in files:
+        if file.startswith(prefix):
+            folder, sep, _ = file[len(prefix):].partition("/")
+            folders.add(folder if sep else "")
+    return folders
+
+
 class GitFetcher:
     """
     Download specific paths from a remote git repository
     via sparse-checkout without fetching the entire repo.
 
+    Objects are kept in the shared :class:`GitCache`, so fetching the same
+    or another remote again only downloads objects the cache lacks, and an
+    existing worktree is moved to the new commit rewriting only changed files.
+
     Usage::
 
         fetcher = GitFetcher("https://github.com/owner/repo.git")
         fetcher.fetch(["scripts/foo", "scripts/bar"], dest=Path("./local_repo"))
+        result = fetcher.update(["scripts/foo", "scripts/bar"], dest=Path("./local_repo"))
+        result.folders("scripts")  # {"foo"} if only scripts/foo changed
     """
 
-    def __init__(self, url: str):
-        if not utils.is_url(url):
+    def __init__(self, url: str, cache: Optional[GitCache] = None):
+        """
+        :param url:   git remote URL.
+        :param cache: object cache, ~/.tutils/cache/git if None.
+        """
+        if not is_git_url(url):
             raise RepositoryInvalidLinkError(f"Invalid repository URL: {url}")
         self.url = url
+        self.cache = cache or GitCache()
 
     def fetch(
         self,
         paths: List[str],
-        dest: Path,
+        dest: Optional[Path] = None,
         branch: str = "HEAD",
         clean: bool = False,
     ) -> Path:
         """
-        Clone only the specified paths into *dest* using sparse-checkout.
+        Check out only the specified paths into *dest* using sparse-checkout.
 
         :param paths:   List of repository-relative paths to check out.
-        :param dest:    Local directory to clone into.
+        :param dest:    Worktree directory, one in the cache if None.
         :param branch:  Branch/tag/commit to check out (default: HEAD).
-        :param clean:   Remove and re-clone if *dest* already exists.
-        :returns:       Resolved path to the cloned directory.
-        :raises RepositoryConnnectFailedError: If git clone fails.
+        :param clean:   Check out anew instead of updating an existing *dest*.
+        :returns:       Resolved path to the checked out directory.
+        :raises RepositoryConnnectFailedError: If git fetch or checkout fails.
         """
-        dest = dest.expanduser().resolve()
+        return self.update(paths, dest, branch, clean).path
 
-        if dest.exists():
-            if clean:
-                shutil.rmtree(dest)
-            else:
-                return dest
-
-        # Step 1: shallow clone without checking out any files
-        result = _run([
-            "git", "clone",
-            "--filter=blob:none",
-            "--no-checkout",
-            "--depth=1",
-            self.url,
-            str(dest),
-        ])
-        if result.returncode != 0:
-            raise RepositoryConnnectFailedError(
-                f"Failed to clone {self.url}:\n{result.stderr.strip()}"
-            )
+    def update(
+        self,
+        paths: List[str],
+        dest: Optional[Path] = None,
+        branch: str = "HEAD",
+        clean: bool = False,
+    ) -> GitUpdate:
+        """
+        Fetch new objects and fast-forward the sparse worktree *dest*, check it out if missing.
 
-        # Step 2: enable cone sparse-checkout
-        _run(["git", "sparse-checkout", "init", "--cone"], cwd=dest)
+        An existing worktree checking out the same *paths* is moved to the
+        new commit, which rewrites only changed files; otherwise it is
+        checked out anew from the cache.
 
-        # Step 3: set desired paths
-        _run(["git", "sparse-checkout", "set"] + paths, cwd=dest)
+        :param paths:   List of repository-relative paths to check out.
+        :param dest:    Worktree directory, one in the cache if None.
+        :param branch:  Branch/tag/commit to check out (default: HEAD).
+        :param clean:   Check out anew even if *dest* exists, removing it.
+        :returns:       GitUpdate with the old and new commit and the changed files.
+        :raises RepositoryConnnectFailedError: If git fetch or checkout fails, or *dest*
+                                               is a folder not checked out by the cache.
+        """
+        dest = dest if dest is not None else self.cache.worktree_path(self.url, branch)
+        dest = dest.expanduser().resolve()
+        commit = self.cache.fetch(self.url, branch)
 
-        # Step 4: checkout
-        result = _run(["git", "checkout", branch], cwd=dest)
-        if result.returncode != 0:
-            raise RepositoryConnnectFailedError(
-                f"Failed to checkout {branch}:\n{result.stderr.strip()}"
-            )
+        old = self.cache.head(dest) if not clean else None
+        if old is not None:
+            try:
+                if self.cache.sparse_paths(dest) == (sorted(i for i in paths if i) or None):
+                    changed = self.cache.advance(self.url, old, commit, paths, dest)
+                    return GitUpdate(dest, old, commit, changed)
+            except RepositoryConnnectFailedError:
+                # broken worktree, check it out again
+                pass
 
-        return dest
\ No newline at end of file
+        if dest.exists():
+            if self.cache.is_worktree(dest):
+                self.cache.remove_worktree(dest)
+            elif clean:
+                shutil.rmtree(dest)
+            elif not dest.is_dir() or any(dest.iterdir()):
+                raise RepositoryConnnectFailedError(
+                    f"Failed to check out {self.url}: {dest} exists and is not a worktree of the git cache"
+                )
+        try:
+            self.cache.checkout(self.url, commit, paths, dest)
+        except Exception:
+            self.cache.remove_worktree(dest)
+            raise
+        return GitUpdate(dest, None, commit, None)
@@ -0,0 +1,77 @@
+"""Content hash manifest of a repository, the ``files`` of its index.yaml."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .. import const as C
+from ..exceptions import RepositoryError
+from .blobstore import hash_file
+from .repositoryindexfile import RepositoryIndexFile
+from .scriptindexfile import ScriptIndexFile
+
+
+def repository_files(repo_dir: Path, scripts: Iterable[str]) -> List[str]:
+    """
+        list the files an update downloads: index file and ``src`` files of every script.
+    :param repo_dir: repository folder
+    :param scripts: script folders
+    :return: paths relative to *repo_dir*, with forward slashes
+    """
+    files = []
+    for script in scripts:
+        index = repo_dir / script / "index.yaml"
+        if not index.is_file():
+            raise RepositoryError(f"Script index file not found: {index}")
+        files.append(f"{script}/index.yaml")
+        files.extend(f"{script}/{i}" for i in ScriptIndexFile(index).get_instance().src)
+    return files
+
+
+def hash_files(root: Path, files: Iterable[str], jobs: int = C.DEFAULT_HASH_JOBS) -> Dict[str, Dict]:
+    """
+        hash *files* under *root* concurrently, hashlib releases the GIL on large reads.
+    :param root: folder the paths are relative to
+    :param files: relative paths
+    :param jobs: hashing threads
+    :return: dict of path to ``{"sha256": hex digest, "size": bytes}``
+    """
+    files = sorted(set(files))
+    missing = [i for i in files if not (root / i).is_file()]
+    if missing:
+        raise RepositoryError(f"Files not found in {root}: {', '.join(missing)}")
+
+    def entry(path: str) -> Dict:
+        full = root / path
+        return {"sha256": hash_file(full), "size": full.stat().st_size}
+
+    with ThreadPoolExecutor(max(1, jobs), thread_name_prefix="tutils-hash") as executor:
+        return dict(zip(files, executor.map(entry, files)))
+
+
+def publish(repo_dir: Path, jobs: int = C.DEFAULT_HASH_JOBS) -> Dict[str, Dict]:
+    """
+        write the hash manifest of every script file into the repository index file.
+    :param repo_dir: repository folder
+    :param jobs: hashing threads
+    :return: the manifest
+    :raises RepositoryError: If the index file, a script index file or a ``src`` file is missing.
+    """
+    index_file = RepositoryIndexFile(repo_dir / "index.yaml")
+    if not index_file.file_path.is_file():
+        raise RepositoryError(f"Repository index file not found: {index_file.file_path}")
+    index = index_file.get_instance()
+    index.files = hash_files(repo_dir, repository_files(repo_dir, index.scripts), jobs)
+    index_file.save_file()
+    return index.files
+
+
+def matches(path: Path, expected: Optional[Dict]) -> bool:
+    """Check if file *path* has the size and sha256 of manifest entry *expected*."""
+    if not expected or not path.is_file():
+        return False
+    try:
+        return path.stat().st_size == expected.get("size") and hash_file(path) == expected.get("sha256")
+    except OSError:
+        return False
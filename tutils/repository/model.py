@@ -2,17 +2,37 @@
 from pydantic import BaseModel, Field, field_validator
 from typing import Any, Dict, List
 
+from .blobstore import is_digest
+
 
 class RepositoryIndexFileModel(BaseModel):
     """Repository index file yaml model."""
     name:str = Field(default="",description="Name of the index file")
     scripts:List[str] = Field(default_factory=list,description="Script files")
+    files:Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Manifest of script files, path -> {sha256, size}, written by repository publish",
+    )
 
     @field_validator("scripts", mode="before")
     @classmethod
     def _coerce_none(cls, v):
         return v if v is not None else []
 
+    @field_validator("files", mode="before")
+    @classmethod
+    def _coerce_none_dict(cls, v):
+        if not isinstance(v, dict):
+            return {}
+        # the manifest comes from the remote, keep only well formed entries
+        return {
+            path: entry for path, entry in v.items()
+            if isinstance(path, str) and isinstance(entry, dict)
+            and is_digest(entry.get("sha256"))
+            and isinstance(entry.get("size"), int) and not isinstance(entry.get("size"), bool)
+            and entry["size"] >= 0
+        }
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
         return self.model_dump()
@@ -28,8 +48,9 @@ class ScriptIndexFileModel(BaseModel):
     src:List[str] = Field(default_factory=list,description="Source code of the script")
     license:str = Field(default="",description="License of the script")
     param:List[Dict[str, str]] = Field(default_factory=list,description="Parameters of the script")
+    aliases:List[str] = Field(default_factory=list,description="Other names to run the script by")
 
-    @field_validator("src", "param", mode="before")
+    @field_validator("src", "param", "aliases", mode="before")
     @classmethod
     def _coerce_none(cls, v):
         return v if v is not None else []
@@ -2,7 +2,6 @@
 from pathlib import Path
 from typing import Dict
 
-import yaml
 from .model import RepositoryIndexFileModel
 
 class RepositoryIndexFile:
@@ -21,6 +20,7 @@ class RepositoryIndexFile:
             return RepositoryIndexFileModel()
         if not self.file_path.exists():
             return RepositoryIndexFileModel()
+        import yaml
         with open(self.file_path, "r",encoding='utf-8') as f:
             data = yaml.safe_load(f) or {}
 
@@ -35,8 +35,13 @@ class RepositoryIndexFile:
         """Save repository index file model to file path"""
         if not self.file_path:
             return False
+        import yaml
+        data = self.file.model_dump()
+        if not data["files"]:
+            # repositories without a manifest keep the plain format
+            del data["files"]
         with open(self.file_path, "w",encoding='utf-8') as f:
-            yaml.safe_dump(self.file.model_dump(), f, allow_unicode=True)
+            yaml.safe_dump(data, f, allow_unicode=True)
         return True
 
     def to_dict(self) -> Dict[str, any]:
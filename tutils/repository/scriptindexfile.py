@@ -1,6 +1,5 @@
 """Parse Script index file index.yaml"""
 from pathlib import Path
-import yaml
 from .model import ScriptIndexFileModel
 
 class ScriptIndexFile:
@@ -15,6 +14,7 @@ class ScriptIndexFile:
 
     def _load_file(self) -> ScriptIndexFileModel:
         """Load Script index file model"""
+        import yaml
         with open(self.file_path, "r",encoding='utf-8') as f:
             data = yaml.safe_load(f) or {}
 
@@ -0,0 +1,57 @@
+"""Parse repository sync manifest file. .tutils-sync.json"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+SYNC_MANIFEST_NAME = ".tutils-sync.json"
+# entry of the archive an archive repository was extracted from
+ARCHIVE_KEY = "<archive>"
+
+
+class SyncManifestFile:
+    """
+    Parse repository sync manifest file. .tutils-sync.json
+
+    Records, per file relative to the repository folder, the url it was
+    downloaded from and its ``etag`` / ``last_modified`` validators, so the
+    next update can revalidate it with a conditional request. Repositories
+    synced from an archive record the archive under ``ARCHIVE_KEY`` instead.
+    """
+    def __init__(self, file_path: Path = None):
+        """
+        Parse repository sync manifest file. .tutils-sync.json
+        :param file_path: sync manifest file path
+        """
+        self.file_path = file_path
+        self.files: Dict[str, Dict[str, str]] = self._load_file()
+        self._lock = threading.Lock()
+
+    def _load_file(self) -> Dict[str, Dict[str, str]]:
+        """Load sync manifest, empty if missing or corrupt"""
+        if not self.file_path or not self.file_path.exists():
+            return {}
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        files = data.get("files") if isinstance(data, dict) else None
+        return files if isinstance(files, dict) else {}
+
+    def get(self, relative_path: str) -> Optional[Dict[str, str]]:
+        """get entry of file"""
+        return self.files.get(relative_path)
+
+    def set(self, relative_path: str, entry: Dict[str, str]) -> None:
+        """set entry of file"""
+        with self._lock:
+            self.files[relative_path] = entry
+
+    def save_file(self) -> bool:
+        """Save sync manifest to file path"""
+        if not self.file_path:
+            return False
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f, indent=1, sort_keys=True)
+        return True
@@ -0,0 +1,656 @@
+"""Concurrent update engine for remote repositories."""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import os
+import shutil
+import threading
+import urllib.error
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TaskID
+
+from .. import const as C
+from .. import timings
+from .. import utils
+from ..exceptions import (
+    RepositoryError,
+    RepositoryInvalidLinkError,
+    RepositoryConnnectFailedError,
+    RepositoryLocalPathNotExistError,
+)
+from ..httpclient import ConnectionPool
+from .blobstore import BlobStore
+from .gitfetcher import GitCache, GitFetcher, GitSource, GitUpdate, folders_below, git_source
+from .repositoryindexfile import RepositoryIndexFile
+from .scriptindexfile import ScriptIndexFile
+from .archive import archive_format, extract_tar, extract_zip, unwrap
+from .manifest import matches
+from .syncmanifest import ARCHIVE_KEY, SYNC_MANIFEST_NAME, SyncManifestFile
+
+# commit a git repository folder was installed from
+GIT_SYNC_NAME = ".tutils-git"
+# folders inside the repository, on its file system so installing only renames:
+# the update being staged, the entries it replaces until it is complete, and
+# interrupted downloads kept for the next update
+STAGING_NAME = ".tutils-updating"
+BACKUP_NAME = ".tutils-old"
+PARTIAL_NAME = ".tutils-partial"
+
+if TYPE_CHECKING:
+    from ..model import RepositoryModel
+
+
+def _safe_join(base: Path, relative: str) -> Path:
+    """Join *relative* to *base*, refuse paths escaping *base*."""
+    path = (base / relative).resolve()
+    if path != base.resolve() and base.resolve() not in path.parents:
+        raise RepositoryError(f"Invalid path in repository index: {relative}")
+    return path
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    """Hardlink *src* to *dest*, copy it if hardlinks are not supported."""
+    Path(dest).parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def _index_scripts(path: Path) -> List[str]:
+    """Return the script folders listed in the repository index file of *path*, empty if unreadable."""
+    try:
+        return list(RepositoryIndexFile(path / "index.yaml").get_instance().scripts)
+    except Exception:
+        return []
+
+
+class _RepositorySync:
+    """State of one repository update."""
+
+    def __init__(self, repo: RepositoryModel, staging: Path):
+        self.repo = repo
+        self.path = Path(repo.path)
+        self.staging = staging.resolve()
+        self.old_manifest = SyncManifestFile(self.path / SYNC_MANIFEST_NAME)
+        self.new_manifest = SyncManifestFile(staging / SYNC_MANIFEST_NAME)
+        # interrupted downloads, next to staging so they survive its removal
+        self.partial = self.path / PARTIAL_NAME
+        # hash manifest of the remote repository index, see repository publish
+        self.files: Dict[str, Dict] = {}
+        self.downloaded = 0
+        self.unchanged = 0
+        self.task: Optional[TaskID] = None
+
+
+class RepositoryUpdater:
+    """
+    Update remote repositories to local with a bounded worker pool.
+
+    Files of all repositories are downloaded concurrently over shared
+    keep-alive connections into a staging directory per repository, which
+    replaces the repository directory only after all its files arrived.
+    A repository with an ``archive`` link is instead one request: the tar
+    archive is extracted into staging while it streams in (zip archives are
+    spooled to a temporary file first, their index is at the end).
+
+    Every downloaded file's ``ETag`` / ``Last-Modified`` is kept in a sync
+    manifest in the repository folder, the next update revalidates files with
+    conditional requests and reuses local files the server answers 304 for.
+    If the remote repository index carries a hash manifest, files whose hash
+    is in the blob store or matches the local file are not requested at all.
+
+    Source files go into the content-addressed :class:`BlobStore` and are
+    hardlinked into script folders, so files vendored by several repositories
+    are stored once.
+
+    Repositories of type ``git`` (and, with *git*, remote repositories with
+    raw GitHub links) are grouped by remote and ref instead: each group is one
+    blob-less fetch into the shared :class:`GitCache` and one sparse checkout
+    covering the folders of all its repositories. Later updates fetch only
+    new objects, and replace only the script folders which changed since the
+    commit a repository was installed from; :attr:`changes` lists them.
+
+    Usage::
+
+        updater = RepositoryUpdater(jobs=8)
+        updater.update(repos)
+    """
+
+    def __init__(
+        self,
+        jobs: int = C.DEFAULT_UPDATE_JOBS,
+        console: Optional[Console] = None,
+        store: Optional[BlobStore] = None,
+        git: bool = False,
+        git_cache: Optional[GitCache] = None,
+    ):
+        """
+        :param jobs:      Maximum concurrent downloads.
+        :param console:   Console to log to.
+        :param store:     Blob store of source files, ~/.tutils/store if None.
+        :param git:       Also sync remote repositories with raw GitHub links by git,
+                          falling back to HTTP if that fails.
+        :param git_cache: Git object cache, ~/.tutils/cache/git if None.
+        """
+        self.jobs = max(1, jobs)
+        self.console = console or Console()
+        self.store = store or BlobStore()
+        self.git = git
+        self.git_cache = git_cache or GitCache()
+        self.pool = ConnectionPool(maxsize=self.jobs)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._progress: Optional[Progress] = None
+        self._totals: Dict[TaskID, int] = {}
+        self._lock = threading.Lock()
+        self._summary: Dict[str, str] = {}
+        # repository path -> script folders replaced by the last update, for cache invalidation
+        self.changes: Dict[str, List[str]] = {}
+
+    def update(self, repos: Iterable[RepositoryModel]) -> Dict[str, Optional[Exception]]:
+        """
+        Update remote repositories concurrently, log the result of each one.
+
+        :param repos: repositories to update, local ones are skipped.
+        :return: dict of repository path to the exception it failed with, or None.
+        """
+        repos = [i for i in repos if i.type != "local" and (i.link or i.archive)]
+        results: Dict[str, Optional[Exception]] = {}
+        if not repos:
+            return results
+
+        groups: Dict[Tuple[str, str], List[Tuple[RepositoryModel, GitSource]]] = {}
+        http_repos = []
+        for repo in repos:
+            try:
+                # an archive is one request already
+                source = git_source(repo, github=self.git and not repo.archive)
+            except RepositoryError as e:
+                results[repo.path] = e
+                self._log_result(repo, e)
+                continue
+            if source is None:
+                http_repos.append(repo)
+            else:
+                groups.setdefault((source.remote, source.ref), []).append((repo, source))
+
+        for (remote, ref), members in groups.items():
+            errors = self.update_git_group(remote, ref, members)
+            for repo, _ in members:
+                error = errors[repo.path]
+                if error is not None and repo.type == "remote":
+                    self.console.log(f"{error}")
+                    self.console.log(f"Sync {repo.name or repo.path} by git failed, download it instead")
+                    http_repos.append(repo)
+                    continue
+                results[repo.path] = error
+                self._log_result(repo, error)
+
+        if http_repos:
+            self._update_http(http_repos, results)
+        # drop blobs only the replaced repository versions linked to
+        self.store.gc()
+        return results
+
+    def _log_result(self, repo: RepositoryModel, error: Optional[Exception]) -> None:
+        if error is None:
+            self.console.log(f"[green]Repository {repo.name} is updated![/green]{self._summary.pop(repo.path, '')}")
+        else:
+            self.console.log(f"{error}")
+            self.console.print(f"[red]Update {repo.name or repo.path} Failed[/red]")
+
+    def _update_http(self, repos: List[RepositoryModel], results: Dict[str, Optional[Exception]]) -> None:
+        """Download repositories file by file, concurrently."""
+        with Progress(
+            "[progress.description]{task.description}",
+            BarColumn(),
+            MofNCompleteColumn(),
+            console=self.console,
+            transient=True,
+        ) as progress, ThreadPoolExecutor(
+            self.jobs, thread_name_prefix="tutils-download"
+        ) as executor, ThreadPoolExecutor(
+            min(self.jobs, len(repos)), thread_name_prefix="tutils-repo"
+        ) as repo_executor:
+            self._progress = progress
+            self._executor = executor
+            futures = {repo_executor.submit(self.update_repository, repo): repo for repo in repos}
+            for future in as_completed(futures):
+                repo = futures[future]
+                error = future.exception()
+                results[repo.path] = error
+                self._log_result(repo, error)
+
+        self._progress = None
+        self._executor = None
+        self.pool.close()
+
+    def update_git_group(
+        self,
+        remote: str,
+        ref: str,
+        members: List[Tuple[RepositoryModel, GitSource]],
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Sync repositories living in one git remote with one fetch and one sparse checkout.
+
+        :param remote:  git remote URL.
+        :param ref:     branch/tag/commit.
+        :param members: repositories with their source folder in the remote.
+        :return: dict of repository path to the exception it failed with, or None.
+        """
+        names = ", ".join(repo.name or Path(repo.path).name for repo, _ in members)
+        self.console.log(f"Fetch {remote} ({names})")
+        try:
+            fetcher = GitFetcher(remote, self.git_cache)
+            result = fetcher.update(sorted({source.path for _, source in members}), branch=ref)
+        except RepositoryError as e:
+            return {repo.path: e for repo, _ in members}
+
+        results: Dict[str, Optional[Exception]] = {}
+        for repo, source in members:
+            try:
+                self._install_git(repo, source, result)
+                results[repo.path] = None
+            except Exception as e:
+                results[repo.path] = e
+        return results
+
+    def _install_git(self, repo: RepositoryModel, source: GitSource, result: GitUpdate) -> None:
+        """
+        Bring the repository folder to the worktree commit.
+
+        Only script folders changed since the installed commit are replaced,
+        each one atomically, and the repository index file last; a folder
+        not installed from git, or from a commit the cache lost, is replaced
+        as a whole.
+        """
+        path = Path(repo.path)
+        src = result.path / source.path
+        if not path.exists():
+            raise RepositoryLocalPathNotExistError(f"Path does not exist: {repo.path}")
+        if not (src / "index.yaml").is_file():
+            raise RepositoryError(f"No repository index file in git: {repo.link}")
+
+        installed_ref = f"refs/tutils/installed/{GitCache.remote_name(str(path.resolve()))}"
+        marker = path / GIT_SYNC_NAME
+        installed = marker.read_text(encoding="utf-8").strip() if marker.is_file() else ""
+        if installed and self.git_cache.ref_commit(installed_ref) == installed:
+            if installed == result.old and result.changed is not None:
+                folders = result.folders(source.path)
+            else:
+                folders = folders_below(self.git_cache.changed_files(installed, result.new, [source.path]), source.path)
+            prefix = f"{source.path}/" if source.path else ""
+            deleted = [
+                i[len(prefix):] for i in self.git_cache.changed_files(installed, result.new, [source.path], deleted=True)
+                if i.startswith(prefix) and "/" not in i[len(prefix):]
+            ]
+            self._replace_folders(path, src, folders, result.new, deleted)
+        else:
+            folders = None
+            self._replace_tree(path, src, result.new)
+        self.git_cache.set_ref(installed_ref, result.new)
+
+        repo.set_by_index_file()
+        if folders is None:
+            self.changes[repo.path] = list(repo.scripts)
+            detail = ""
+        else:
+            self.changes[repo.path] = sorted(i for i in folders if i)
+            detail = f", {len(self.changes[repo.path])} scripts changed" if folders else ", up to date"
+        self._summary[repo.path] = f" (git {result.new[:7]}{detail})"
+
+    def _replace_tree(self, path: Path, src: Path, commit: str) -> None:
+        """Install a hardlinked copy of *src* into the repository directory, see :meth:`_install`."""
+        staging = path / STAGING_NAME
+        if staging.exists():
+            shutil.rmtree(staging)
+        try:
+            shutil.copytree(src, staging, copy_function=_link_or_copy, ignore=shutil.ignore_patterns(".git"))
+            (staging / GIT_SYNC_NAME).write_text(commit + "\n", encoding="utf-8")
+            self._install(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _replace_folders(self, path: Path, src: Path, folders: Iterable[str], commit: str,
+                         deleted: Iterable[str] = ()) -> None:
+        """
+        Replace changed script *folders* of the repository by hardlinked copies, files of "" last.
+
+        Of the files at the top of the repository, only those in *deleted*,
+        removed upstream since the installed commit, are deleted; files added
+        locally are kept.
+        """
+        for folder in sorted(i for i in folders if i):
+            target = _safe_join(path, folder)
+            if not (src / folder).is_dir():
+                shutil.rmtree(target, ignore_errors=True)
+                continue
+            staging = target.with_name(f".{target.name}.updating")
+            if staging.exists():
+                shutil.rmtree(staging)
+            try:
+                shutil.copytree(src / folder, staging, copy_function=_link_or_copy)
+                if target.exists():
+                    self._swap(staging, target)
+                else:
+                    staging.rename(target)
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+        if "" in folders:
+            # files of the repository folder itself, like index.yaml
+            for name in deleted:
+                target = _safe_join(path, name)
+                if name != GIT_SYNC_NAME and not (src / name).exists() and (target.is_file() or target.is_symlink()):
+                    target.unlink()
+            for file in src.iterdir():
+                if file.is_file():
+                    tmp = path / f".{file.name}.updating"
+                    tmp.unlink(missing_ok=True)
+                    _link_or_copy(file, tmp)
+                    os.replace(tmp, path / file.name)
+                    # left if both are links of the same unchanged worktree file
+                    tmp.unlink(missing_ok=True)
+        marker = path / f".{GIT_SYNC_NAME}.updating"
+        marker.write_text(commit + "\n", encoding="utf-8")
+        os.replace(marker, path / GIT_SYNC_NAME)
+
+    def update_repository(self, repo: RepositoryModel) -> None:
+        """
+        Download repository into a staging directory, then swap it in.
+
+        :raises RepositoryError: If the repository cannot be updated.
+        """
+        path = Path(repo.path)
+        if not path.exists():
+            raise RepositoryLocalPathNotExistError(f"Path does not exist: {repo.path}")
+        link = repo.archive.partition("#")[0] if repo.archive else repo.link
+        if not utils.is_url(link):
+            raise RepositoryInvalidLinkError(f"Invalid url: {link}")
+
+        self.console.log(f"Update {repo.name or path.name}")
+        staging = path / STAGING_NAME
+        sync = _RepositorySync(repo, staging)
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir(parents=True)
+        try:
+            if repo.archive:
+                changed = self._download_archive(sync)
+            else:
+                self._download_repository(sync)
+                changed = True
+            if changed:
+                sync.new_manifest.save_file()
+                self._install(staging, path)
+            else:
+                shutil.rmtree(staging)
+            shutil.rmtree(sync.partial, ignore_errors=True)
+            if repo.archive:
+                self._summary[repo.path] = f" ({sync.downloaded} files extracted)" if changed else " (archive unchanged)"
+            else:
+                self._summary[repo.path] = f" ({sync.downloaded} downloaded, {sync.unchanged} unchanged)"
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            try:
+                # kept only while it holds downloads to resume
+                sync.partial.rmdir()
+            except OSError:
+                pass
+            raise
+
+        repo.set_by_index_file()
+
+    def _download_archive(self, sync: _RepositorySync) -> bool:
+        """
+        Stream the repository archive into staging, extracting it on the fly.
+
+        ``#<path>`` at the end of the archive link selects a folder inside the
+        archive, otherwise a single folder wrapping the repository is unwrapped.
+
+        :return: False if the server answered the archive is unchanged.
+        """
+        url, _, prefix = sync.repo.archive.partition("#")
+        entry = sync.old_manifest.get(ARCHIVE_KEY)
+        if not entry or entry.get("url") != url or not (sync.path / "index.yaml").is_file():
+            entry = None
+
+        def extracted() -> None:
+            with self._lock:
+                sync.downloaded += 1
+            self._advance(sync.task)
+
+        if self._progress is not None:
+            sync.task = self._progress.add_task(f"[cyan]{sync.repo.name or sync.path.name}", total=None)
+        try:
+            with timings.span("download", url=url), \
+                    self.pool.open(url, headers=utils.conditional_headers(entry)) as response:
+                if response.status == 304:
+                    response.read()
+                    return False
+                content_type = response.headers.get("Content-Type", "")
+                if "text/html" in content_type:
+                    raise ValueError(f"Unexpected HTML response from: {url}")
+                extract = extract_zip if archive_format(url, content_type) == "zip" else extract_tar
+                extract(response, sync.staging, prefix.strip("/"), on_file=extracted)
+                validators = {
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                }
+        except (OSError, ValueError, urllib.error.URLError, http.client.HTTPException) as e:
+            raise RepositoryConnnectFailedError(f"Connect Failed: {url}: {e}") from e
+
+        if not prefix:
+            unwrap(sync.staging)
+        if not (sync.staging / "index.yaml").is_file():
+            raise RepositoryError(f"No repository index file in archive: {sync.repo.archive}")
+        sync.new_manifest.set(ARCHIVE_KEY, {"url": url, **validators})
+        return True
+
+    def _download(self, sync: _RepositorySync, url: str, dest: Path, blob: bool = False) -> None:
+        """
+        Download *url* into staging, reuse the local file if unchanged upstream.
+
+        :param blob: add the file to the blob store, for script source files.
+        """
+        relative_path = dest.relative_to(sync.staging).as_posix()
+        local_path = sync.path / relative_path
+        entry = sync.old_manifest.get(relative_path)
+        in_store = blob and bool(entry) and self.store.has(entry.get("sha256", ""))
+        if not entry or entry.get("url") != url or not (in_store or local_path.is_file()):
+            entry = None
+
+        expected = sync.files.get(relative_path)
+        if expected:
+            if self._reuse(expected, local_path, dest, blob):
+                sync.new_manifest.set(relative_path, {**(entry or {}), "url": url, "sha256": expected["sha256"]})
+                with self._lock:
+                    sync.unchanged += 1
+                return
+            # known to differ, no need to revalidate
+            entry = None
+
+        part = sync.partial / hashlib.sha1(f"{sync.path}/{relative_path}".encode("utf-8")).hexdigest()
+        validators = utils.download_if_modified(url, dest, entry, pool=self.pool, part=part)
+        if validators is None:
+            if in_store:
+                self.store.link(entry["sha256"], dest)
+            else:
+                _link_or_copy(local_path, dest)
+            sync.new_manifest.set(relative_path, entry)
+            with self._lock:
+                sync.unchanged += 1
+            return
+
+        entry = {"url": url, **validators}
+        if expected and entry["sha256"] != expected.get("sha256"):
+            raise RepositoryError(f"Downloaded file does not match the repository manifest: {url}")
+        if blob:
+            # hashed while downloading
+            self.store.add(dest, entry["sha256"])
+        sync.new_manifest.set(relative_path, entry)
+        with self._lock:
+            sync.downloaded += 1
+
+    def _reuse(self, expected: Dict, local_path: Path, dest: Path, blob: bool) -> bool:
+        """Link the file of manifest entry *expected* from the store or the local repository, if there."""
+        digest = expected.get("sha256", "")
+        if self.store.has(digest):
+            self.store.link(digest, dest)
+            return True
+        if not matches(local_path, expected):
+            return False
+        _link_or_copy(local_path, dest)
+        if blob:
+            self.store.add(dest)
+        return True
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if self._executor is None:
+            # used without update(), run in the calling thread
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(fn, *args)
+
+    def _advance(self, task: Optional[TaskID], total: int = 0) -> None:
+        if self._progress is None or task is None:
+            return
+        if total:
+            with self._lock:
+                self._totals[task] += total
+                self._progress.update(task, total=self._totals[task])
+        else:
+            self._progress.advance(task)
+
+    def _download_repository(self, sync: _RepositorySync) -> None:
+        repo = sync.repo
+        index_file_path = sync.staging / "index.yaml"
+        try:
+            self._download(sync, repo.link, index_file_path)
+        except (OSError, ValueError, urllib.error.URLError, http.client.HTTPException) as e:
+            raise RepositoryConnnectFailedError(f"Connect Failed: {repo.link}: {e}") from e
+
+        index = RepositoryIndexFile(index_file_path).get_instance()
+        scripts = index.scripts
+        sync.files = index.files
+        remote_dir = utils.url_dirname(repo.link)
+        if self._progress is not None:
+            sync.task = self._progress.add_task(f"[cyan]{repo.name or sync.path.name}", total=len(scripts))
+            self._totals[sync.task] = len(scripts)
+
+        self._wait([
+            self._submit(self._download_script, sync, remote_dir, script)
+            for script in scripts
+        ])
+
+    def _download_script(self, sync: _RepositorySync, remote_dir: str, script: str) -> List[Future]:
+        """Download script index file, return futures of its source files."""
+        script_remote_dir = utils.url_join(remote_dir, script)
+        script_local_dir = _safe_join(sync.staging, script)
+        script_index_file_path = script_local_dir / "index.yaml"
+        self._download(sync, utils.url_join(script_remote_dir, "index.yaml"), script_index_file_path)
+
+        files = ScriptIndexFile(script_index_file_path).get_instance().src
+        self._advance(sync.task, total=len(files))
+        self._advance(sync.task)
+        return [
+            self._submit(self._download_src, sync, utils.url_join(script_remote_dir, file), _safe_join(script_local_dir, file))
+            for file in files
+        ]
+
+    def _download_src(self, sync: _RepositorySync, url: str, dest: Path) -> None:
+        self._download(sync, url, dest, blob=True)
+        self._advance(sync.task)
+
+    @staticmethod
+    def _wait(futures: List[Future]) -> None:
+        """Wait for futures and the futures they return, raise the first error."""
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if isinstance(result, list):
+                        pending.update(result)
+        except Exception:
+            # let running downloads finish before the staging directory is removed
+            while pending:
+                for future in pending:
+                    future.cancel()
+                done, _ = wait(pending)
+                pending = {
+                    i for future in done
+                    if not future.cancelled() and future.exception() is None and isinstance(future.result(), list)
+                    for i in future.result()
+                }
+            raise
+
+    @staticmethod
+    def _install(staging: Path, path: Path) -> None:
+        """
+        Move the entries of *staging* into the repository directory *path*, all or none.
+
+        The entries they replace are moved aside into a backup folder first,
+        then the staged ones moved in, the index file and sync records last;
+        if any rename fails, the moved entries are put back. Everything is
+        inside *path*, so these are renames on one file system. Entries the
+        update did not bring, like local notes or scripts added by hand, are
+        kept; only folders of scripts dropped from the index are removed.
+        """
+        removed = set(_index_scripts(path)) - set(_index_scripts(staging))
+        last = ("index.yaml", SYNC_MANIFEST_NAME, GIT_SYNC_NAME)
+        entries = sorted((i.name for i in staging.iterdir()), key=lambda i: (i in last, i))
+        backup = path / BACKUP_NAME
+        if backup.exists():
+            shutil.rmtree(backup)
+        backup.mkdir()
+        saved: List[str] = []
+        installed: List[str] = []
+        try:
+            for name in entries:
+                target = path / name
+                if target.exists() or target.is_symlink():
+                    target.rename(backup / name)
+                    saved.append(name)
+            for name in entries:
+                (staging / name).rename(path / name)
+                installed.append(name)
+        except BaseException:
+            for name in installed:
+                (path / name).rename(staging / name)
+            for name in saved:
+                (backup / name).rename(path / name)
+            shutil.rmtree(backup, ignore_errors=True)
+            raise
+        shutil.rmtree(backup, ignore_errors=True)
+        for script in removed:
+            folder = _safe_join(path, script)
+            if folder != path.resolve() and folder.is_dir():
+                shutil.rmtree(folder, ignore_errors=True)
+        staging.rmdir()
+
+    @staticmethod
+    def _swap(staging: Path, path: Path) -> None:
+        """Replace *path* by *staging*, keep *path* if the swap fails."""
+        backup = path.with_name(f".{path.name}.old")
+        if backup.exists():
+            shutil.rmtree(backup)
+        path.rename(backup)
+        try:
+            staging.rename(path)
+        except OSError:
+            backup.rename(path)
+            raise
+        shutil.rmtree(backup, ignore_errors=True)
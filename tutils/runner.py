@@ -2,18 +2,129 @@
 from __future__ import annotations
 import os
 import sys
+import time
+from collections import deque
 from .env import env
+from . import const as C
+from . import timings
 import subprocess
-from typing import List, Dict, Optional
-from rich import print as rprint
+from typing import Callable, List, Dict, Optional, TextIO
+
+# bytes read from a pipe at once
+_READ_SIZE = 64 * 1024
+
+
+def _echo_writer(stream: TextIO) -> Callable[[bytes], None]:
+    """Return a function writing raw bytes to *stream* and flushing it."""
+    buffer = getattr(stream, "buffer", None)
+
+    def write(data: bytes) -> None:
+        if buffer is not None:
+            buffer.write(data)
+            buffer.flush()
+        else:
+            stream.write(data.decode("utf-8", errors="replace"))
+            stream.flush()
+    return write
+
+
+class _StreamCapture:
+    """
+    Split one output stream into lines, keep only the last ones.
+
+    Memory stays bounded whatever the script prints: at most *buffer_lines*
+    lines are kept and a line longer than *max_line_bytes* is truncated.
+    """
+    def __init__(self, echo_to: Optional[Callable[[bytes], None]], buffer_lines: int, max_line_bytes: int):
+        self.lines: deque = deque(maxlen=buffer_lines)
+        self.partial = bytearray()
+        self.echo_to = echo_to
+        self.max_line_bytes = max_line_bytes
+        self.byte_count = 0
+        self.line_count = 0
+
+    def _add_partial(self, data: bytes) -> None:
+        room = self.max_line_bytes - len(self.partial)
+        if room > 0:
+            self.partial += data[:room]
+
+    def _emit(self) -> None:
+        self.lines.append(self._decode(self.partial))
+        self.partial = bytearray()
+        self.line_count += 1
+
+    @staticmethod
+    def _decode(line: bytes) -> str:
+        return line.decode("utf-8", errors="replace").rstrip("\r")
+
+    def feed(self, data: bytes, budget: Optional[int] = None) -> bool:
+        """
+        Consume *data*, emitting at most *budget* complete lines.
+        :return: True if a line beyond *budget* arrived, the rest of *data* is dropped.
+        """
+        pos = 0
+        hit = False
+        count = data.count(b"\n")
+        # bytes after the last allowed newline start a line beyond budget
+        if budget is None or count < budget or (count == budget and data.endswith(b"\n")):
+            # whole chunk fits, only decode the lines the ring buffer keeps
+            parts = data.split(b"\n")
+            if count:
+                self._add_partial(parts[0])
+                parts[0] = bytes(self.partial)
+                self.partial = bytearray()
+                self.lines.extend(
+                    self._decode(i[:self.max_line_bytes]) for i in parts[max(0, count - self.lines.maxlen):count]
+                )
+                self.line_count += count
+            self._add_partial(parts[-1])
+            pos = len(data)
+        else:
+            while True:
+                nl = data.find(b"\n", pos)
+                if budget <= 0 or nl == -1:
+                    hit = True
+                    break
+                self._add_partial(data[pos:nl])
+                self._emit()
+                pos = nl + 1
+                budget -= 1
+
+        self.byte_count += pos
+        if self.echo_to is not None and pos:
+            self.echo_to(data[:pos])
+        return hit
+
+    def close(self) -> None:
+        """Emit the last line if it has no trailing newline."""
+        if self.partial:
+            self._emit()
+
 
 class ProcessRunner:
     """
     Helper to run a python script with subprocess, stream output,
     support timeout, max_lines and passing env/args.
     """
-    def __init__(self, exe: Optional[str] = None):
+    def __init__(self, exe: Optional[str] = None, warm: bool = False):
+        """
+        :param exe: python interpreter, sys.executable if None
+        :param warm: fork scripts from a warm worker daemon if the platform supports it
+        """
         self.exe = exe or sys.executable
+        self.pool = None
+        if warm:
+            from .warmpool import WarmPool, is_supported
+            if is_supported():
+                self.pool = WarmPool(exe=self.exe)
+
+    def _popen(self, cmd: List[str], proc_env: Dict[str, str], stdout=None, stderr=None):
+        """Start *cmd* from the warm worker if enabled and available, else as a subprocess."""
+        if self.pool is not None:
+            proc = self.pool.spawn(cmd, proc_env, env.WORK_DIR, stdout=stdout, stderr=stderr)
+            if proc is not None:
+                return proc
+        return subprocess.Popen(cmd, cwd=env.WORK_DIR, env=proc_env, stdout=stdout, stderr=stderr)
 
     def run_script(
         self,
@@ -22,42 +133,58 @@ class ProcessRunner:
         timeout: Optional[float] = None,
         max_lines: Optional[int] = None,
         debug:Optional[bool] = False,
+        capture: bool = False,
+        echo: bool = True,
+        buffer_lines: int = C.DEFAULT_BUFFER_LINES,
+        max_line_bytes: int = C.DEFAULT_MAX_LINE_BYTES,
+        raw_args: bool = False,
     ) -> Dict:
         """
         Run script and stream output.
 
+        By default the script inherits the terminal. With *capture* (implied
+        by *max_lines*) its stdout and stderr are read through pipes: the last
+        *buffer_lines* lines of each are kept, output is echoed to ours if
+        *echo*, and the script is killed once it printed more than *max_lines*
+        lines in total. Pass *raw_args* if *args* have no leading ':' to strip.
+
         Returns a dict with keys:
-          exit_code, stdout_lines, stderr_lines, timed_out, killed_by_limit
+          exit_code, stdout_lines, stderr_lines, timed_out, killed_by_limit,
+          stdout_bytes, stderr_bytes, stdout_line_count, stderr_line_count
+          (the byte and line counts are None if output is not captured)
         """
         args = args or []
-        args = [i[1:] for i in args]
+        if not raw_args:
+            # cli arguments come prefixed by ':' so typer does not parse them
+            args = [i[1:] for i in args]
 
         cmd = [self.exe, script_path] + args
         if debug:
+            from rich import print as rprint
             rprint(cmd)
         proc_env = os.environ.copy()
 
         proc_env.update(env.to_dict())
+
+        with timings.span("run", script=script_path) as span:
+            if capture or max_lines is not None:
+                res = self._run_captured(cmd, proc_env, timeout, max_lines, echo, buffer_lines, max_line_bytes)
+            else:
+                res = self._run_inherited(cmd, proc_env, timeout)
+            span.set(exit_code=res["exit_code"])
+        return res
+
+    def _run_inherited(self, cmd: List[str], proc_env: Dict[str, str], timeout: Optional[float]) -> Dict:
+        """Run *cmd* sharing our terminal, see run_script()."""
         # Let subprocess inherit the terminal directly so rich/color output works natively
-        proc = subprocess.Popen(
-            cmd,
-            cwd=env.WORK_DIR,
-            env=proc_env,
-        )
+        proc = self._popen(cmd, proc_env)
 
         timed_out = False
         try:
             proc.wait(timeout=timeout)
         except subprocess.TimeoutExpired:
             timed_out = True
-            try:
-                proc.terminate()
-                try:
-                    proc.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-            except Exception:
-                pass
+            self._stop(proc)
 
         exit_code = proc.poll()
 
@@ -67,4 +194,138 @@ class ProcessRunner:
             "stderr_lines": [],
             "timed_out": timed_out,
             "killed_by_limit": False,
-        }
\ No newline at end of file
+            "stdout_bytes": None,
+            "stderr_bytes": None,
+            "stdout_line_count": None,
+            "stderr_line_count": None,
+        }
+
+    @staticmethod
+    def _stop(proc: subprocess.Popen) -> None:
+        """Terminate *proc*, kill it if it does not exit in time."""
+        try:
+            proc.terminate()
+            try:
+                proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        except Exception:
+            pass
+
+    def _run_captured(
+        self,
+        cmd: List[str],
+        proc_env: Dict[str, str],
+        timeout: Optional[float],
+        max_lines: Optional[int],
+        echo: bool,
+        buffer_lines: int,
+        max_line_bytes: int,
+    ) -> Dict:
+        proc = self._popen(cmd, proc_env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out = _StreamCapture(_echo_writer(sys.stdout) if echo else None, buffer_lines, max_line_bytes)
+        err = _StreamCapture(_echo_writer(sys.stderr) if echo else None, buffer_lines, max_line_bytes)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        pump = self._pump_selectors if os.name != "nt" else self._pump_threads
+        try:
+            timed_out, killed_by_limit = pump(proc, {proc.stdout: out, proc.stderr: err}, deadline, max_lines)
+        finally:
+            proc.stdout.close()
+            proc.stderr.close()
+
+        if not timed_out and not killed_by_limit:
+            try:
+                proc.wait(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                timed_out = True
+        if timed_out or killed_by_limit:
+            self._stop(proc)
+        if not killed_by_limit:
+            # a trailing line without newline would go beyond max_lines
+            out.close()
+            err.close()
+
+        return {
+            "exit_code": proc.poll(),
+            "stdout_lines": list(out.lines),
+            "stderr_lines": list(err.lines),
+            "timed_out": timed_out,
+            "killed_by_limit": killed_by_limit,
+            "stdout_bytes": out.byte_count,
+            "stderr_bytes": err.byte_count,
+            "stdout_line_count": out.line_count,
+            "stderr_line_count": err.line_count,
+        }
+
+    @staticmethod
+    def _budget(captures, max_lines: Optional[int]) -> Optional[int]:
+        if max_lines is None:
+            return None
+        return max_lines - sum(i.line_count for i in captures)
+
+    def _pump_selectors(self, proc, streams: Dict, deadline: Optional[float], max_lines: Optional[int]):
+        """Read pipes with non-blocking fds, return (timed_out, killed_by_limit)."""
+        import selectors
+
+        with selectors.DefaultSelector() as selector:
+            for stream, capture in streams.items():
+                os.set_blocking(stream.fileno(), False)
+                selector.register(stream, selectors.EVENT_READ, capture)
+
+            while selector.get_map():
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return True, False
+                for key, _ in selector.select(remaining):
+                    try:
+                        data = os.read(key.fd, _READ_SIZE)
+                    except BlockingIOError:
+                        continue
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    if key.data.feed(data, self._budget(streams.values(), max_lines)):
+                        return False, True
+        return False, False
+
+    def _pump_threads(self, proc, streams: Dict, deadline: Optional[float], max_lines: Optional[int]):
+        """Read pipes with one blocking reader thread each, for platforms without pipe select."""
+        import queue
+        import threading
+
+        chunks: queue.Queue = queue.Queue(maxsize=64)
+
+        def _reader(stream, capture) -> None:
+            try:
+                while True:
+                    data = os.read(stream.fileno(), _READ_SIZE)
+                    chunks.put((capture, data))
+                    if not data:
+                        return
+            except OSError:
+                chunks.put((capture, b""))
+
+        for stream, capture in streams.items():
+            threading.Thread(target=_reader, args=(stream, capture), daemon=True).start()
+
+        open_streams = len(streams)
+        while open_streams:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True, False
+            try:
+                capture, data = chunks.get(timeout=remaining)
+            except queue.Empty:
+                return True, False
+            if not data:
+                open_streams -= 1
+                continue
+            if capture.feed(data, self._budget(streams.values(), max_lines)):
+                return False, True
+        return False, False
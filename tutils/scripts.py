@@ -7,28 +7,35 @@
   |- index.yaml
 """
 
-from difflib import SequenceMatcher
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Iterable, List, Optional, Dict
 from rich import print as rprint
 
+from . import timings
 from .config import get_config
+from .catalog import Catalog, get_catalog
 from .repository.repositoryindexfile import RepositoryIndexFile
-from .utils import indent_print,get_table
-from .model import RepositoryModel,ScriptModel
+from .utils import get_table,print_script_names
+from .model import AppConfig,RepositoryModel,ScriptModel
 
 
 class ScriptManager:
     """Manage and execute scripts."""
 
-    def __init__(self):
+    def __init__(self, config: Optional[AppConfig] = None, catalog: Optional[Catalog] = None):
         """
         Initialize script manager.
+        :param config: app config, the global one if None
+        :param catalog: script catalog, the global one if None
         """
 
-        config = get_config()
+        config = config if config is not None else get_config()
+        self.catalog = catalog if catalog is not None else get_catalog()
 
-        self.repository:list[RepositoryModel] = [RepositoryModel(i) for i in config.repository]
+        with timings.span("repositories", count=len(config.repository)):
+            self.repository:list[RepositoryModel] = [self.catalog.get_repository(i) for i in config.repository]
+            self.catalog.prune([i.path for i in self.repository])
+        self.catalog.save()
 
     def get_script_by_path(self,script_path:str) -> Optional[ScriptModel]:
         """
@@ -36,37 +43,51 @@ class ScriptManager:
         :param script_path: script path, like repo_name.script_name
         :return: ScriptModel instance or None if not found
         """
-        repo_name,script_name = script_path.split(".")
+        repo_name,script_name = script_path.split(".", 1)
         repo = next((i for i in self.repository if i.name == repo_name),None)
         if not repo: return None
-        scripts = repo.read_script_list()
 
-        script = next((i for i in scripts if i.name == script_name),None)
-        if not script: return None
+        # reads the index file of this script only
+        script = self.catalog.get_script(repo, script_name)
+        self.catalog.save()
         return script
 
-    def fuzzy_search(self, query: str, repo_name: Optional[List] = None, cutoff: float = 0.4) -> List[tuple]:
+    def resolve_script(self, name: str) -> Optional[ScriptModel]:
         """
-        Fuzzy search scripts by name.
+            get script by name, like script_name, repo_name.script_name or an alias
+        :param name: script name, see NameIndex
+        :return: ScriptModel instance or None if not found
+        :raise ScriptAmbiguousError: short name or alias used by several scripts
+        """
+        repositories = [i for i in self.repository if Path(i.index_file_path).exists()]
+        try:
+            with timings.span("resolve", script=name):
+                return self.catalog.resolve(repositories, name)
+        finally:
+            self.catalog.save()
+
+    def fuzzy_search(
+        self,
+        query: str,
+        repo_name: Optional[List] = None,
+        cutoff: float = 0.4,
+        fields: Iterable[str] = ("name",),
+        limit: Optional[int] = None,
+    ) -> List[tuple]:
+        """
+        Fuzzy search scripts by name, through the search index kept in the catalog.
         :param query: search query string
         :param repo_name: filter by repository names
         :param cutoff: minimum similarity score (0.0 ~ 1.0)
+        :param fields: match against these of name, description, author
+        :param limit: return top *limit* results only, all if None
         :return: list of (script_path, score) sorted by score descending
         """
-        script_list = self.list_scripts(repo_name)
-        query_lower = query.lower()
-        results = []
-        for name in script_list:
-            # only match against script name part (after the dot)
-            script_name = name.split(".", 1)[-1].lower() if "." in name else name.lower()
-            if query_lower in script_name:
-                score = 0.9 + 0.1 * (len(query) / len(script_name))
-            else:
-                score = SequenceMatcher(None, query_lower, script_name).ratio()
-            if score >= cutoff:
-                results.append((name, round(score, 3)))
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results
+        repositories = [i for i in self.repository if Path(i.index_file_path).exists()]
+        with timings.span("search", query=query):
+            index = self.catalog.get_search_index(repositories)
+            self.catalog.save()
+            return index.search(query, fields=fields, cutoff=cutoff, limit=limit, repositories=repo_name)
 
     def list_repo_scripts(self,repo_name:str) -> None:
         """show repo list"""
@@ -74,7 +95,8 @@ class ScriptManager:
         repo = next((i for i in repositories if i.name == repo_name),None)
         if not repo: return None
 
-        list_script = repo.read_script_list()
+        list_script = self.catalog.get_scripts(repo)
+        self.catalog.save()
         if not len(list_script):
             rprint(f"[bold]{repo_name}[/bold]: empty.")
             return None
@@ -100,14 +122,13 @@ class ScriptManager:
                           )
         rprint(table)
 
-    def list_scripts(self, repo_name:Optional[List] = None,printit:bool = False) -> List[str]:
+    def script_names(self, repo_name:Optional[List] = None) -> Dict[str, List[str]]:
         '''
-          list of scripts.
-        :param repo_name: if None, return all scripts, else return which want
-        :param printit: print it in console if True
-        :return: list of scripts
+          script names grouped by repository, in config order.
+        :param repo_name: if None, return all repositories, else return which want
+        :return: dict of repository name to its script names
         '''
-        scriptlist:list = []
+        names:Dict[str, List[str]] = {}
 
         repositories = [i for i in self.repository if Path(i.index_file_path).exists()]
 
@@ -117,13 +138,22 @@ class ScriptManager:
         # filter which want repo
         repositories = [i for i in repositories if i.name in repo_name]
 
-        for repo in repositories:
-            if printit: rprint(f'[bold]{repo.name}[/bold]:')
-            scripts = repo.read_script_list()
-            for script in scripts:
-                if printit:indent_print(script.name)
-                scriptlist.append(f'{repo.name}.{script.name}')
-        return scriptlist
+        with timings.span("list", count=len(repositories)):
+            for repo in repositories:
+                names.setdefault(repo.name, []).extend(i.name for i in self.catalog.get_script_handles(repo))
+        self.catalog.save()
+        return names
+
+    def list_scripts(self, repo_name:Optional[List] = None,printit:bool = False) -> List[str]:
+        '''
+          list of scripts.
+        :param repo_name: if None, return all scripts, else return which want
+        :param printit: print it in console if True
+        :return: list of scripts
+        '''
+        names = self.script_names(repo_name)
+        if printit: print_script_names(names)
+        return [f'{repo}.{name}' for repo, scripts in names.items() for name in scripts]
 
     def list_repo(self,printit:bool = False) -> List[RepositoryModel]:
         """
@@ -0,0 +1,152 @@
+"""
+    N-gram inverted index for fuzzy script search.
+
+ Scores are the same as a full scan: a query contained in the text scores
+ ``0.9 + 0.1 * len(query) / len(text)``, anything else scores its
+ ``difflib.SequenceMatcher`` ratio.
+
+ Every text containing the query is found through its trigrams. Fuzzy
+ matches are only scored for the MAX_CANDIDATES texts sharing most trigrams
+ and bigrams with the query, so a lookup does not touch every script. Indexes not larger
+ than that are scanned, giving exactly the results of a full scan.
+"""
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+FIELDS = ("name", "description", "author")
+
+# texts scored per field for fuzzy (non substring) matches
+MAX_CANDIDATES = 512
+
+
+def _grams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _padded_trigrams(text: str) -> Set[str]:
+    """Trigrams of *text* padded at both ends, so short prefixes still match."""
+    return _grams(f"\0\0{text}\0", 3)
+
+
+def score_text(query: str, text: str, cutoff: float = 0.0) -> float:
+    """
+    Score how well lower case *query* matches lower case *text*.
+    :return: score (0.0 ~ 1.0), 0.0 if it can not reach *cutoff*
+    """
+    if not text:
+        return 0.0
+    if query in text:
+        return 0.9 + 0.1 * (len(query) / len(text))
+    matcher = SequenceMatcher(None, query, text)
+    # cheap upper bounds first, they never drop a match reaching cutoff
+    if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+        return 0.0
+    return matcher.ratio()
+
+
+class SearchIndex:
+    """
+    Inverted index of script name, description and author n-grams.
+
+    Usage::
+
+        index = SearchIndex([{"path": "File.tcount", "repository": "File", "name": "tcount"}])
+        index.search("tcont")
+        # [("File.tcount", 0.833)]
+    """
+
+    def __init__(self, docs: Iterable[Dict[str, str]]):
+        """
+        :param docs: dicts with keys path (repo.script), repository and FIELDS.
+        """
+        self.paths: List[str] = []
+        self.repositories: List[str] = []
+        self.texts: Dict[str, List[str]] = {field: [] for field in FIELDS}
+        # field -> gram -> doc ids
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in FIELDS}
+
+        for doc_id, doc in enumerate(docs):
+            self.paths.append(doc["path"])
+            self.repositories.append(doc.get("repository", ""))
+            for field in FIELDS:
+                text = (doc.get(field) or "").lower()
+                self.texts[field].append(text)
+                grams = _padded_trigrams(text) | _grams(text, 2)
+                if field == "name":
+                    # one character queries are looked up by their character
+                    grams |= _grams(text, 1)
+                postings = self.postings[field]
+                for gram in grams:
+                    postings.setdefault(gram, []).append(doc_id)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _candidates(self, query: str, field: str, repositories: Optional[Set[str]] = None) -> Iterable[int]:
+        """Return doc ids which may match *query* in *field*, fuzzy ones of *repositories* only if given."""
+        if len(self.paths) <= MAX_CANDIDATES:
+            return range(len(self.paths))
+        postings = self.postings[field]
+        if len(query) == 1 and field != "name":
+            return range(len(self.paths))
+
+        # every text containing the query contains all of its n-grams
+        substring: Optional[Set[int]] = None
+        for gram in _grams(query, min(len(query), 3)):
+            ids = set(postings.get(gram, ()))
+            substring = ids if substring is None else substring & ids
+            if not substring:
+                break
+
+        # single characters are in nearly every text, rank by them only when the query is that short
+        grams = _padded_trigrams(query) | _grams(query, 2)
+        if len(query) <= 2:
+            grams |= _grams(query, 1)
+        counter: Counter = Counter()
+        for gram in grams:
+            ids = postings.get(gram, ())
+            if repositories is not None:
+                # filter before ranking, other repositories must not take the candidate slots
+                ids = [i for i in ids if self.repositories[i] in repositories]
+            counter.update(ids)
+        fuzzy = {doc_id for doc_id, _ in counter.most_common(MAX_CANDIDATES)}
+        return fuzzy | (substring or set())
+
+    def search(
+        self,
+        query: str,
+        fields: Iterable[str] = ("name",),
+        cutoff: float = 0.4,
+        limit: Optional[int] = None,
+        repositories: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Fuzzy search scripts.
+        :param query: search query string
+        :param fields: fields to match against, score is the best of them
+        :param cutoff: minimum similarity score (0.0 ~ 1.0)
+        :param limit: return top *limit* results only, all if None
+        :param repositories: filter by repository names
+        :return: list of (script_path, score) sorted by score descending
+        """
+        query = query.lower()
+        if not query:
+            return []
+        repositories = set(repositories) if repositories is not None else None
+
+        scores: Dict[int, float] = {}
+        for field in fields:
+            texts = self.texts[field]
+            for doc_id in self._candidates(query, field, repositories):
+                if repositories is not None and self.repositories[doc_id] not in repositories:
+                    continue
+                score = score_text(query, texts[doc_id], cutoff)
+                if score >= cutoff and score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+
+        # same order as a scan of the script list for equal scores
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        if limit:
+            ranked = ranked[:limit]
+        return [(self.paths[i], round(score, 3)) for i, score in ranked]
@@ -0,0 +1,214 @@
+"""
+    Span timings of a command, for finding where the time goes.
+
+ Enabled by ``--timings`` or the ``TUTILS_TIMINGS`` env var. Code marks the
+ interesting steps (config load, repository discovery, script index reads,
+ script resolution, downloads, the script run) with::
+
+    with timings.span("config.load", path=str(path)):
+        ...
+
+ which costs one flag check while timings are off. At exit the span tree is
+ printed to stderr, spans with the same name under the same parent merged.
+
+ ``--trace FILE`` (``TUTILS_TRACE``) also writes the spans as Chrome trace
+ JSON, for chrome://tracing or https://ui.perfetto.dev, and ``--profile FILE``
+ (``TUTILS_PROFILE``) dumps cProfile stats of the main thread, for
+ ``python -m pstats FILE``. ``TUTILS_TIMINGS`` set to anything other than
+ 1/true/yes/on is used as a path to write a JSON report to instead of
+ printing it.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+ENV_NAME = "TUTILS_TIMINGS"
+TRACE_ENV_NAME = "TUTILS_TRACE"
+PROFILE_ENV_NAME = "TUTILS_PROFILE"
+
+_enabled = False
+_root: Optional["Span"] = None
+_local = threading.local()
+_trace_path: Optional[str] = None
+_profiler = None
+_profile_path: Optional[str] = None
+
+
+class Span:
+    """One timed step, with the steps it contains."""
+
+    __slots__ = ("name", "attrs", "start", "end", "thread", "children")
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.end: Optional[float] = None
+        self.thread = threading.get_ident()
+        self.children: List["Span"] = []
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def set(self, **attrs) -> None:
+        """Add attributes known only inside the span, like a result count."""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        stack = _stack()
+        # spans of worker threads hang off the root
+        parent = stack[-1] if stack else _root
+        parent.children.append(self)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+
+
+class _NullSpan:
+    """Span used while timings are off."""
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+def _stack() -> List[Span]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **attrs):
+    """
+        time a step as a context manager, a no-op while timings are off.
+    :param name: step name, like config.load; siblings of the same name are merged in the report
+    :param attrs: details shown in the trace, like a path or url
+    """
+    if not _enabled:
+        return _NULL
+    return Span(name, attrs)
+
+
+def install(trace: Optional[str] = None, profile: Optional[str] = None) -> None:
+    """
+        start recording spans under a root span, report them at exit.
+    :param trace: path to write Chrome trace JSON to
+    :param profile: path to dump cProfile stats to
+    """
+    global _enabled, _root, _trace_path, _profiler, _profile_path
+    if _enabled:
+        return
+    _trace_path = trace
+    _root = Span("tutils", {"argv": " ".join(sys.argv[1:])})
+    _root.start = time.perf_counter()
+    _stack().append(_root)
+    _enabled = True
+    if profile:
+        import cProfile
+
+        _profile_path = profile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(report)
+
+
+def _merged(spans: List[Span]) -> List[tuple]:
+    """Merge siblings by name: (name, count, total seconds, spans) in first-start order."""
+    groups: Dict[str, list] = {}
+    for item in spans:
+        group = groups.setdefault(item.name, [item.name, 0, 0.0, []])
+        group[1] += 1
+        group[2] += item.duration
+        group[3].append(item)
+    return [tuple(i) for i in groups.values()]
+
+
+def _lines(spans: List[Span], total: float, depth: int, lines: List[str]) -> None:
+    for name, count, seconds, items in _merged(spans):
+        label = f"{name} x{count}" if count > 1 else name
+        if count == 1 and items[0].attrs:
+            label += "  " + " ".join(f"{k}={v}" for k, v in items[0].attrs.items())
+        share = seconds / total * 100 if total else 0.0
+        lines.append(f"{seconds * 1000:>10.1f} ms {share:>5.1f}%  {'  ' * depth}{label}")
+        _lines([c for i in items for c in i.children], total, depth + 1, lines)
+
+
+def _as_dict(item: Span) -> Dict:
+    return {
+        "name": item.name,
+        "ms": round(item.duration * 1000, 3),
+        "attrs": item.attrs,
+        "children": [_as_dict(i) for i in item.children],
+    }
+
+
+def _trace_events(item: Span, origin: float, events: List[Dict]) -> None:
+    events.append({
+        "name": item.name,
+        "ph": "X",
+        "ts": round((item.start - origin) * 1e6, 3),
+        "dur": round(item.duration * 1e6, 3),
+        "pid": os.getpid(),
+        "tid": item.thread,
+        "args": {k: str(v) for k, v in item.attrs.items()},
+    })
+    for child in item.children:
+        _trace_events(child, origin, events)
+
+
+def report() -> None:
+    """Stop recording, print the span tree and write the trace and profile files."""
+    global _enabled
+    if _root is None or not _enabled:
+        return
+    _enabled = False
+    _root.end = time.perf_counter()
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_profile_path)
+
+    if _trace_path:
+        events: List[Dict] = []
+        _trace_events(_root, _root.start, events)
+        with open(_trace_path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    target = os.environ.get(ENV_NAME, "")
+    if target and target.lower() not in ("1", "true", "yes", "on"):
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(_as_dict(_root), f, indent=2)
+        return
+
+    lines = [f"Timings: {_root.duration * 1000:.1f} ms", f"{'time':>13} {'share':>6}  span"]
+    _lines([_root], _root.duration, 0, lines)
+    if _trace_path:
+        lines.append(f"Chrome trace written to {_trace_path}")
+    if _profiler is not None:
+        lines.append(f"cProfile stats written to {_profile_path}, see: python -m pstats {_profile_path}")
+    print("\n".join(lines), file=sys.stderr)
@@ -1,14 +1,23 @@
 """Utility functions for the package."""
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse, urlunparse
 import posixpath
+import errno
+import hashlib
+import http.client
+import json
+import os
 import socket
 import urllib.request
 import urllib.error
+import zlib
 from rich.console import Console
 from rich.padding import Padding
 from rich.progress import Progress, BarColumn, DownloadColumn, TransferSpeedColumn, TimeRemainingColumn
 from . import const as C
+from . import timings
+from .httpclient import ConnectionPool, get_pool
 from rich.table import Table
 from rich import box
 import shutil
@@ -16,6 +25,14 @@ import shutil
 def indent_print(content: str):
     Console().print(Padding(content, (0, 0, 0, 4)))
 
+def print_script_names(names: Dict[str, List[str]]) -> None:
+    """print script names grouped by repository, see ScriptManager.script_names()"""
+    console = Console()
+    for repo, scripts in names.items():
+        console.print(f'[bold]{repo}[/bold]:')
+        for name in scripts:
+            console.print(Padding(name, (0, 0, 0, 4)))
+
 def get_table(title:str=None) -> Table:
     if title is None:
         table = Table(
@@ -97,52 +114,242 @@ _NO_CACHE_HEADERS = {
 }
 
 
-def download_file(url: str, dest: Path, chunk_size: int = 8192) -> Path:
+def download_file(
+    url: str,
+    dest: Path,
+    chunk_size: int = C.DOWNLOAD_READ_SIZE,
+    pool: Optional[ConnectionPool] = None,
+    show_progress: bool = True,
+    part: Optional[Path] = None,
+) -> Path:
     """Download a file from *url* to *dest* with a Rich progress bar.
 
     Sends no-cache headers to bypass CDN caching (e.g. GitHub raw content).
+    Connections are kept alive and reused through *pool*.
+
+    The body is written to a ``.part`` file first, which replaces *dest* when
+    complete. If the download breaks, the ``.part`` file is kept and the next
+    download of *url* resumes it with a ``Range`` request, guarded by
+    ``If-Range`` so a file changed upstream meanwhile is downloaded anew.
+    Responses are asked for with ``Accept-Encoding: gzip`` and decompressed
+    while they stream in; a gzip response cannot be resumed, servers compress
+    text files only, so large binary files stay resumable.
 
-    :param url:        Remote file URL.
-    :param dest:       Local destination path (file, not directory).
-    :param chunk_size: Read chunk size in bytes.
-    :returns:          Resolved path of the downloaded file.
-    :raises OSError:            If the destination directory cannot be created or written to.
-    :raises requests.HTTPError: If the server returns an error status.
-    :raises ValueError:         If the server returns HTML instead of a file.
+    :param url:           Remote file URL.
+    :param dest:          Local destination path (file, not directory).
+    :param chunk_size:    First read size in bytes, doubled up to 4 MiB while reads fill it.
+    :param pool:          Connection pool to use, the global one if None.
+    :param show_progress: Show a progress bar, disable it when downloading concurrently.
+    :param part:          Partial download file, ``<dest>.part`` if None.
+    :returns:             Resolved path of the downloaded file.
+    :raises OSError:                If the destination directory cannot be created or written to.
+    :raises urllib.error.HTTPError: If the server returns an error status.
+    :raises ValueError:             If the server returns HTML instead of a file.
     """
     dest = dest.expanduser().resolve()
+    _download(url, dest, _NO_CACHE_HEADERS, chunk_size, pool, show_progress, part)
+    return dest
+
+
+def download_if_modified(
+    url: str,
+    dest: Path,
+    validators: Optional[Dict[str, str]] = None,
+    chunk_size: int = C.DOWNLOAD_READ_SIZE,
+    pool: Optional[ConnectionPool] = None,
+    show_progress: bool = False,
+    part: Optional[Path] = None,
+) -> Optional[Dict[str, str]]:
+    """Download *url* to *dest* unless it is unchanged since *validators*.
+
+    Sends ``If-None-Match`` / ``If-Modified-Since`` built from the ``etag`` /
+    ``last_modified`` of a previous download. See :func:`download_file`.
+
+    :param validators: ``etag`` and ``last_modified`` of the previous download, or None.
+    :returns:          New validators and the ``sha256`` of the file, hashed while
+                       it was written, if downloaded; None if the server answered 304.
+    """
+    headers = conditional_headers(validators)
+    result = _download(url, dest.expanduser().resolve(), headers, chunk_size, pool, show_progress, part)
+    if result is None:
+        return None
+    response_headers, digest = result
+    return {
+        "etag": response_headers.get("ETag", ""),
+        "last_modified": response_headers.get("Last-Modified", ""),
+        "sha256": digest,
+    }
+
+
+def conditional_headers(validators: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Return no-cache request headers, conditional on ``etag`` / ``last_modified`` of a previous download."""
+    headers = dict(_NO_CACHE_HEADERS)
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def _part_validator(part: Path, url: str) -> str:
+    """Return the validator a partial download of *url* was started with, empty if it cannot be resumed."""
+    try:
+        with open(f"{part}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("url") == url and part.stat().st_size > 0:
+            return meta.get("validator", "")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return ""
+
+
+class _RangeMismatch(ValueError):
+    """A partial response that does not continue the partial file."""
+
+
+def _range_start(content_range: str) -> Optional[int]:
+    """Return the first byte position of a ``Content-Range: bytes <first>-<last>/<length>`` header."""
+    unit, _, spec = content_range.strip().partition(" ")
+    first, sep, _ = spec.partition("-")
+    if unit.lower() != "bytes" or not sep or not first.strip().isdigit():
+        return None
+    return int(first)
+
+
+def _discard_part(part: Path) -> None:
+    part.unlink(missing_ok=True)
+    Path(f"{part}.json").unlink(missing_ok=True)
+
+
+def _copy_stream(response, f, digest, decompressor, chunk_size: int, advance) -> None:
+    """Copy *response* to *f* through one reused buffer, hashing what is written."""
+    buffer = memoryview(bytearray(C.DOWNLOAD_MAX_READ_SIZE))
+    size = max(1, min(chunk_size, C.DOWNLOAD_MAX_READ_SIZE))
+    while True:
+        count = response.readinto(buffer[:size])
+        if not count:
+            break
+        data = buffer[:count] if decompressor is None else decompressor.decompress(buffer[:count])
+        f.write(data)
+        digest.update(data)
+        if advance is not None:
+            advance(count)
+        if count == size and size < C.DOWNLOAD_MAX_READ_SIZE:
+            # the connection keeps up, read more per call
+            size = min(size * 2, C.DOWNLOAD_MAX_READ_SIZE)
+    if decompressor is not None:
+        data = decompressor.flush()
+        f.write(data)
+        digest.update(data)
+
+
+def _download(
+    url: str,
+    dest: Path,
+    headers: Dict[str, str],
+    chunk_size: int,
+    pool: Optional[ConnectionPool],
+    show_progress: bool,
+    part: Optional[Path] = None,
+) -> Optional[Tuple[http.client.HTTPMessage, str]]:
+    """Stream *url* into *dest* through a ``.part`` file, return response headers and sha256, or None on 304."""
     dest.parent.mkdir(parents=True, exist_ok=True)
-    req = urllib.request.Request(url, headers=_NO_CACHE_HEADERS)
+    pool = pool or get_pool()
+    part = Path(part) if part is not None else dest.with_name(f"{dest.name}.part")
+    part.parent.mkdir(parents=True, exist_ok=True)
+
+    request_headers = {**headers, "Accept-Encoding": "gzip"}
+    validator = _part_validator(part, url)
+    offset = part.stat().st_size if validator else 0
+    if offset:
+        # a range of gzip encoded bytes could not be appended to decoded ones
+        request_headers.update({"Range": f"bytes={offset}-", "If-Range": validator, "Accept-Encoding": "identity"})
+
+    resumable = False
     try:
-        with urllib.request.urlopen(req, timeout=30) as response:
+        with timings.span("download", url=url), pool.open(url, headers=request_headers) as response:
+            if response.status == 304:
+                response.read()
+                return None
             content_type = response.headers.get("Content-Type", "")
             if "text/html" in content_type:
                 raise ValueError(f"Unexpected HTML response from: {url}")
-            total = int(response.headers.get("Content-Length", 0)) or None
-
-            with Progress(
-                "[progress.description]{task.description}",
-                BarColumn(),
-                DownloadColumn(),
-                TransferSpeedColumn(),
-                TimeRemainingColumn(),
-            ) as progress:
-                task = progress.add_task(f"[cyan]{dest.name}", total=total)
-
-                with open(dest, "wb") as f:
-                    while True:
-                        chunk = response.read(chunk_size)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                        progress.advance(task, len(chunk))
-
-    except Exception:
-        if dest.exists():
-            dest.unlink()
-        raise
 
-    return dest
+            if response.status == 206 and (
+                not offset or _range_start(response.headers.get("Content-Range", "")) != offset
+            ):
+                raise _RangeMismatch(f"Unexpected partial response from {url}: {response.headers.get('Content-Range')}")
+
+            digest = hashlib.sha256()
+            if response.status == 206:
+                # hash what is already there, then append
+                with open(part, "rb") as f:
+                    while chunk := f.read(C.DOWNLOAD_MAX_READ_SIZE):
+                        digest.update(chunk)
+                mode = "ab"
+            else:
+                offset = 0
+                mode = "wb"
+
+            encoding = response.headers.get("Content-Encoding", "").strip().lower()
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding in ("gzip", "x-gzip") else None
+            etag = response.headers.get("ETag", "")
+            # weak etags can't be used in If-Range
+            validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified", "")
+            resumable = decompressor is None and bool(validator)
+            if resumable:
+                with open(f"{part}.json", "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "validator": validator}, f)
+            else:
+                Path(f"{part}.json").unlink(missing_ok=True)
+            length = int(response.headers.get("Content-Length", 0))
+            total = offset + length if length and decompressor is None else None
+
+            with open(part, mode) as f:
+                if not show_progress:
+                    _copy_stream(response, f, digest, decompressor, chunk_size, None)
+                else:
+                    with Progress(
+                        "[progress.description]{task.description}",
+                        BarColumn(),
+                        DownloadColumn(),
+                        TransferSpeedColumn(),
+                        TimeRemainingColumn(),
+                    ) as progress:
+                        task = progress.add_task(f"[cyan]{dest.name}", total=total, completed=offset)
+                        _copy_stream(response, f, digest, decompressor, chunk_size,
+                                     lambda n: progress.advance(task, n))
+
+        try:
+            os.replace(part, dest)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # part on another file system
+            shutil.move(str(part), str(dest))
+        Path(f"{part}.json").unlink(missing_ok=True)
+        return response.headers, digest.hexdigest()
+
+    except urllib.error.HTTPError as e:
+        _discard_part(part)
+        if e.code == 416 and offset:
+            # the partial file does not fit the remote file anymore, start over
+            return _download(url, dest, headers, chunk_size, pool, show_progress, part)
+        raise
+    except _RangeMismatch:
+        _discard_part(part)
+        if offset:
+            # not the range asked for, download the whole file instead
+            return _download(url, dest, headers, chunk_size, pool, show_progress, part)
+        raise
+    except zlib.error as e:
+        _discard_part(part)
+        raise ValueError(f"Invalid gzip response from {url}: {e}") from e
+    except BaseException:
+        if not resumable:
+            _discard_part(part)
+        raise
 
 
 def is_url_status_ok(url: str) -> bool:
@@ -0,0 +1,403 @@
+"""
+    Warm interpreter worker, runs scripts without paying python startup.
+
+ A worker daemon imports the modules scripts commonly use (typer, rich, ...)
+ once, then listens on a Unix socket. For every run it forks a handler which
+ forks the script process, so each script starts from the same clean, warm
+ state. The client passes its stdin/stdout/stderr (or pipes) over the socket,
+ together with argv, cwd and environment, so a script behaves as if it was
+ started by ``subprocess.Popen``.
+
+ The daemon is started on first use and exits after being idle for a while.
+ Interpreter startup reads ``PYTHON*`` variables (PYTHONPATH, PYTHONHASHSEED,
+ PYTHONUTF8, ...), so there is one daemon per interpreter and set of those
+ variables, and a script whose variables differ from the daemon's is not
+ forked from it.
+ POSIX only; ``WarmPool.connect()`` returns None elsewhere and callers fall
+ back to a normal subprocess.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import IO, Dict, List, Optional
+
+from . import const as C
+
+# seconds to wait for a freshly started daemon to listen
+_START_TIMEOUT = 5.0
+
+
+def is_supported() -> bool:
+    """Check if this platform can pass file descriptors over Unix sockets."""
+    return os.name == "posix" and hasattr(socket, "send_fds")
+
+
+def _interpreter_env(env: Dict[str, str]) -> Dict[str, str]:
+    """Return the variables of *env* python reads at startup, they can't change after fork."""
+    return {k: v for k, v in env.items() if k.startswith("PYTHON")}
+
+
+def _send(conn: socket.socket, message: Dict, fds: Optional[List[int]] = None) -> None:
+    data = json.dumps(message).encode("utf-8") + b"\n"
+    if fds:
+        socket.send_fds(conn, [data], fds)
+    else:
+        conn.sendall(data)
+
+
+class _Reader:
+    """Read newline delimited JSON messages from a socket."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.buffer = bytearray()
+        self.fds: List[int] = []
+
+    def read(self, timeout: Optional[float] = None, max_fds: int = 0) -> Dict:
+        """
+        Read one message.
+        :raise TimeoutError: no full message arrived within *timeout*
+        :raise ConnectionError: peer closed the connection
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            if deadline is not None:
+                self.conn.settimeout(max(0.0, deadline - time.monotonic()))
+            else:
+                self.conn.settimeout(None)
+            try:
+                if max_fds:
+                    data, fds, _, _ = socket.recv_fds(self.conn, 64 * 1024, max_fds)
+                    self.fds += fds
+                else:
+                    data = self.conn.recv(64 * 1024)
+            except (socket.timeout, BlockingIOError):
+                raise TimeoutError from None
+            if not data:
+                raise ConnectionError("worker connection closed")
+            self.buffer += data
+        line, _, rest = bytes(self.buffer).partition(b"\n")
+        self.buffer = bytearray(rest)
+        return json.loads(line)
+
+
+class WarmProcess:
+    """
+    Handle of a script forked by the worker, with the parts of the
+    ``subprocess.Popen`` interface ProcessRunner uses.
+    """
+
+    def __init__(self, conn: socket.socket, args: List[str]):
+        self.args = args
+        self.conn = conn
+        self.reader = _Reader(conn)
+        self.returncode: Optional[int] = None
+        self.stdout = None
+        self.stderr = None
+        self.pid: int = self.reader.read(_START_TIMEOUT)["pid"]
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                self._set_result(self.reader.read(0))
+            except TimeoutError:
+                pass
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        if self.returncode is None:
+            try:
+                self._set_result(self.reader.read(timeout))
+            except TimeoutError:
+                raise subprocess.TimeoutExpired(self.args, timeout) from None
+            except KeyboardInterrupt:
+                # the script is not in our process group, pass Ctrl+C on
+                self.send_signal(signal.SIGINT)
+                raise
+        return self.returncode
+
+    def _set_result(self, message: Dict) -> None:
+        self.returncode = message["exit_code"]
+        self.conn.close()
+
+    def send_signal(self, sig: int) -> None:
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+
+class WarmPool:
+    """
+    Client of the warm worker daemon.
+
+    Usage::
+
+        pool = WarmPool()
+        proc = pool.spawn([sys.executable, "script.py", "arg"], os.environ.copy(), os.getcwd())
+        proc.wait()
+    """
+
+    def __init__(self, socket_path: Optional[Path] = None, exe: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None):
+        """
+        :param socket_path: daemon socket, one per interpreter and ``PYTHON*`` variables under ~/.tutils/run if None
+        :param exe: python interpreter of the daemon, sys.executable if None
+        :param env: environment whose ``PYTHON*`` variables the daemon starts with, os.environ if None
+        """
+        self.exe = exe or sys.executable
+        self.interpreter_env = _interpreter_env(env if env is not None else os.environ)
+        if socket_path is None:
+            key = json.dumps([self.exe, sorted(self.interpreter_env.items())])
+            digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+            socket_path = C.RUN_DIR / f"worker-{digest}.sock"
+        self.socket_path = Path(socket_path)
+
+    def connect(self, start: bool = True) -> Optional[socket.socket]:
+        """
+            connect to the daemon, start it first if needed and *start*.
+        :return: connected socket, None if the daemon is not available
+        """
+        if not is_supported():
+            return None
+        conn = self._connect()
+        if conn is not None or not start:
+            return conn
+
+        self.start()
+        deadline = time.monotonic() + _START_TIMEOUT
+        while time.monotonic() < deadline:
+            conn = self._connect()
+            if conn is not None:
+                return conn
+            time.sleep(0.02)
+        return None
+
+    def _connect(self) -> Optional[socket.socket]:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(str(self.socket_path))
+        except OSError:
+            conn.close()
+            return None
+        return conn
+
+    def start(self) -> None:
+        """Start the daemon in background, it exits at once if one is running."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.socket_path.parent, 0o700)
+        env = {k: v for k, v in os.environ.items() if not k.startswith("PYTHON")}
+        env.update(self.interpreter_env)
+        subprocess.Popen(
+            [self.exe, "-m", "tutils.warmpool", str(self.socket_path)],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+    def spawn(self, cmd: List[str], env: Dict[str, str], cwd: str, stdout=None, stderr=None) -> Optional[WarmProcess]:
+        """
+            run *cmd* (interpreter, script, args) in a forked warm interpreter.
+        :param env: environment of the script
+        :param cwd: working directory of the script
+        :param stdout: None to share ours, or subprocess.PIPE
+        :param stderr: None to share ours, or subprocess.PIPE
+        :return: WarmProcess, None if the daemon is not available or *env* changes how python starts
+        """
+        if _interpreter_env(env) != self.interpreter_env:
+            return None
+        conn = self.connect()
+        if conn is None:
+            return None
+
+        fds = [0, 1, 2]
+        pipes = {}
+        for fd, mode in ((1, stdout), (2, stderr)):
+            if mode == subprocess.PIPE:
+                r, w = os.pipe()
+                pipes[fd] = r
+                fds[fd] = w
+        try:
+            _send(conn, {"op": "run", "argv": cmd[1:], "env": env, "cwd": str(cwd)}, fds)
+            proc = WarmProcess(conn, cmd)
+        except BaseException:
+            conn.close()
+            for r in pipes.values():
+                os.close(r)
+            raise
+        finally:
+            for fd, w in enumerate(fds):
+                if w != fd:
+                    os.close(w)
+
+        if 1 in pipes:
+            proc.stdout = os.fdopen(pipes[1], "rb")
+        if 2 in pipes:
+            proc.stderr = os.fdopen(pipes[2], "rb")
+        return proc
+
+    def request(self, op: str) -> Optional[Dict]:
+        """
+            send control request *op* (ping, stop) to a running daemon.
+        :return: reply dict, None if no daemon is running
+        """
+        conn = self.connect(start=False)
+        if conn is None:
+            return None
+        with conn:
+            _send(conn, {"op": op})
+            try:
+                return _Reader(conn).read(_START_TIMEOUT)
+            except (TimeoutError, ConnectionError):
+                return None
+
+
+# ==================== daemon ====================
+
+def _reopen_stdio() -> None:
+    """Recreate sys.std* for fds 0-2, buffering depends on whether they are terminals now."""
+    sys.stdin = sys.__stdin__ = open(0, "r", closefd=False)
+    sys.stdout = sys.__stdout__ = open(1, "w", buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = sys.__stderr__ = open(2, "w", buffering=1, errors="backslashreplace", closefd=False)
+
+
+def _run_script(argv: List[str]) -> int:
+    """Run script like ``python script.py args``, return its exit code."""
+    import runpy
+    import traceback
+
+    sys.argv = list(argv)
+    sys.path[0] = os.path.dirname(os.path.abspath(argv[0]))
+    try:
+        runpy.run_path(argv[0], run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    return code
+
+
+def _handle(listener: socket.socket, lock: IO, conn: socket.socket, request: Dict, fds: List[int]) -> None:
+    """Handler process: fork the script, report its pid and exit code, never returns."""
+    listener.close()
+    # a fork shares the flock, a new daemon could not start while scripts run
+    lock.close()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    try:
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            for fd in fds:
+                if fd > 2:
+                    os.close(fd)
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            _reopen_stdio()
+            os._exit(_run_script(request["argv"]))
+
+        for fd in fds:
+            os.close(fd)
+        conn.settimeout(None)
+        _send(conn, {"pid": pid})
+        _, status = os.waitpid(pid, 0)
+        _send(conn, {"exit_code": os.waitstatus_to_exitcode(status)})
+    finally:
+        os._exit(0)
+
+
+def serve(socket_path: Path, idle_timeout: float = C.WORKER_IDLE_TIMEOUT, preload=C.WORKER_PRELOAD) -> None:
+    """
+        run the worker daemon until it is idle for *idle_timeout* seconds or stopped.
+    :param socket_path: Unix socket to listen on
+    :param preload: modules imported once, shared by every script run
+    """
+    import fcntl
+    import importlib
+
+    socket_path = Path(socket_path)
+    lock = open(socket_path.with_name(socket_path.name + ".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # another daemon serves this socket
+        return
+
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+    socket_path.unlink(missing_ok=True)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path))
+    os.chmod(socket_path, 0o600)
+    listener.listen(64)
+    listener.settimeout(idle_timeout)
+    # handlers are never waited for
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    try:
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                break
+            with conn:
+                try:
+                    reader = _Reader(conn)
+                    request = reader.read(_START_TIMEOUT, max_fds=3)
+                except (TimeoutError, ConnectionError, ValueError):
+                    continue
+                op = request.get("op")
+                if op == "run" and len(reader.fds) == 3:
+                    if os.fork() == 0:
+                        _handle(listener, lock, conn, request, reader.fds)
+                elif op == "ping":
+                    _send(conn, {"pid": os.getpid(), "preload": list(preload)})
+                elif op == "stop":
+                    _send(conn, {"pid": os.getpid()})
+                    break
+                for fd in reader.fds:
+                    os.close(fd)
+    finally:
+        listener.close()
+        socket_path.unlink(missing_ok=True)
+        lock.close()
+
+
+if __name__ == "__main__":
+    serve(Path(sys.argv[1]))
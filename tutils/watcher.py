@@ -0,0 +1,251 @@
+"""
+    Watch repositories and keep the script catalog up to date.
+
+ The watcher waits for changes of the configured repository folders and
+ their script folders (inotify on Linux, polling elsewhere), refreshes only
+ the changed repositories in the catalog, precomputes the search and name
+ indexes and saves the catalog file.
+
+ While it runs it keeps a heartbeat file under ``~/.tutils/run``. Other
+ tutils commands then trust the catalog file and skip checking index files.
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import const as C
+
+
+def is_running(pid_file: Optional[Path] = None) -> bool:
+    """Check if a watcher keeps the catalog up to date, by its heartbeat file."""
+    pid_file = Path(pid_file) if pid_file is not None else C.WATCHER_PID_FILE
+    try:
+        st = pid_file.stat()
+        pid = int(pid_file.read_text(encoding="utf-8").strip() or 0)
+    except (OSError, ValueError):
+        return False
+    if time.time() - st.st_mtime > 3 * C.WATCHER_HEARTBEAT or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # exists, owned by someone else
+        pass
+    return True
+
+
+class _Inotify:
+    """Minimal inotify binding through ctypes, directory watches only."""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+            | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory
+        self.watches: Dict[int, str] = {}
+
+    def add(self, path: str) -> None:
+        wd = self._add(self.fd, os.fsencode(path), self.MASK)
+        if wd >= 0:
+            self.watches[wd] = path
+
+    def remove_all(self) -> None:
+        for wd in list(self.watches):
+            self._rm(self.fd, wd)
+        self.watches.clear()
+
+    def read(self, timeout: float) -> Set[str]:
+        """Wait up to *timeout* seconds, return directories with changes."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        changed: Set[str] = set()
+        while ready:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, pos)
+                pos += self._EVENT.size + length
+                path = self.watches.get(wd)
+                if path is not None:
+                    changed.add(path)
+                if mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+            # let an editor finish its save (write, rename, chmod) before refreshing
+            ready, _, _ = select.select([self.fd], [], [], 0.05)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class CatalogWatcher:
+    """
+    Keep the catalog file up to date while repositories change.
+
+    Usage::
+
+        watcher = CatalogWatcher()
+        watcher.run()  # until stop() is called or Ctrl+C
+    """
+
+    def __init__(self, catalog=None, poll: bool = False, interval: float = C.WATCH_INTERVAL,
+                 pid_file: Optional[Path] = None, config_path: Optional[Path] = None):
+        """
+        :param catalog: Catalog to keep up to date, a new untrusted one on the default file if None
+        :param poll: poll index files every *interval* seconds instead of using inotify
+        :param interval: polling interval in seconds
+        :param pid_file: heartbeat file, ~/.tutils/run/watcher.pid if None
+        :param config_path: config file listing the repositories, ~/.tutils/config.yaml if None
+        """
+        from .catalog import Catalog
+
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.interval = interval
+        self.pid_file = Path(pid_file) if pid_file is not None else C.WATCHER_PID_FILE
+        self.config_path = config_path
+        self._stop = threading.Event()
+        self._inotify: Optional[_Inotify] = None
+        if not poll and os.name == "posix":
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+        self._config_stamp: Optional[Tuple[int, int]] = None
+        self._config_dir = str(C.CONFIG_DIR)
+        self._configs: List[dict] = []
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _load_configs(self) -> bool:
+        """Reload configured repositories if config file changed, return True if it did."""
+        from .config import ConfigManager
+
+        cm = ConfigManager(self.config_path)
+        try:
+            st = os.stat(cm.config_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._config_stamp:
+            return False
+        self._config_stamp = stamp
+        self._config_dir = str(cm.config_dir)
+        self._configs = list(cm.config.repository)
+        return True
+
+    def sync(self, paths: Optional[Set[str]] = None) -> bool:
+        """
+            refresh repositories in the catalog and save it if anything changed.
+        :param paths: repository paths to refresh, all if None
+        :return: True if the catalog changed
+        """
+        repos = [self.catalog.get_repository(i) for i in self._configs]
+        self.catalog.prune([i.path for i in repos])
+        # same repositories as ScriptManager indexes
+        repos = [i for i in repos if Path(i.index_file_path).exists()]
+        changed = self.catalog.refresh(repos, paths)
+        self.catalog.save()
+        return changed
+
+    def _watch_dirs(self) -> Dict[str, str]:
+        """Return directories to watch, mapped to their repository path."""
+        dirs = {self._config_dir: ""}
+        for config in self._configs:
+            path = config["path"]
+            dirs[path] = path
+            entry = self.catalog.entries.get(path)
+            for folder in entry["scripts"] if entry is not None else ():
+                dirs[str(Path(path) / folder)] = path
+        return dirs
+
+    def _heartbeat(self) -> None:
+        self.pid_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.pid_file.with_name(f"{self.pid_file.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(str(os.getpid()), encoding="utf-8")
+        os.replace(tmp_path, self.pid_file)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, on_change=None) -> None:
+        """
+            watch until stop() is called.
+        :param on_change: called with the refreshed repository paths (None for all) after each change
+        """
+        self._load_configs()
+        self.sync()
+        self._heartbeat()
+        last_beat = time.monotonic()
+        dirs: Dict[str, str] = {}
+        try:
+            while not self._stop.is_set():
+                if self._inotify is not None:
+                    new_dirs = self._watch_dirs()
+                    if new_dirs != dirs:
+                        self._inotify.remove_all()
+                        for path in new_dirs:
+                            self._inotify.add(path)
+                        dirs = new_dirs
+                    timeout = min(C.WATCHER_HEARTBEAT, self.interval * 5)
+                    changed = self._inotify.read(timeout)
+                    paths: Optional[Set[str]] = {dirs[i] for i in changed if i in dirs}
+                    if "" in paths:
+                        paths = None if self._load_configs() else paths - {""}
+                else:
+                    self._stop.wait(self.interval)
+                    self._load_configs()
+                    paths = None
+
+                if paths is None or paths:
+                    if self.sync(paths) and on_change is not None:
+                        on_change(paths)
+
+                if time.monotonic() - last_beat >= C.WATCHER_HEARTBEAT:
+                    self._heartbeat()
+                    last_beat = time.monotonic()
+        finally:
+            try:
+                if self.pid_file.read_text(encoding="utf-8").strip() == str(os.getpid()):
+                    self.pid_file.unlink()
+            except OSError:
+                pass
+            if self._inotify is not None:
+                self._inotify.close()